@@ -1,5 +1,6 @@
 import logging
 import random
+from collections import Counter
 
 import discord
 import tiktoken
@@ -30,6 +31,11 @@ class AIEmote(commands.Cog, Settings):
         self.aclient = None
         self.llm_model = DEFAULT_LLM_MODEL
         self.encoding = None
+        self.whitelist = {}
+        self.percent = 50
+        self.optin_users = []
+        self.optout_users = []
+        self.prefilter_stats: Counter[str] = Counter()
 
         default_global = {
             "percent": 50,
@@ -89,11 +95,11 @@ class AIEmote(commands.Cog, Settings):
 
     @commands.Cog.listener()
     async def on_message_without_command(self, message: discord.Message):
+        if not self.prefilter_message(message):
+            return
         ctx: commands.Context = await self.bot.get_context(message)
         if not (await self.is_valid_to_react(ctx)):
             return
-        if self.percent < random.randint(0, 99):
-            return
         emoji = await self.pick_emoji(message)
         if emoji:
             await message.add_reaction(emoji)
@@ -169,17 +175,42 @@ class AIEmote(commands.Cog, Settings):
             )
             return None
 
+    def prefilter_message(self, message: discord.Message) -> bool:
+        """Cheap checks done before building a Context, rejections are counted per stage"""
+        if message.guild is None:
+            stage = "no guild"
+        elif message.author.bot:
+            stage = "author is bot"
+        elif not self._is_whitelisted_channel(message.guild.id, message.channel):
+            stage = "channel not whitelisted"
+        elif message.author.id in self.optout_users:
+            stage = "user opted out"
+        elif not message.content or message.attachments:
+            stage = "no text content"
+        elif len(message.content) > 1500 or len(message.content) < 10:
+            stage = "message length"
+        elif self.percent < random.randint(0, 99):
+            stage = "percent roll"
+        else:
+            self.prefilter_stats["passed"] += 1
+            return True
+        self.prefilter_stats[stage] += 1
+        return False
+
+    def _is_whitelisted_channel(self, guild_id: int, channel) -> bool:
+        whitelist = self.whitelist.get(guild_id, [])
+        if isinstance(channel, discord.Thread):
+            return channel.parent_id in whitelist
+        return channel.id in whitelist
+
     async def is_valid_to_react(self, ctx: commands.Context):
         if ctx.guild is None or ctx.author.bot:
             return False
 
-        whitelist = self.whitelist.get(ctx.guild.id, [])
         if await self.bot.cog_disabled_in_guild(self, ctx.guild):
             return False
 
-        if not isinstance(ctx.channel, discord.Thread) and (ctx.channel.id not in whitelist):
-            return False
-        if isinstance(ctx.channel, discord.Thread) and (ctx.channel.parent_id not in whitelist):
+        if not self._is_whitelisted_channel(ctx.guild.id, ctx.channel):
             return False
 
         if not await self.bot.ignored_channel_or_guild(ctx):
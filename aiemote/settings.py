@@ -394,6 +394,16 @@ class Settings:
         settingsembed.add_field(
             name=_("LLM Model"), value=f"`{await self.config.llm_model()}`", inline=False
         )
+        skipped = "\n".join(
+            f"{stage}: `{count}`"
+            for stage, count in self.prefilter_stats.most_common()
+            if stage != "passed"
+        )
+        settingsembed.add_field(
+            name=_("Messages skipped before building context"),
+            value=skipped or _("None"),
+            inline=False,
+        )
         await ctx.send(embed=settingsembed)
         if len(globalembeds) > 1:
             await SimpleMenu(globalembeds).start(ctx)
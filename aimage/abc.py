@@ -17,6 +17,7 @@ class MixinMeta(ABC):
     session: ClientSession
     generating: dict
     autocomplete_cache: dict
+    blacklist_matchers: dict
 
     def __init__(self, *args):
         pass
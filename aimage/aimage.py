@@ -57,6 +57,7 @@ class AImage(Settings, ImageHandler, commands.Cog, metaclass=CompositeMetaClass)
         self.session = aiohttp.ClientSession()
         self.generating = defaultdict(lambda: False)
         self.autocomplete_cache = defaultdict(dict)
+        self.blacklist_matchers = {}
 
         self.config.register_guild(**default_guild)
 
@@ -0,0 +1,52 @@
+import re
+from typing import Iterable, Optional
+
+
+class TriggerMatcher:
+    """
+    Case-insensitive matcher for a list of trigger words.
+    The words are compiled into one regex shaped like a trie (shared prefixes are factored out),
+    so a search is a single pass over the text instead of one scan per word.
+    """
+
+    def __init__(self, words: Iterable[str], whole_words: bool = False):
+        self.words = {word.lower(): word for word in words if word}
+        self.whole_words = whole_words
+        self.pattern = self._compile()
+
+    def _compile(self) -> Optional[re.Pattern]:
+        if not self.words:
+            return None
+        trie = {}
+        for word in self.words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        pattern = _trie_to_regex(trie)
+        if self.whole_words:
+            pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+        return re.compile(pattern)
+
+    def __bool__(self) -> bool:
+        return self.pattern is not None
+
+    def search(self, text: str) -> Optional[str]:
+        """Returns the first trigger word found in the text, as it was configured"""
+        if self.pattern is None:
+            return None
+        match = self.pattern.search(text.lower())
+        if not match:
+            return None
+        return self.words.get(match.group(), match.group())
+
+
+def _trie_to_regex(node: dict) -> str:
+    is_end = "" in node
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in node.items() if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    # optional when a shorter word ends here, greedy so the longest word wins
+    return f"(?:{'|'.join(branches)}){'?' if is_end else ''}"
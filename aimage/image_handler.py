@@ -12,6 +12,7 @@ from redbot.core.i18n import Translator
 from aimage.abc import MixinMeta
 from aimage.apis.response import ImageResponse
 from aimage.common.helpers import delete_button_after, send_response
+from aimage.common.matcher import TriggerMatcher
 from aimage.common.params import ImageGenParams
 from aimage.views.image_actions import ImageActions
 
@@ -142,5 +143,11 @@ class ImageHandler(MixinMeta):
         )
 
     async def _contains_blacklisted_word(self, guild: discord.Guild, prompt: str):
-        blacklist = await self.config.guild(guild).words_blacklist()
-        return any(word in prompt.lower() for word in blacklist)
+        matcher = self.blacklist_matchers.get(guild.id)
+        if matcher is None:
+            blacklist = await self.config.guild(guild).words_blacklist()
+            matcher = self.blacklist_matchers[guild.id] = TriggerMatcher(blacklist)
+        word = matcher.search(prompt)
+        if word is not None:
+            logger.debug(f"Rejected prompt in {guild.name} for blacklisted word \"{word}\"")
+        return word is not None
@@ -317,6 +317,7 @@ class Settings(MixinMeta):
         if not added:
             return await ctx.send("No words added")
         await self.config.guild(ctx.guild).words_blacklist.set(current_words)
+        self.blacklist_matchers.pop(ctx.guild.id, None)
         return await ctx.send(f"Added words `{', '.join(added)}` to the blacklist")
 
     @blacklist.command(name="remove")
@@ -336,6 +337,7 @@ class Settings(MixinMeta):
         if not removed:
             return await ctx.send("No words removed")
         await self.config.guild(ctx.guild).words_blacklist.set(current_words)
+        self.blacklist_matchers.pop(ctx.guild.id, None)
         return await ctx.send(f"Removed words `{', '.join(removed)}` from blacklist")
 
     @blacklist.command(name="list", aliases=["show"])
@@ -371,6 +373,7 @@ class Settings(MixinMeta):
         Clear the blacklist to nothing!
         """
         await self.config.guild(ctx.guild).words_blacklist.set([])
+        self.blacklist_matchers.pop(ctx.guild.id, None)
         await ctx.tick(message="✅ Blacklist cleared.")
 
     @aimage.command()
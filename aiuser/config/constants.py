@@ -5,6 +5,45 @@ IMAGE_REQUEST_REPLY_PROMPT = "You sent the picture above. Respond accordingly."
 IMAGE_REQUEST_AIHORDE_URL = "https://aihorde.net/api"
 
 RANDOM_MESSAGE_TASK_RETRY_SECONDS = 33 * 60
+MESSAGE_BUFFER_SIZE = 100
+EMBED_WAIT_TIMEOUT = 3
+TOKEN_COUNT_CACHE_SIZE = 5000
+CACHED_MESSAGES_LIMIT = 100
+CACHED_MESSAGES_MAX_BYTES = 1024 * 1024
+CACHED_MESSAGES_TTL = 60 * 60 * 24
+HISTORY_CONVERSION_CONCURRENCY = 4
+HISTORY_CONVERSION_TIMEOUT = 10
+# lowest token estimate of a history message when sizing prefetch chunks (eg. image only messages)
+HISTORY_PREFETCH_MIN_TOKENS = 10
+STICKER_CACHE_SIZE = 5000
+PROMPT_TEMPLATE_CACHE_SIZE = 256
+APPLICATION_INFO_TTL = 60 * 60
+YOUTUBE_API_BATCH_SIZE = 50  # max ids per videos.list request
+YOUTUBE_METADATA_CACHE_SIZE = 1000
+YOUTUBE_METADATA_TTL = 60 * 60 * 6
+YOUTUBE_API_TIMEOUT = 10
+# image scanning: decoding / resizing / encoding runs in its own worker threads
+IMAGE_PREPROCESS_WORKERS = 2
+IMAGE_PREPROCESS_TIMEOUT = 30
+IMAGE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# local image scanning: captions requested within the window are batched, OCR runs in its own threads
+LOCAL_CAPTION_BATCH_WINDOW = 0.1
+LOCAL_CAPTION_BATCH_SIZE = 8
+LOCAL_OCR_WORKERS = 2
+LOCAL_VISION_TIMEOUT = 300
+
+# pooled HTTP connections (shared aiohttp session and the OpenAI client)
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = 10
+HTTP_KEEPALIVE_TIMEOUT = 30
+HTTP_DNS_CACHE_TTL = 300
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_TOTAL_TIMEOUT = 300
+
+# fractions of the endpoint's remaining rate limit budget
+# below low: one request at a time and only mentions / triggers, below critical: only mentions / slash commands
+RATELIMIT_LOW_BUDGET = 0.25
+RATELIMIT_CRITICAL_BUDGET = 0.1
 
 GROK_PRIMARY_TRIGGERS = ["grok", "gork"]
 GROK_SECONDARY_TRIGGERS = ["true", "explain", "confirm"]
@@ -21,5 +60,16 @@ YOUTUBE_VIDEO_ID_PATTERN = re.compile(
 SINGULAR_MENTION_PATTERN = re.compile(r"^<@!?&?(\d+)>$")
 REGEX_RUN_TIMEOUT = 5
 
+DISCORD_MESSAGE_LIMIT = 2000
+
+# tool calls: default seconds per call (per tool through `ToolCall.timeout`), total seconds per response and max rounds of calls per response
+TOOL_CALL_TIMEOUT = 15
+TOOL_CALLS_TIME_BUDGET = 45
+MAX_TOOL_CALL_ITERATIONS = 5
+# streamed responses: edits are rate limited by Discord (about 5 per 5 seconds per channel)
+STREAM_EDIT_INTERVAL = 1.5
+# wait for a bit of text before posting, so patterns removing a prefix (eg. `botname:`) can match first
+STREAM_FIRST_MESSAGE_MIN_CHARS = 40
+
 
 OPENROUTER_URL = "https://openrouter.ai/api/"
@@ -1,5 +1,4 @@
 import json
-from datetime import datetime
 
 from aiuser.types.enums import ScanImageMode
 
@@ -62,11 +61,15 @@ DEFAULT_GLOBAL = {
     "openai_endpoint_request_timeout": 60,
     "optout": [],
     "optin": [],
-    "ratelimit_reset": datetime(1990, 1, 1, 0, 1).strftime("%Y-%m-%d %H:%M:%S"),
     "max_random_prompt_length": 200,
     "max_prompt_length": 200,
     "custom_text_prompt": None,
     "endpoint_model_history": {},
+    "max_concurrent_llm_requests": 4,
+    "max_concurrent_llm_requests_per_guild": 2,
+    "openai_endpoint_warmup": True,
+    "remote_image_url_endpoints": [],
+    "local_vision_warmup": False,
 }
 
 DEFAULT_GUILD = {
@@ -81,6 +84,8 @@ DEFAULT_GUILD = {
     "scan_images_mode": ScanImageMode.LLM.value,
     "scan_images_model": DEFAULT_LLM_MODEL,
     "max_image_size": DEFAULT_IMAGE_UPLOAD_LIMIT,
+    "scan_images_format": "jpeg",
+    "scan_images_quality": 85,
     "model": DEFAULT_LLM_MODEL,
     "custom_text_prompt": None,
     "channels_whitelist": [],
@@ -112,9 +117,14 @@ DEFAULT_GUILD = {
     "grok_trigger": False,
     "custom_model_tokens_limit": None,
     "always_reply_on_words": [],
+    "always_reply_on_words_whole_words": False,
+    "response_debounce": 1,
+    "cache_stable_prompt": False,
+    "streaming_responses": False,
 }
 
 DEFAULT_CHANNEL = {"custom_text_prompt": None, "reply_percent": None}
 DEFAULT_ROLE = {"custom_text_prompt": None, "reply_percent": None}
 
 DEFAULT_MEMBER = {"custom_text_prompt": None, "reply_percent": None}
+DEFAULT_OPT_STATUS = {"opted_in": None}
@@ -46,6 +46,8 @@ VISION_SUPPORTED_MODELS = [
     "meta-llama/llama-3.2-90b-vision-instruct",
     "meta-llama/llama-3.2-11b-vision-instruct",
 ]
+# need explicit cache_control breakpoints for prompt caching on OpenRouter
+EXPLICIT_PROMPT_CACHING_MODEL_PREFIXES = ("anthropic/", "google/gemini")
 UNSUPPORTED_LOGIT_BIAS_MODELS = ["openai/o3-mini", "o3-mini", "o3-mini-2025-01-31"]
 OTHER_MODELS_LIMITS = {
     "nova-lite-v1": 280000,
@@ -1,29 +1,53 @@
 import logging
 import re
+from collections import Counter
 from datetime import datetime
+from typing import Optional, Sequence
 
 import discord
 from openai import AsyncOpenAI
 from redbot.core import Config, app_commands, commands
 from redbot.core.bot import Red
+from redbot.core.data_manager import cog_data_path
 from redbot.core.i18n import Translator, cog_i18n
 
+from aiuser.config.constants import (
+    CACHED_MESSAGES_LIMIT,
+    CACHED_MESSAGES_MAX_BYTES,
+    CACHED_MESSAGES_TTL,
+)
 from aiuser.config.defaults import (
     DEFAULT_CHANNEL,
     DEFAULT_GLOBAL,
     DEFAULT_GUILD,
     DEFAULT_MEMBER,
+    DEFAULT_OPT_STATUS,
     DEFAULT_ROLE,
 )
+from aiuser.core.embed_waiter import EmbedWaiter
 from aiuser.core.handlers import handle_message, handle_slash_command
+from aiuser.core.llm_scheduler import LLMScheduler
+from aiuser.core.message_buffer import MessageBuffer
+from aiuser.core.opt_store import OPT_STATUS_GROUP, OptStore
 from aiuser.core.random_message_task import RandomMessageTask
+from aiuser.core.ratelimits import RateLimitGovernor
+from aiuser.core.response_coordinator import ResponseCoordinator
+from aiuser.core.settings_cache import SettingsCache
+from aiuser.core.sticker_cache import StickerCache
+from aiuser.core.validators import is_whitelisted_channel
 from aiuser.dashboard.base import DashboardIntegration
+from aiuser.functions.registry import ToolRegistry
+from aiuser.messages_list.conversation import ConversationStore
+from aiuser.messages_list.converter.embed.youtube import YoutubeMetadata
+from aiuser.messages_list.converter.image.local_worker import LocalVisionWorker
+from aiuser.messages_list.converter.image.preprocess import ImagePreprocessor
 from aiuser.messages_list.entry import MessageEntry
 from aiuser.settings.base import Settings
 from aiuser.types.abc import CompositeMetaClass
 from aiuser.utils.cache import Cache
+from aiuser.utils.http import HTTPSessionManager
 
-from .openai_utils import setup_openai_client
+from .openai_utils import close_replaced_client, setup_openai_client
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 logging.getLogger("httpcore").setLevel(logging.WARNING)
@@ -57,25 +81,48 @@ class AIUser(
         self.channels_whitelist: dict[int, list[int]] = {}
         self.ignore_regex: dict[int, re.Pattern] = {}
         self.override_prompt_start_time: dict[int, datetime] = {}
-        self.cached_messages: Cache[int, MessageEntry] = Cache(limit=100)
+        self.cached_messages: Cache[int, MessageEntry] = Cache(
+            limit=CACHED_MESSAGES_LIMIT,
+            max_bytes=CACHED_MESSAGES_MAX_BYTES,
+            ttl=CACHED_MESSAGES_TTL,
+        )
+        self.settings_cache = SettingsCache(self.config)
+        self.opt_store = OptStore(self.config)
+        self.prefilter_stats: Counter[str] = Counter()
+        self.usage_stats: Counter[str] = Counter()
+        self.message_buffer = MessageBuffer()
+        self.conversations = ConversationStore()
+        self.embed_waiter = EmbedWaiter()
+        self.response_coordinator = ResponseCoordinator()
+        self.ratelimits = RateLimitGovernor()
+        self.llm_scheduler = LLMScheduler(self.settings_cache, self.ratelimits)
+        self.http_sessions = HTTPSessionManager()
+        self.youtube = YoutubeMetadata(self.http_sessions)
+        self.sticker_cache = StickerCache(bot)
+        self.tool_registry = ToolRegistry(self.settings_cache)
+        self.image_preprocessor = ImagePreprocessor(self.http_sessions)
+        self.local_vision = LocalVisionWorker()
 
         self.config.register_member(**DEFAULT_MEMBER)
         self.config.register_role(**DEFAULT_ROLE)
         self.config.register_channel(**DEFAULT_CHANNEL)
         self.config.register_guild(**DEFAULT_GUILD)
         self.config.register_global(**DEFAULT_GLOBAL)
+        self.config.init_custom(OPT_STATUS_GROUP, 1)
+        self.config.register_custom(OPT_STATUS_GROUP, **DEFAULT_OPT_STATUS)
 
     async def cog_load(self):
-        self.openai_client = await setup_openai_client(self.bot, self.config)
+        await self.reload_openai_client()
 
-        all_config = await self.config.all_guilds()
+        self.tool_registry.load()
+        await self.opt_store.load()
+        await self.reload_settings()
 
-        for guild_id, config in all_config.items():
-            self.optindefault[guild_id] = config["optin_by_default"]
-            self.channels_whitelist[guild_id] = config["channels_whitelist"]
-            pattern = config["ignore_regex"]
-
-            self.ignore_regex[guild_id] = re.compile(pattern) if pattern else None
+        if self.settings_cache.globals.local_vision_warmup:
+            try:
+                self.local_vision.start(cog_data_path(self), warm_up=True)
+            except ImportError:
+                logger.warning("Local image scanning dependencies not installed, not warming up")
 
         if logger.isEnabledFor(logging.DEBUG):
             # for development
@@ -84,6 +131,40 @@ class AIUser(
 
         self.random_message_trigger.start()
 
+    async def reload_settings(self, guild: Optional[discord.Guild] = None):
+        """Refresh the in-memory settings (of a guild, or everything) after config writes"""
+        if guild:
+            await self.settings_cache.reload_guild(guild)
+            guild_ids = [guild.id]
+        else:
+            await self.settings_cache.load()
+            guild_ids = list(self.settings_cache.guilds)
+
+        for guild_id in guild_ids:
+            settings = self.settings_cache.guild(guild_id)
+            self.optindefault[guild_id] = settings.optin_by_default
+            self.channels_whitelist[guild_id] = settings.channels_whitelist
+            pattern = settings.ignore_regex
+            self.ignore_regex[guild_id] = re.compile(pattern) if pattern else None
+
+        # eg. after `aiuser functions` commands
+        self.tool_registry.invalidate(guild.id if guild else None)
+
+    async def reload_openai_client(self):
+        """Create the OpenAI client again after its settings changed, closing the previous one"""
+        previous = self.openai_client
+        self.openai_client = await setup_openai_client(self.bot, self.config, self.ratelimits)
+        if previous:
+            close_replaced_client(previous)
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        # parent groups are invoked before their subcommand runs, only reload after the last one
+        if isinstance(ctx.command, commands.Group) and ctx.invoked_subcommand:
+            return
+        # owner settings can apply to every guild
+        bot_wide = ctx.command.qualified_name.startswith("aiuserowner")
+        await self.reload_settings(None if bot_wide else ctx.guild)
+
     def format_help_for_context(self, ctx):
         pre_processed = super().format_help_for_context(ctx)
         n = "\n" if "\n\n" not in pre_processed else ""
@@ -98,19 +179,38 @@ class AIUser(
         if self.openai_client:
             await self.openai_client.close()
         self.random_message_trigger.cancel()
+        self.response_coordinator.cancel()
+        await self.http_sessions.close()
+        self.image_preprocessor.shutdown()
+        self.local_vision.shutdown()
 
     async def red_delete_data_for_user(self, *, requester, user_id: int):
         for guild in self.bot.guilds:
             member = guild.get_member(user_id)
             if member:
                 await self.config.member(member).clear()
-                # TODO: remove user messages from cache instead of clearing the whole cache
-                self.cached_messages = Cache(limit=100)
+                await self.reload_settings(guild)
+        self.cached_messages.evict_tag(user_id)
+        self.message_buffer.remove_author(user_id)
+        self.conversations.remove_author(user_id)
 
     @commands.Cog.listener()
     async def on_red_api_tokens_update(self, service_name, _):
         if service_name in ["openai", "openrouter"]:
-            self.openai_client = await setup_openai_client(self.bot, self.config)
+            await self.reload_openai_client()
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        self.settings_cache.invalidate_role_index(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.settings_cache.invalidate_role_index(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.position != after.position:
+            self.settings_cache.invalidate_role_index(after.guild.id)
 
     @app_commands.command(name="chat")
     @app_commands.describe(text="The prompt you want to send to the AI.")
@@ -128,3 +228,48 @@ class AIUser(
     @commands.Cog.listener()
     async def on_message_without_command(self, message: discord.Message):
         await handle_message(self, message)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild and is_whitelisted_channel(self, message.guild.id, message.channel):
+            self.message_buffer.add(message)
+        else:
+            # not fed while not whitelisted, the buffer would have a gap if whitelisted again
+            self.message_buffer.forget(message.channel.id)
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, _: discord.Message, after: discord.Message):
+        self.message_buffer.update(after)
+        self.embed_waiter.resolve(after)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        self.conversations.invalidate(payload.channel_id, payload.message_id)
+        if payload.cached_message is None:
+            self.message_buffer.update_raw(payload)
+            self.embed_waiter.resolve_raw(payload)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.message_buffer.remove(payload.channel_id, {payload.message_id})
+        self.conversations.remove(payload.channel_id, {payload.message_id})
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        self.message_buffer.remove(payload.channel_id, payload.message_ids)
+        self.conversations.remove(payload.channel_id, payload.message_ids)
+
+    @commands.Cog.listener()
+    async def on_guild_stickers_update(
+        self,
+        _: discord.Guild,
+        before: Sequence[discord.GuildSticker],
+        after: Sequence[discord.GuildSticker],
+    ):
+        self.sticker_cache.update_guild(before, after)
+
+    @commands.Cog.listener()
+    async def on_connect(self):
+        # events may have been missed while disconnected
+        self.message_buffer.clear()
+        self.conversations.clear()
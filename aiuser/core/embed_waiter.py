@@ -0,0 +1,55 @@
+import asyncio
+import copy
+import logging
+
+import discord
+
+from aiuser.config.constants import EMBED_WAIT_TIMEOUT
+from aiuser.utils.utilities import is_embed_valid
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class EmbedWaiter:
+    """Waits for Discord to attach link embeds to a message, resolved by gateway edit events"""
+
+    def __init__(self):
+        self.waiters: dict[int, tuple[asyncio.Future, discord.Message]] = {}
+
+    async def wait(
+        self, message: discord.Message, timeout: float = EMBED_WAIT_TIMEOUT
+    ) -> discord.Message:
+        """Returns the message with its embeds, or the original message on timeout"""
+        if is_embed_valid(message):
+            return message
+
+        if message.id in self.waiters:
+            future, _ = self.waiters[message.id]
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.waiters[message.id] = (future, message)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return message
+        finally:
+            if message.id in self.waiters and self.waiters[message.id][0] is future:
+                del self.waiters[message.id]
+
+    def resolve(self, message: discord.Message):
+        if message.id not in self.waiters:
+            return
+        future, _ = self.waiters[message.id]
+        if not future.done() and is_embed_valid(message):
+            future.set_result(message)
+
+    def resolve_raw(self, payload: discord.RawMessageUpdateEvent):
+        """For edits of messages that aren't in the bot's message cache"""
+        embeds = payload.data.get("embeds")
+        if payload.message_id not in self.waiters or not embeds:
+            return
+        _, original = self.waiters[payload.message_id]
+        message = copy.copy(original)
+        message.embeds = [discord.Embed.from_dict(embed) for embed in embeds]
+        self.resolve(message)
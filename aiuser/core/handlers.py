@@ -1,20 +1,18 @@
 # handlers.py
 
-import asyncio
 import logging
 import random
-from datetime import datetime
 
 import discord
 from redbot.core import commands
 
 from aiuser.config.constants import URL_PATTERN
 from aiuser.config.defaults import DEFAULT_REPLY_PERCENT
+from aiuser.core.llm_scheduler import LLMPriority
 from aiuser.core.triggers import check_triggers
-from aiuser.core.validators import is_valid_message
+from aiuser.core.validators import is_valid_message, prefilter_message
 from aiuser.response.dispatcher import dispatch_response
 from aiuser.types.abc import MixinMeta
-from aiuser.utils.utilities import is_embed_valid
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -30,74 +28,80 @@ async def handle_slash_command(cog: MixinMeta, inter: discord.Interaction, text:
         return await ctx.send("You're not allowed to use this command here.", ephemeral=True)
     elif await get_percentage(cog, ctx) == 1.0:
         pass
-    elif not (await cog.config.guild(ctx.guild).reply_to_mentions_replies()):
+    elif not cog.settings_cache.guild(ctx.guild.id).reply_to_mentions_replies:
         return await ctx.send("This command is not enabled.", ephemeral=True)
 
-    rate_limit_reset = datetime.strptime(await cog.config.ratelimit_reset(), "%Y-%m-%d %H:%M:%S")
-    if rate_limit_reset > datetime.now():
+    if not cog.llm_scheduler.admits(LLMPriority.DIRECT):
         return await ctx.send("The command is currently being ratelimited!", ephemeral=True)
 
     try:
-        await dispatch_response(cog, ctx)
+        await dispatch_response(cog, ctx, priority=LLMPriority.DIRECT)
     except Exception:
         await ctx.send(":warning: Error in generating response!", ephemeral=True)
 
 
 async def handle_message(cog: MixinMeta, message: discord.Message):
     """Handle regular message events"""
+    if not prefilter_message(cog, message):
+        return
+    cog.message_buffer.add(message)
+
     ctx: commands.Context = await cog.bot.get_context(message)
 
     if not (await is_valid_message(cog, ctx)):
         return
 
-    if await check_triggers(cog, ctx, message):
-        pass
-    elif random.random() > await get_percentage(cog, ctx):
-        return
+    priority = await check_triggers(cog, ctx, message)
+    if priority is None:
+        if random.random() > await get_percentage(cog, ctx):
+            return
+        priority = LLMPriority.RANDOM
 
-    rate_limit_reset = datetime.strptime(await cog.config.ratelimit_reset(), "%Y-%m-%d %H:%M:%S")
-    if rate_limit_reset > datetime.now():
+    if not cog.llm_scheduler.admits(priority):
         logger.debug(
-            f"Want to respond but ratelimited until {rate_limit_reset.strftime('%Y-%m-%d %H:%M:%S')}"
+            f"Want to respond but ratelimited until {cog.ratelimits.blocked_until} (budget left: {cog.ratelimits.budget()})"
         )
-        if await check_triggers(cog, ctx, message) or await get_percentage(cog, ctx) == 1.0:
+        if priority != LLMPriority.RANDOM or await get_percentage(cog, ctx) == 1.0:
             await ctx.react_quietly("💤", message="`aiuser` is ratedlimited")
         return
 
+    # mentions and replies are answered right away, other triggers wait to be merged
+    debounce = (
+        0
+        if priority == LLMPriority.DIRECT
+        else cog.settings_cache.guild(ctx.guild.id).response_debounce
+    )
+    cog.response_coordinator.submit(
+        ctx, priority, lambda ctx, priority: respond_to_message(cog, ctx, priority), debounce
+    )
+
+
+async def respond_to_message(cog: MixinMeta, ctx: commands.Context, priority: LLMPriority):
+    """Respond to the (newest) triggered message in a channel"""
     if URL_PATTERN.search(ctx.message.content):
-        ctx = await wait_for_embed(ctx)
+        ctx = await wait_for_embed(cog, ctx)
 
-    await dispatch_response(cog, ctx)
+    await dispatch_response(cog, ctx, priority=priority)
 
 
 async def get_percentage(cog: MixinMeta, ctx: commands.Context) -> float:
     """Get reply percentage based on member/role/channel/guild settings"""
-    role_percent = None
     author = ctx.author
+    settings = cog.settings_cache.guild(ctx.guild.id)
 
-    for role in author.roles:
-        if role.id in (await cog.config.all_roles()):
-            role_percent = await cog.config.role(role).reply_percent()
-            break
-
-    percentage = await cog.config.member(author).reply_percent()
+    percentage = settings.member(author.id).reply_percent
     if percentage is None:
-        percentage = role_percent
+        percentage = cog.settings_cache.role_index(ctx.guild).reply_percent(author)
     if percentage is None:
-        percentage = await cog.config.channel(ctx.channel).reply_percent()
+        percentage = cog.settings_cache.channel(ctx.channel.id).reply_percent
     if percentage is None:
-        percentage = await cog.config.guild(ctx.guild).reply_percent()
+        percentage = settings.reply_percent
     if percentage is None:
         percentage = DEFAULT_REPLY_PERCENT
     return percentage
 
 
-async def wait_for_embed(ctx: commands.Context) -> commands.Context:
+async def wait_for_embed(cog: MixinMeta, ctx: commands.Context) -> commands.Context:
     """Wait for possible embed to be valid"""
-    start_time = asyncio.get_event_loop().time()
-    while not is_embed_valid(ctx.message):
-        ctx.message = await ctx.channel.fetch_message(ctx.message.id)
-        if asyncio.get_event_loop().time() - start_time >= 3:
-            break
-        await asyncio.sleep(1)
+    ctx.message = await cog.embed_waiter.wait(ctx.message)
     return ctx
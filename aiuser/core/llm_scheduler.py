@@ -0,0 +1,146 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Optional
+
+from aiuser.config.constants import RATELIMIT_CRITICAL_BUDGET, RATELIMIT_LOW_BUDGET
+from aiuser.core.ratelimits import RateLimitGovernor
+from aiuser.core.settings_cache import SettingsCache
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class LLMPriority(IntEnum):
+    """Lower values are served first"""
+
+    DIRECT = 0  # slash commands, mentions and replies
+    TRIGGER = 1  # trigger words, grok, ongoing conversations
+    RANDOM = 2  # reply percentage rolls
+    RANDOM_TASK = 3  # random message task
+
+
+# max seconds a request can be queued before it is dropped (None = never)
+QUEUE_DEADLINES: dict[LLMPriority, Optional[float]] = {
+    LLMPriority.DIRECT: None,
+    LLMPriority.TRIGGER: 60,
+    LLMPriority.RANDOM: 20,
+    LLMPriority.RANDOM_TASK: 10,
+}
+
+
+class LLMRequestDropped(Exception):
+    """A LLM request waited longer than its priority's deadline, or was shed to save the rate limit budget"""
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM endpoint.
+    Limits concurrent requests globally and per guild, and serves queued requests by priority.
+    When the endpoint's rate limit budget runs low, requests are sent one at a time and low priority ones are shed.
+    """
+
+    def __init__(self, settings_cache: SettingsCache, ratelimits: RateLimitGovernor):
+        self.settings_cache = settings_cache
+        self.ratelimits = ratelimits
+        self.running = 0
+        self.running_per_guild: Counter[int] = Counter()
+        # (priority, sequence, guild id, future)
+        self.queue: list[tuple[LLMPriority, int, int, asyncio.Future]] = []
+        self.sequence = itertools.count()
+        self.stats: Counter[str] = Counter()
+        self.wait_totals: Counter[LLMPriority] = Counter()
+        self.wait_counts: Counter[LLMPriority] = Counter()
+
+    @asynccontextmanager
+    async def slot(self, guild_id: int, priority: LLMPriority):
+        """Hold a request slot for the duration of the block"""
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.append((priority, next(self.sequence), guild_id, future))
+        self._wake()
+
+        try:
+            if not future.done():
+                await asyncio.wait({future}, timeout=QUEUE_DEADLINES[priority])
+        except BaseException:
+            self._abandon(guild_id, future)
+            raise
+        if not future.done():
+            self._abandon(guild_id, future)
+            self.stats[f"dropped ({priority.name.lower()})"] += 1
+            raise LLMRequestDropped(f"{priority.name} request waited over {QUEUE_DEADLINES[priority]}s")
+        if not self.admits(priority):
+            self._release(guild_id)
+            self.stats[f"shed ({priority.name.lower()})"] += 1
+            raise LLMRequestDropped(f"{priority.name} request shed by the ratelimit budget")
+
+        self.wait_totals[priority] += time.monotonic() - start
+        self.wait_counts[priority] += 1
+        try:
+            yield
+        finally:
+            self._release(guild_id)
+
+    def admits(self, priority: LLMPriority) -> bool:
+        """Whether the rate limit budget allows a request of this priority to be sent now"""
+        if self.ratelimits.is_limited():
+            return False
+        budget = self.ratelimits.budget()
+        if budget is None:
+            return True
+        if budget < RATELIMIT_CRITICAL_BUDGET:
+            return priority == LLMPriority.DIRECT
+        if budget < RATELIMIT_LOW_BUDGET:
+            return priority <= LLMPriority.TRIGGER
+        return True
+
+    def queued(self) -> Counter[LLMPriority]:
+        return Counter(priority for priority, *_ in self.queue)
+
+    def average_wait(self, priority: LLMPriority) -> float:
+        if not self.wait_counts[priority]:
+            return 0.0
+        return self.wait_totals[priority] / self.wait_counts[priority]
+
+    def _has_capacity(self, guild_id: int) -> bool:
+        settings = self.settings_cache.globals
+        budget = self.ratelimits.budget()
+        max_running = settings.max_concurrent_llm_requests
+        if budget is not None and budget < RATELIMIT_LOW_BUDGET:
+            # slow down
+            max_running = 1
+        return (
+            self.running < max_running
+            and self.running_per_guild[guild_id] < settings.max_concurrent_llm_requests_per_guild
+        )
+
+    def _wake(self):
+        """Hand free slots to the highest priority requests that fit in their guild's cap"""
+        while True:
+            eligible = [entry for entry in self.queue if self._has_capacity(entry[2])]
+            if not eligible:
+                return
+            entry = min(eligible)
+            self.queue.remove(entry)
+            self.running += 1
+            self.running_per_guild[entry[2]] += 1
+            entry[3].set_result(None)
+
+    def _release(self, guild_id: int):
+        self.running -= 1
+        self.running_per_guild[guild_id] -= 1
+        if self.running_per_guild[guild_id] <= 0:
+            del self.running_per_guild[guild_id]
+        self._wake()
+
+    def _abandon(self, guild_id: int, future: asyncio.Future):
+        """Leave the queue, giving back the slot if one was handed over in the meantime"""
+        if future.done():
+            self._release(guild_id)
+            return
+        future.cancel()
+        self.queue = [entry for entry in self.queue if entry[3] is not future]
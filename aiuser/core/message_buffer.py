@@ -0,0 +1,150 @@
+import copy
+import logging
+from collections import Counter, deque
+from datetime import datetime
+from typing import Optional
+
+import discord
+
+from aiuser.config.constants import MESSAGE_BUFFER_SIZE
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class MessageBuffer:
+    """
+    Bounded per-channel buffer of recent messages, fed by gateway events.
+
+    Each channel's buffer has no gaps from its oldest message up to now,
+    so reads can be served locally and only older messages need the API.
+    Channels that stop being fed (eg. removed from the whitelist) must be forgotten to keep that true.
+    """
+
+    def __init__(self, capacity: int = MESSAGE_BUFFER_SIZE):
+        self.capacity = capacity
+        self.channels: dict[int, deque[discord.Message]] = {}
+        self.stats: Counter[str] = Counter()
+
+    def add(self, message: discord.Message):
+        buffer = self.channels.get(message.channel.id)
+        if buffer is None:
+            buffer = self.channels[message.channel.id] = deque(maxlen=self.capacity)
+        elif buffer and buffer[-1].id >= message.id:
+            # already buffered, or out of order
+            return self.update(message)
+        buffer.append(message)
+
+    def update(self, message: discord.Message):
+        buffer = self.channels.get(message.channel.id)
+        if not buffer:
+            return
+        for i, buffered in enumerate(buffer):
+            if buffered.id == message.id:
+                buffer[i] = message
+                return
+
+    def update_raw(self, payload: discord.RawMessageUpdateEvent):
+        """For edits of messages that aren't in the bot's message cache (`on_message_edit` isn't fired for them)"""
+        buffered = self.get(payload.channel_id, payload.message_id)
+        if buffered is None:
+            return
+        message = copy.copy(buffered)
+        # same as discord.py does for edits of cached messages
+        message._update(payload.data)
+        self.update(message)
+
+    def remove(self, channel_id: int, message_ids: set[int]):
+        buffer = self.channels.get(channel_id)
+        if not buffer:
+            return
+        kept = [message for message in buffer if message.id not in message_ids]
+        if len(kept) != len(buffer):
+            self.channels[channel_id] = deque(kept, maxlen=self.capacity)
+
+    def remove_author(self, user_id: int):
+        for channel_id, buffer in self.channels.items():
+            ids = {message.id for message in buffer if message.author.id == user_id}
+            if ids:
+                self.remove(channel_id, ids)
+
+    def forget(self, channel_id: int):
+        self.channels.pop(channel_id, None)
+
+    def clear(self):
+        """Forget everything, eg. when gateway events may have been missed"""
+        self.channels.clear()
+
+    def get(self, channel_id: int, message_id: int) -> Optional[discord.Message]:
+        for message in reversed(self.channels.get(channel_id, ())):
+            if message.id == message_id:
+                return message
+        return None
+
+    def covers(self, channel_id: int, message_id: int) -> bool:
+        """Whether the buffer would contain this message if it still existed"""
+        buffer = self.channels.get(channel_id)
+        return bool(buffer) and buffer[0].id <= message_id
+
+    def latest(self, channel_id: int) -> Optional[discord.Message]:
+        buffer = self.channels.get(channel_id)
+        return buffer[-1] if buffer else None
+
+    async def history(
+        self,
+        channel: discord.abc.Messageable,
+        limit: int,
+        before: Optional[discord.abc.Snowflake] = None,
+        after: Optional[datetime] = None,
+    ) -> list[discord.Message]:
+        """Same as `channel.history(oldest_first=False)`, but served from the buffer where possible"""
+        if limit <= 0:
+            return []
+
+        buffer = self.channels.get(channel.id, ())
+        messages = [
+            message
+            for message in reversed(buffer)
+            if (before is None or message.id < before.id)
+            and (after is None or message.created_at > after)
+        ]
+        if len(messages) >= limit:
+            self.stats["buffer hits"] += 1
+            return messages[:limit]
+        if buffer and after is not None and buffer[0].created_at <= after:
+            # buffer already reaches back past the cutoff
+            self.stats["buffer hits"] += 1
+            return messages
+
+        # fill the gap before the oldest known message
+        anchor = messages[-1] if messages else before
+        if buffer and (anchor is None or buffer[0].id < anchor.id):
+            anchor = buffer[0]
+        self.stats["api fetches"] += 1
+        fetched = [
+            message
+            async for message in channel.history(
+                limit=limit - len(messages),
+                before=anchor,
+                after=after,
+                oldest_first=False,
+            )
+        ]
+        if buffer and anchor is not None and anchor.id == buffer[0].id:
+            self._backfill(channel.id, buffer, anchor, fetched)
+        return messages + fetched
+
+    def _backfill(
+        self,
+        channel_id: int,
+        expected: deque[discord.Message],
+        anchor: discord.abc.Snowflake,
+        older: list[discord.Message],
+    ):
+        buffer = self.channels.get(channel_id)
+        # the buffer may have been cleared or replaced (eg. by `remove`) while fetching
+        if buffer is not expected or not buffer or buffer[0].id != anchor.id:
+            return
+        for message in older:
+            if len(buffer) >= self.capacity:
+                break
+            buffer.appendleft(message)
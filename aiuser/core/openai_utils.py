@@ -1,8 +1,7 @@
+import asyncio
 import json
 import logging
-import random
-from datetime import datetime, timedelta
-from typing import Callable, Optional
+from typing import Awaitable, Callable, Optional
 
 import httpx
 from discord.ext import commands
@@ -10,19 +9,33 @@ from openai import AsyncOpenAI
 from redbot.core import Config
 from redbot.core.bot import Red
 
-from ..config.constants import OPENROUTER_URL
+from ..config.constants import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    OPENROUTER_URL,
+)
+from .ratelimits import RateLimitGovernor
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
+# warm ups and closing of replaced clients
+_background_tasks: set[asyncio.Task] = set()
+
 
 async def setup_openai_client(
-    bot: Red, config: Config, ctx: Optional[commands.Context] = None
+    bot: Red,
+    config: Config,
+    ratelimits: RateLimitGovernor,
+    ctx: Optional[commands.Context] = None,
 ) -> Optional[AsyncOpenAI]:
     """Initialize the OpenAI client with appropriate configuration.
 
     Args:
         bot: The Red bot instance
         config: The cog's Config instance
+        ratelimits: Governor to be updated from the rate limit headers of responses
         ctx: Optional context for error messaging
 
     Returns:
@@ -60,10 +73,15 @@ async def setup_openai_client(
 
     timeout = await config.openai_endpoint_request_timeout()
     client = httpx.AsyncClient(
-        event_hooks={"request": [log_request_prompt], "response": [create_ratelimit_hook(config)]}
+        event_hooks={"request": [log_request_prompt], "response": [create_ratelimit_hook(ratelimits)]},
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_LIMIT,
+            max_keepalive_connections=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_TIMEOUT,
+        ),
     )
 
-    return AsyncOpenAI(
+    openai_client = AsyncOpenAI(
         api_key=api_key or "sk-placeholderkey",
         base_url=base_url,
         timeout=timeout,
@@ -71,6 +89,37 @@ async def setup_openai_client(
         http_client=client,
     )
 
+    if await config.openai_endpoint_warmup():
+        _run_in_background(warm_up_connection(client, str(openai_client.base_url)))
+
+    return openai_client
+
+
+def close_replaced_client(openai_client: AsyncOpenAI) -> None:
+    """Close a replaced client in the background, once requests still using it are done or have timed out"""
+    timeout = openai_client.timeout if isinstance(openai_client.timeout, (int, float)) else 0
+    _run_in_background(_close_after(openai_client, timeout))
+
+
+async def _close_after(openai_client: AsyncOpenAI, delay: float) -> None:
+    await asyncio.sleep(delay)
+    await openai_client.close()
+
+
+def _run_in_background(coro: Awaitable[None]) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def warm_up_connection(client: httpx.AsyncClient, base_url: str) -> None:
+    """Open a pooled connection to the endpoint, so the first request doesn't wait for the TCP / TLS handshake."""
+    try:
+        await client.head(base_url, timeout=HTTP_CONNECT_TIMEOUT)
+        logger.debug(f"Warmed up connection to {base_url}")
+    except Exception as e:
+        logger.debug(f"Failed warming up connection to {base_url}: {e}")
+
 
 async def log_request_prompt(request: httpx.Request) -> None:
     """Log the request prompt for debugging purposes."""
@@ -103,80 +152,19 @@ async def log_request_prompt(request: httpx.Request) -> None:
         logger.debug(f"Error logging request prompt: {e}")
 
 
-def create_ratelimit_hook(config: Config) -> Callable[[httpx.Response], None]:
-    """Create a hook function for handling rate limit responses.
+def create_ratelimit_hook(
+    ratelimits: RateLimitGovernor,
+) -> Callable[[httpx.Response], Awaitable[None]]:
+    """Create a hook function that feeds rate limit headers to the governor.
 
     Args:
-        config: The cog's Config instance
+        ratelimits: The cog's RateLimitGovernor instance
 
     Returns:
         A hook function that updates rate limit information
     """
 
     async def update_ratelimit_hook(response: httpx.Response) -> None:
-        if not str(response.url).startswith("https://api.openai.com/"):
-            return
-
-        headers = response.headers
-        remaining_requests = float(headers.get("x-ratelimit-remaining-requests", 1))
-        remaining_tokens = float(headers.get("x-ratelimit-remaining-tokens", 1))
-
-        timestamp = datetime.now()
-
-        if remaining_requests == 0:
-            request_reset_time = extract_time_delta(headers.get("x-ratelimit-reset-requests"))
-            timestamp = max(timestamp, datetime.now() + request_reset_time)
-        elif remaining_tokens == 0:
-            tokens_reset_time = extract_time_delta(headers.get("x-ratelimit-reset-tokens"))
-            timestamp = max(timestamp, datetime.now() + tokens_reset_time)
-
-        if remaining_requests == 0 or remaining_tokens == 0:
-            logger.warning(
-                f"OpenAI ratelimit reached! Next ratelimit reset at {timestamp}. "
-                "(Try a non-trial key)"
-            )
-            await config.ratelimit_reset.set(timestamp.strftime("%Y-%m-%d %H:%M:%S"))
+        ratelimits.update(response)
 
     return update_ratelimit_hook
-
-
-def extract_time_delta(time_str: Optional[str]) -> timedelta:
-    """Extract timedelta from OpenAI's ratelimit time format.
-
-    Args:
-        time_str: Time string in OpenAI format (e.g., "1d", "2h", "30m", "45s")
-
-    Returns:
-        timedelta object representing the time
-    """
-    if not time_str:
-        return timedelta(seconds=5)
-
-    days, hours, minutes, seconds = 0, 0, 0, 0
-
-    if time_str.endswith("ms"):
-        time_str = time_str[:-2]
-        seconds += 1
-
-    components = time_str.split("d")
-    if len(components) > 1:
-        days = float(components[0])
-        time_str = components[1]
-
-    components = time_str.split("h")
-    if len(components) > 1:
-        hours = float(components[0])
-        time_str = components[1]
-
-    components = time_str.split("m")
-    if len(components) > 1:
-        minutes = float(components[0])
-        time_str = components[1]
-
-    components = time_str.split("s")
-    if len(components) > 1:
-        seconds = float(components[0])
-
-    seconds += random.randint(2, 3)
-
-    return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
@@ -0,0 +1,74 @@
+import logging
+
+from redbot.core import Config
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+OPT_STATUS_GROUP = "OPT_STATUS"
+
+
+class OptStore:
+    """
+    Bot-wide opt-in / opt-out membership.
+    Lookups are done against in-memory sets, and only the changed user is written back to config.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.optin: set[int] = set()
+        self.optout: set[int] = set()
+
+    async def load(self):
+        await self._migrate_legacy_lists()
+
+        self.optin.clear()
+        self.optout.clear()
+        for user_id, data in (await self.config.custom(OPT_STATUS_GROUP).all()).items():
+            if data.get("opted_in") is True:
+                self.optin.add(int(user_id))
+            elif data.get("opted_in") is False:
+                self.optout.add(int(user_id))
+
+    async def _migrate_legacy_lists(self):
+        """Move the old global `optin` / `optout` lists into per-user entries"""
+        optin = await self.config.optin()
+        optout = await self.config.optout()
+        if not optin and not optout:
+            return
+
+        logger.info(f"Migrating {len(optin)} opted in and {len(optout)} opted out users")
+        # one write for every user, a write per user rewrites the whole config file each time
+        async with self.config.custom(OPT_STATUS_GROUP).all() as data:
+            for user_id in optin:
+                data.setdefault(str(user_id), {})["opted_in"] = True
+            for user_id in optout:
+                data.setdefault(str(user_id), {})["opted_in"] = False
+        await self.config.optin.set([])
+        await self.config.optout.set([])
+
+    def is_opted_in(self, user_id: int) -> bool:
+        return user_id in self.optin
+
+    def is_opted_out(self, user_id: int) -> bool:
+        return user_id in self.optout
+
+    def has_chosen(self, user_id: int) -> bool:
+        return user_id in self.optin or user_id in self.optout
+
+    async def opt_in(self, user_id: int) -> bool:
+        """Returns False if the user was already opted in"""
+        if user_id in self.optin:
+            return False
+        self.optout.discard(user_id)
+        self.optin.add(user_id)
+        await self.config.custom(OPT_STATUS_GROUP, str(user_id)).opted_in.set(True)
+        return True
+
+    async def opt_out(self, user_id: int) -> bool:
+        """Returns False if the user was already opted out"""
+        if user_id in self.optout:
+            return False
+        self.optin.discard(user_id)
+        self.optout.add(user_id)
+        await self.config.custom(OPT_STATUS_GROUP, str(user_id)).opted_in.set(False)
+        return True
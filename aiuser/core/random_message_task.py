@@ -7,6 +7,7 @@ from discord.ext import tasks
 
 from aiuser.config.constants import RANDOM_MESSAGE_TASK_RETRY_SECONDS
 from aiuser.config.defaults import DEFAULT_PROMPT
+from aiuser.core.llm_scheduler import LLMPriority
 from aiuser.messages_list.messages import create_messages_list
 from aiuser.response.dispatcher import dispatch_response
 from aiuser.types.abc import MixinMeta
@@ -57,7 +58,9 @@ class RandomMessageTask(MixinMeta):
             )
             messages_list.can_reply = False
 
-            return await dispatch_response(self, ctx, messages_list)
+            return await dispatch_response(
+                self, ctx, messages_list, priority=LLMPriority.RANDOM_TASK
+            )
 
     async def get_discord_context(self, guild_id: int, channels: list):
         guild = self.bot.get_guild(guild_id)
@@ -70,7 +73,9 @@ class RandomMessageTask(MixinMeta):
         if not channel:
             raise ValueError(f"Channel not found in guild {guild.name}")
 
-        last_message = await channel.fetch_message(channel.last_message_id)
+        last_message = self.message_buffer.get(
+            channel.id, channel.last_message_id
+        ) or await channel.fetch_message(channel.last_message_id)
         ctx = await self.bot.get_context(last_message)
 
         return last_message, ctx
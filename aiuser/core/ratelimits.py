@@ -0,0 +1,173 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+@dataclass
+class RateLimitBucket:
+    remaining: float
+    limit: Optional[float] = None
+    reset_at: Optional[datetime] = None
+
+    def is_expired(self, now: datetime) -> bool:
+        return self.reset_at is not None and self.reset_at <= now
+
+
+class RateLimitGovernor:
+    """
+    In-memory view of the endpoint's rate limits, updated from the headers of every response.
+
+    Understands OpenAI style headers (`x-ratelimit-remaining-requests` / `-tokens`, also sent by Groq, Azure, etc.),
+    OpenRouter style headers (`x-ratelimit-remaining` with an epoch reset) and `retry-after` on 429s.
+    """
+
+    def __init__(self):
+        self.buckets: dict[str, RateLimitBucket] = {}
+        self.blocked_until: Optional[datetime] = None
+
+    def update(self, response: httpx.Response):
+        headers = response.headers
+        now = datetime.now()
+        was_limited = self.is_limited()
+
+        for kind in ("requests", "tokens"):
+            self._update_bucket(
+                kind,
+                headers.get(f"x-ratelimit-remaining-{kind}"),
+                headers.get(f"x-ratelimit-limit-{kind}"),
+                headers.get(f"x-ratelimit-reset-{kind}"),
+                now,
+            )
+        self._update_bucket(
+            "requests",
+            headers.get("x-ratelimit-remaining"),
+            headers.get("x-ratelimit-limit"),
+            headers.get("x-ratelimit-reset"),
+            now,
+        )
+
+        if response.status_code == 429:
+            wait = parse_reset(headers.get("retry-after"), now) or extract_time_delta(None)
+            self._block_until(now + wait, now)
+        for bucket in self.buckets.values():
+            if bucket.remaining <= 0 and not bucket.is_expired(now):
+                self._block_until(bucket.reset_at or now + extract_time_delta(None), now)
+
+        if not was_limited and self.is_limited():
+            logger.warning(
+                f"Ratelimit reached for {response.url.host}! Next ratelimit reset at {self.blocked_until}."
+            )
+
+    def _block_until(self, until: datetime, now: datetime):
+        self.blocked_until = max(self.blocked_until or now, until)
+
+    def _update_bucket(
+        self,
+        kind: str,
+        remaining: Optional[str],
+        limit: Optional[str],
+        reset: Optional[str],
+        now: datetime,
+    ):
+        if remaining is None:
+            return
+        try:
+            bucket = RateLimitBucket(remaining=float(remaining))
+            if limit is not None:
+                bucket.limit = float(limit)
+        except ValueError:
+            return
+        # without a reset, expire it soon so it can't hold the budget down until the next response
+        wait = parse_reset(reset, now)
+        bucket.reset_at = now + (wait if wait is not None else extract_time_delta(None))
+        self.buckets[kind] = bucket
+
+    def reset(self):
+        """Forget everything, eg. when the endpoint changes"""
+        self.buckets.clear()
+        self.blocked_until = None
+
+    def is_limited(self) -> bool:
+        return self.blocked_until is not None and self.blocked_until > datetime.now()
+
+    def budget(self) -> Optional[float]:
+        """Lowest fraction of any budget left (0 to 1), or None if the endpoint doesn't report limits"""
+        now = datetime.now()
+        fractions = [
+            bucket.remaining / bucket.limit
+            for bucket in self.buckets.values()
+            if bucket.limit and not bucket.is_expired(now)
+        ]
+        return min(fractions) if fractions else None
+
+
+def parse_reset(value: Optional[str], now: datetime) -> Optional[timedelta]:
+    """Parse a reset header, which can be a duration (`6m0s`, `20ms`), seconds, an epoch timestamp or a HTTP date"""
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+
+    if number is None:
+        try:
+            return parsedate_to_datetime(value).astimezone().replace(tzinfo=None) - now
+        except (TypeError, ValueError, AttributeError):
+            pass
+        try:
+            return extract_time_delta(value)
+        except ValueError:
+            return None
+
+    if number > 1e12:  # epoch milliseconds (OpenRouter)
+        return datetime.fromtimestamp(number / 1000) - now
+    if number > 1e9:  # epoch seconds
+        return datetime.fromtimestamp(number) - now
+    return timedelta(seconds=number)
+
+
+def extract_time_delta(time_str: Optional[str]) -> timedelta:
+    """Extract timedelta from OpenAI's ratelimit time format.
+
+    Args:
+        time_str: Time string in OpenAI format (e.g., "1d", "2h", "30m", "45s")
+
+    Returns:
+        timedelta object representing the time
+    """
+    if not time_str:
+        return timedelta(seconds=5)
+
+    days, hours, minutes, seconds = 0, 0, 0, 0
+
+    if time_str.endswith("ms"):
+        time_str = time_str[:-2]
+        seconds += 1
+
+    components = time_str.split("d")
+    if len(components) > 1:
+        days = float(components[0])
+        time_str = components[1]
+
+    components = time_str.split("h")
+    if len(components) > 1:
+        hours = float(components[0])
+        time_str = components[1]
+
+    components = time_str.split("m")
+    if len(components) > 1:
+        minutes = float(components[0])
+        time_str = components[1]
+
+    components = time_str.split("s")
+    if len(components) > 1:
+        seconds = float(components[0])
+
+    return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
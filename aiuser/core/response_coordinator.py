@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable
+
+from redbot.core import commands
+
+from aiuser.core.llm_scheduler import LLMPriority
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class ResponseCoordinator:
+    """
+    Single-flight responses per channel.
+
+    A triggered message waits out a short debounce window first, any other messages triggered
+    in that window are merged into the same response (anchored on the newest one, with the best priority).
+    Triggers while a response is already being generated for the channel are merged the same way into one
+    trailing response, which starts once the current one finishes.
+    """
+
+    def __init__(self):
+        self.pending: dict[int, tuple[commands.Context, LLMPriority]] = {}
+        # newest trigger (with the best priority) that arrived while the channel's response was running
+        self.trailing: dict[int, tuple[commands.Context, LLMPriority]] = {}
+        self.tasks: dict[int, asyncio.Task] = {}
+        self.stats: Counter[str] = Counter()
+
+    def submit(
+        self,
+        ctx: commands.Context,
+        priority: LLMPriority,
+        respond: Callable[[commands.Context, LLMPriority], Awaitable],
+        debounce: float,
+    ):
+        channel_id = ctx.channel.id
+        task = self.tasks.get(channel_id)
+
+        if task and channel_id in self.pending:
+            # still in the debounce window, answer the newer message instead
+            self._merge(self.pending, ctx, priority)
+            self.stats["merged"] += 1
+            return
+        if task:
+            self._merge(self.trailing, ctx, priority)
+            self.stats["queued (in flight)"] += 1
+            return
+
+        self._start(channel_id, ctx, priority, respond, debounce)
+
+    def _merge(
+        self,
+        slots: dict[int, tuple[commands.Context, LLMPriority]],
+        ctx: commands.Context,
+        priority: LLMPriority,
+    ):
+        channel_id = ctx.channel.id
+        if channel_id not in slots:
+            slots[channel_id] = (ctx, priority)
+            return
+        slot_ctx, slot_priority = slots[channel_id]
+        if slot_ctx.message.id < ctx.message.id:
+            slot_ctx = ctx
+        slots[channel_id] = (slot_ctx, min(priority, slot_priority))
+
+    def _start(
+        self,
+        channel_id: int,
+        ctx: commands.Context,
+        priority: LLMPriority,
+        respond: Callable[[commands.Context, LLMPriority], Awaitable],
+        debounce: float,
+    ):
+        self.stats["responses"] += 1
+        self.pending[channel_id] = (ctx, priority)
+        self.tasks[channel_id] = asyncio.create_task(self._run(channel_id, respond, debounce))
+
+    async def _run(
+        self,
+        channel_id: int,
+        respond: Callable[[commands.Context, LLMPriority], Awaitable],
+        debounce: float,
+    ):
+        try:
+            if debounce > 0:
+                await asyncio.sleep(debounce)
+            ctx, priority = self.pending.pop(channel_id)
+            await respond(ctx, priority)
+        except asyncio.CancelledError:
+            self.trailing.pop(channel_id, None)
+            raise
+        except Exception:
+            logger.exception(f"Error while responding in channel {channel_id}")
+        finally:
+            self.pending.pop(channel_id, None)
+            self.tasks.pop(channel_id, None)
+
+        trailing = self.trailing.pop(channel_id, None)
+        if trailing:
+            # these triggers already waited out the running response, no need to debounce again
+            self._start(channel_id, *trailing, respond, 0)
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+        self.pending.clear()
+        self.trailing.clear()
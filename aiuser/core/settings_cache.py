@@ -0,0 +1,159 @@
+import copy
+import logging
+from typing import Optional
+
+import discord
+from redbot.core import Config
+
+from aiuser.config.defaults import (
+    DEFAULT_CHANNEL,
+    DEFAULT_GLOBAL,
+    DEFAULT_GUILD,
+    DEFAULT_MEMBER,
+    DEFAULT_ROLE,
+)
+from aiuser.utils.matcher import TriggerMatcher
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class SettingsSnapshot:
+    """Plain attribute view over a dict of config values"""
+
+    def __init__(self, data: dict):
+        self.__dict__.update(data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.__dict__!r})"
+
+
+class GuildSettings(SettingsSnapshot):
+    """Snapshot of a guild's config, along with its per-member overrides"""
+
+    def __init__(self, data: dict, members: Optional[dict] = None):
+        super().__init__(data)
+        self.members: dict[int, SettingsSnapshot] = {
+            member_id: SettingsSnapshot({**DEFAULT_MEMBER, **member_data})
+            for member_id, member_data in (members or {}).items()
+        }
+        self.matchers: dict[str, TriggerMatcher] = {}
+
+    def member(self, member_id: int) -> SettingsSnapshot:
+        return self.members.get(member_id) or _DEFAULT_MEMBER_SETTINGS
+
+    def matcher(self, key: str, whole_words: bool = False) -> TriggerMatcher:
+        """Compiled matcher for a word list setting, built on first use and kept until the guild is reloaded"""
+        cache_key = f"{key}:{whole_words}"
+        matcher = self.matchers.get(cache_key)
+        if matcher is None:
+            matcher = TriggerMatcher(getattr(self, key), whole_words)
+            self.matchers[cache_key] = matcher
+        return matcher
+
+
+class RoleIndex:
+    """Per-guild lookup of role overrides, highest role in the hierarchy wins"""
+
+    def __init__(self, guild: discord.Guild, roles: dict[int, SettingsSnapshot]):
+        configured = sorted(
+            (role for role in guild.roles if role.id in roles),
+            key=lambda role: role.position,
+            reverse=True,
+        )
+        self.rank = {role.id: rank for rank, role in enumerate(configured)}
+        self.reply_percents = {
+            role.id: roles[role.id].reply_percent
+            for role in configured
+            if roles[role.id].reply_percent is not None
+        }
+        self.prompts = {
+            role.id: roles[role.id].custom_text_prompt
+            for role in configured
+            if roles[role.id].custom_text_prompt
+        }
+        self._reply_percent_ids = frozenset(self.reply_percents)
+        self._prompt_ids = frozenset(self.prompts)
+
+    def reply_percent(self, member: discord.Member) -> Optional[float]:
+        role_id = self._highest(self._reply_percent_ids, member)
+        return None if role_id is None else self.reply_percents[role_id]
+
+    def prompt(self, member: discord.Member) -> Optional[str]:
+        role_id = self._highest(self._prompt_ids, member)
+        return None if role_id is None else self.prompts[role_id]
+
+    def _highest(self, role_ids: frozenset, member: discord.Member) -> Optional[int]:
+        if not role_ids or not isinstance(member, discord.Member):
+            return None
+        matched = role_ids.intersection(role.id for role in member.roles)
+        if not matched:
+            return None
+        return min(matched, key=self.rank.__getitem__)
+
+
+_DEFAULT_MEMBER_SETTINGS = SettingsSnapshot(DEFAULT_MEMBER)
+_DEFAULT_CHANNEL_SETTINGS = SettingsSnapshot(DEFAULT_CHANNEL)
+
+
+class SettingsCache:
+    """
+    In-memory copy of the cog's config, so the per-message path can use plain attribute reads.
+    Must be reloaded after any config write (see `AIUser.reload_settings`).
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.globals = SettingsSnapshot(copy.deepcopy(DEFAULT_GLOBAL))
+        self.guilds: dict[int, GuildSettings] = {}
+        self.channels: dict[int, SettingsSnapshot] = {}
+        self.roles: dict[int, SettingsSnapshot] = {}
+        self.role_indexes: dict[int, RoleIndex] = {}
+
+    async def load(self):
+        """Load every scope from config"""
+        all_members = await self.config.all_members()
+        self.guilds = {
+            guild_id: GuildSettings(data, all_members.get(guild_id))
+            for guild_id, data in (await self.config.all_guilds()).items()
+        }
+        await self._load_shared_scopes()
+
+    async def reload_guild(self, guild: discord.Guild):
+        """Reload a single guild (and the scopes shared between guilds)"""
+        data = await self.config.guild(guild).all()
+        members = await self.config.all_members(guild)
+        self.guilds[guild.id] = GuildSettings(data, members)
+        await self._load_shared_scopes()
+
+    async def _load_shared_scopes(self):
+        self.globals = SettingsSnapshot(await self.config.all())
+        self.channels = {
+            channel_id: SettingsSnapshot({**DEFAULT_CHANNEL, **data})
+            for channel_id, data in (await self.config.all_channels()).items()
+        }
+        self.roles = {
+            role_id: SettingsSnapshot({**DEFAULT_ROLE, **data})
+            for role_id, data in (await self.config.all_roles()).items()
+        }
+        self.role_indexes = {}
+
+    def guild(self, guild_id: int) -> GuildSettings:
+        settings = self.guilds.get(guild_id)
+        if settings is None:
+            settings = GuildSettings(copy.deepcopy(DEFAULT_GUILD))
+            self.guilds[guild_id] = settings
+        return settings
+
+    def role_index(self, guild: discord.Guild) -> RoleIndex:
+        index = self.role_indexes.get(guild.id)
+        if index is None:
+            index = RoleIndex(guild, self.roles)
+            self.role_indexes[guild.id] = index
+        return index
+
+    def invalidate_role_index(self, guild_id: int):
+        """Drop a guild's role index, eg. when its role hierarchy changes"""
+        self.role_indexes.pop(guild_id, None)
+
+    def channel(self, channel_id: int) -> SettingsSnapshot:
+        return self.channels.get(channel_id) or _DEFAULT_CHANNEL_SETTINGS
@@ -0,0 +1,49 @@
+import logging
+from typing import Iterable, NamedTuple
+
+import discord
+from redbot.core.bot import Red
+
+from aiuser.config.constants import STICKER_CACHE_SIZE
+from aiuser.utils.cache import Cache
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class StickerInfo(NamedTuple):
+    name: str
+    description: str
+
+
+class StickerCache:
+    """
+    Sticker names and descriptions by sticker id.
+    Guild stickers come from the bot's guild sticker lists, other (standard) stickers are fetched once.
+    Entries are replaced when a guild updates its stickers.
+    """
+
+    def __init__(self, bot: Red):
+        self.bot = bot
+        self.stickers: Cache[int, StickerInfo] = Cache(limit=STICKER_CACHE_SIZE)
+
+    async def get(self, item: discord.StickerItem) -> StickerInfo:
+        """Raises if the sticker isn't known and fetching it fails"""
+        info = self.stickers[item.id]
+        if info is not None:
+            return info
+
+        sticker = self.bot.get_sticker(item.id)
+        if sticker is None:
+            sticker = await item.fetch()
+        return self._add(sticker)
+
+    def update_guild(self, before: Iterable[discord.GuildSticker], after: Iterable[discord.GuildSticker]):
+        for sticker in before:
+            self.stickers.pop(sticker.id)
+        for sticker in after:
+            self._add(sticker)
+
+    def _add(self, sticker: discord.Sticker) -> StickerInfo:
+        info = StickerInfo(sticker.name, sticker.description or "")
+        self.stickers[sticker.id] = info
+        return info
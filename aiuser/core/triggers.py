@@ -1,5 +1,7 @@
+import logging
 import random
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from redbot.core import commands
 
@@ -8,21 +10,29 @@ from aiuser.config.constants import (
     GROK_PRIMARY_TRIGGERS,
     GROK_SECONDARY_TRIGGERS,
 )
+from aiuser.core.llm_scheduler import LLMPriority
 from aiuser.core.validators import is_bot_mentioned_or_replied
 from aiuser.types.abc import MixinMeta
+from aiuser.utils.matcher import TriggerMatcher
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+GROK_PRIMARY_MATCHER = TriggerMatcher(GROK_PRIMARY_TRIGGERS)
+GROK_SECONDARY_MATCHER = TriggerMatcher(GROK_SECONDARY_TRIGGERS)
 
 
 async def is_in_conversation(cog: MixinMeta, ctx: commands.Context) -> bool:
     """Check if bot should continue conversation based on recent messages"""
-    reply_percent = await cog.config.guild(ctx.guild).conversation_reply_percent()
-    reply_time_seconds = await cog.config.guild(ctx.guild).conversation_reply_time()
+    settings = cog.settings_cache.guild(ctx.guild.id)
+    reply_percent = settings.conversation_reply_percent
+    reply_time_seconds = settings.conversation_reply_time
 
     if reply_percent == 0 or reply_time_seconds == 0:
         return False
 
     cutoff_time = datetime.now(tz=timezone.utc) - timedelta(seconds=reply_time_seconds)
 
-    async for message in ctx.channel.history(limit=10):
+    for message in await cog.message_buffer.history(ctx.channel, limit=10):
         if (
             message.author.id == cog.bot.user.id
             and len(message.embeds) == 0
@@ -34,39 +44,44 @@ async def is_in_conversation(cog: MixinMeta, ctx: commands.Context) -> bool:
 
 
 async def is_grok_triggered(cog: MixinMeta, ctx: commands.Context) -> bool:
-    if not (await cog.config.guild(ctx.guild).grok_trigger()):
+    if not cog.settings_cache.guild(ctx.guild.id).grok_trigger:
         return False
 
     if len(ctx.message.content.split()) > GROK_MAX_WORDS:
         return False
 
-    message_lower = ctx.message.content.lower()
-
-    return any(word in message_lower for word in GROK_PRIMARY_TRIGGERS) and any(
-        word in message_lower for word in GROK_SECONDARY_TRIGGERS
-    )
+    content = ctx.message.content
+    return bool(GROK_PRIMARY_MATCHER.search(content) and GROK_SECONDARY_MATCHER.search(content))
 
 
 async def is_always_reply_on_words_triggered(cog: MixinMeta, ctx: commands.Context) -> bool:
     """Check if any always_reply_on_words appears in the message"""
-    trigger_words = await cog.config.guild(ctx.guild).always_reply_on_words()
-    if not trigger_words:
+    settings = cog.settings_cache.guild(ctx.guild.id)
+    matcher = settings.matcher(
+        "always_reply_on_words", settings.always_reply_on_words_whole_words
+    )
+    if not matcher:
         return False
 
-    message_lower = ctx.message.content.lower()
-    return any(word.lower() in message_lower for word in trigger_words)
+    word = matcher.search(ctx.message.content)
+    if word is not None:
+        logger.debug(f"Triggered by the word \"{word}\" in {ctx.guild.name}")
+    return word is not None
 
 
-async def check_triggers(cog: MixinMeta, ctx: commands.Context, message) -> bool:
+async def check_triggers(
+    cog: MixinMeta, ctx: commands.Context, message
+) -> Optional[LLMPriority]:
+    """Returns the priority of the response if the message is a trigger, otherwise None"""
     trigger_funcs = [
-        lambda: is_bot_mentioned_or_replied(cog, message),
-        lambda: is_always_reply_on_words_triggered(cog, ctx),
-        lambda: is_grok_triggered(cog, ctx),
-        lambda: is_in_conversation(cog, ctx),
+        (lambda: is_bot_mentioned_or_replied(cog, message), LLMPriority.DIRECT),
+        (lambda: is_always_reply_on_words_triggered(cog, ctx), LLMPriority.TRIGGER),
+        (lambda: is_grok_triggered(cog, ctx), LLMPriority.TRIGGER),
+        (lambda: is_in_conversation(cog, ctx), LLMPriority.TRIGGER),
     ]
 
     # Short-circuit on first True
-    for trigger_func in trigger_funcs:
+    for trigger_func, priority in trigger_funcs:
         if await trigger_func():
-            return True
-    return False
+            return priority
+    return None
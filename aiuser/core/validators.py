@@ -1,10 +1,9 @@
 import logging
-from typing import Tuple
+from typing import Callable, Tuple
 
 import discord
 from redbot.core import commands
 
-from aiuser.core.openai_utils import setup_openai_client
 from aiuser.types.abc import MixinMeta
 from aiuser.config.constants import SINGULAR_MENTION_PATTERN
 
@@ -40,10 +39,64 @@ async def is_valid_message(cog: MixinMeta, ctx: commands.Context) -> bool:
     return True
 
 
+def prefilter_message(cog: MixinMeta, message: discord.Message) -> bool:
+    """
+    Cheap synchronous checks using only the message and in-memory caches.
+    Ran before building a Context, rejections are counted per stage in `cog.prefilter_stats`.
+    """
+    for check, stage in PREFILTER_CHAIN:
+        if not check(cog, message):
+            cog.prefilter_stats[stage] += 1
+            return False
+    cog.prefilter_stats["passed"] += 1
+    return True
+
+
+def _prefilter_guild(cog: MixinMeta, message: discord.Message) -> bool:
+    return message.guild is not None
+
+
+def _prefilter_author(cog: MixinMeta, message: discord.Message) -> bool:
+    return not message.author.bot
+
+
+def _prefilter_channel(cog: MixinMeta, message: discord.Message) -> bool:
+    return is_whitelisted_channel(cog, message.guild.id, message.channel)
+
+
+def is_whitelisted_channel(cog: MixinMeta, guild_id: int, channel) -> bool:
+    whitelist = cog.channels_whitelist.get(guild_id)
+    if not whitelist:
+        return False
+    if isinstance(channel, discord.Thread):
+        return channel.parent_id in whitelist
+    return channel.id in whitelist
+
+
+def _prefilter_opt_status(cog: MixinMeta, message: discord.Message) -> bool:
+    if cog.opt_store.is_opted_out(message.author.id):
+        return False
+    return cog.optindefault.get(message.guild.id) or cog.opt_store.is_opted_in(message.author.id)
+
+
+def _prefilter_ignore_regex(cog: MixinMeta, message: discord.Message) -> bool:
+    pattern = cog.ignore_regex.get(message.guild.id)
+    return not (pattern and pattern.search(message.content))
+
+
+PREFILTER_CHAIN: list[Tuple[Callable[[MixinMeta, discord.Message], bool], str]] = [
+    (_prefilter_guild, "no guild"),
+    (_prefilter_author, "author is bot"),
+    (_prefilter_channel, "channel not whitelisted"),
+    (_prefilter_opt_status, "user not opted in"),
+    (_prefilter_ignore_regex, "matches ignore regex"),
+]
+
+
 async def check_openai_client(cog: MixinMeta, _: commands.Context) -> Tuple[bool, str]:
     """Validate and setup OpenAI client"""
     if not cog.openai_client:
-        cog.openai_client = await setup_openai_client(cog.bot, cog.config)
+        await cog.reload_openai_client()
         if not cog.openai_client:
             return False, "Failed to setup OpenAI client"
     return True, ""
@@ -91,15 +144,16 @@ async def check_user_status(cog: MixinMeta, ctx: commands.Context) -> Tuple[bool
     if not await cog.bot.allowed_by_whitelist_blacklist(ctx.author):
         return False, "User not allowed by whitelist/blacklist"
 
-    if ctx.author.id in await cog.config.optout():
+    if cog.opt_store.is_opted_out(ctx.author.id):
         return False, "User opted out"
 
-    if not cog.optindefault.get(ctx.guild.id) and ctx.author.id not in await cog.config.optin():
+    if not cog.optindefault.get(ctx.guild.id) and not cog.opt_store.is_opted_in(ctx.author.id):
         return False, "User not opted in"
 
     # Role/member whitelist checks
-    whitelisted_roles = await cog.config.guild(ctx.guild).roles_whitelist()
-    whitelisted_members = await cog.config.guild(ctx.guild).members_whitelist()
+    settings = cog.settings_cache.guild(ctx.guild.id)
+    whitelisted_roles = settings.roles_whitelist
+    whitelisted_members = settings.members_whitelist
     if whitelisted_members or whitelisted_roles:
         user_roles = set(role.id for role in ctx.author.roles) if ctx.author.roles else set()
         if not ((ctx.author.id in whitelisted_members) or (user_roles & set(whitelisted_roles))):
@@ -115,7 +169,7 @@ async def check_message_content(cog: MixinMeta, ctx: commands.Context) -> Tuple[
             if not await is_bot_mentioned_or_replied(cog, ctx.message):
                 return False, "Single mention without bot reference"
 
-        min_length = await cog.config.guild(ctx.guild).messages_min_length()
+        min_length = cog.settings_cache.guild(ctx.guild.id).messages_min_length
         if 1 <= len(ctx.message.content) < min_length:
             return False, f"Message too short (min: {min_length})"
 
@@ -129,6 +183,6 @@ async def check_message_content(cog: MixinMeta, ctx: commands.Context) -> Tuple[
 
 async def is_bot_mentioned_or_replied(cog: MixinMeta, message: discord.Message) -> bool:
     """Check if message mentions or replies to bot"""
-    if not await cog.config.guild(message.guild).reply_to_mentions_replies():
+    if not cog.settings_cache.guild(message.guild.id).reply_to_mentions_replies:
         return False
     return cog.bot.user in message.mentions
@@ -34,15 +34,12 @@ async def opt_consent(self, user: discord.User, **kwargs):
         )
 
     form = Form()
-    whitelist = await self.config.optin()
-    blacklist = await self.config.optout()
-
-    if user.id in whitelist:
+    if self.opt_store.is_opted_in(user.id):
         whitelist_text = "opted in"
         form.accept.render_kw["disabled"] = True
         form.accept.render_kw["class"] = "btn btn-outline-secondary px-4 py-2"
         form.reject.render_kw["disabled"] = False
-    elif user.id in blacklist:
+    elif self.opt_store.is_opted_out(user.id):
         whitelist_text = "opted out"
         form.accept.render_kw["disabled"] = False
         form.reject.render_kw["disabled"] = True
@@ -55,11 +52,9 @@ async def opt_consent(self, user: discord.User, **kwargs):
     if form.validate_on_submit():
         try:
             if form.accept.data:
-                await self.config.optin.set(whitelist + [user.id])
-                await self.config.optout.set([id for id in blacklist if id != user.id])
+                await self.opt_store.opt_in(user.id)
             elif form.reject.data:
-                await self.config.optout.set(blacklist + [user.id])
-                await self.config.optin.set([id for id in whitelist if id != user.id])
+                await self.opt_store.opt_out(user.id)
         except Exception:
             return {
                 "status": 1,
@@ -96,7 +96,7 @@ async def bot_owner_server_config(self: MixinMeta, guild: discord.Guild, **kwarg
             await self.config.guild(guild).scan_images.set(scan_images)
             await self.config.guild(guild).function_calling.set(function_calling)
             await self.config.guild(guild).random_messages_enabled.set(random_messages)
-            self.channels_whitelist[guild.id] = new_whitelist
+            await self.reload_settings(guild)
         except Exception:
             return {
                 "status": 1,
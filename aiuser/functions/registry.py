@@ -0,0 +1,57 @@
+import importlib
+import logging
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from aiuser.core.settings_cache import SettingsCache
+from aiuser.functions.tool_call import ToolCall
+from aiuser.functions.types import ToolCallSchema
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class ToolRegistry:
+    """
+    Tool calls found in the packages of `aiuser/functions`, discovered once when the cog loads.
+    Schemas are serialized up front, and each guild's enabled tools are kept until its settings are reloaded.
+    """
+
+    def __init__(self, settings_cache: SettingsCache):
+        self.settings_cache = settings_cache
+        self.tools: dict[str, type[ToolCall]] = {}
+        self.schemas: dict[ToolCallSchema, dict] = {}
+        self.guild_tools: dict[int, list[type[ToolCall]]] = {}
+
+    def load(self):
+        functions_dir = Path(__file__).parent
+
+        for item in functions_dir.iterdir():
+            if item.is_dir() and not item.name.startswith("__"):
+                try:
+                    importlib.import_module(f"aiuser.functions.{item.name}.tool_call")
+                except ImportError:
+                    logger.debug(f"Failed loading tool calls of {item.name}", exc_info=True)
+                    continue
+
+        for cls in ToolCall.__subclasses__():
+            self.tools[cls.function_name] = cls
+            self.schemas[cls.schema] = asdict(cls.schema)
+        self.guild_tools.clear()
+
+    def enabled(self, guild_id: int) -> list[type[ToolCall]]:
+        tools = self.guild_tools.get(guild_id)
+        if tools is None:
+            names = self.settings_cache.guild(guild_id).function_calling_functions
+            tools = [self.tools[name] for name in names if name in self.tools]
+            self.guild_tools[guild_id] = tools
+        return tools
+
+    def serialize(self, schemas: list[ToolCallSchema]) -> list[dict]:
+        return [self.schemas.get(schema) or asdict(schema) for schema in schemas]
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        if guild_id is None:
+            self.guild_tools.clear()
+        else:
+            self.guild_tools.pop(guild_id, None)
@@ -28,7 +28,7 @@ class ScrapeToolCall(ToolCall):
     async def _handle(self, arguments):
         logger.info(f'Attempting scrape of {arguments["url"]} in {self.ctx.guild}')
         try:
-            return await scrape_page(arguments["url"])
+            return await scrape_page(self.http_sessions.get(), arguments["url"])
         except Exception:
             logger.debug(f"Failed to scrape {arguments['url']}")
             return None
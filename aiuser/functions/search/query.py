@@ -12,12 +12,17 @@ logger = logging.getLogger("red.bz_cogs.aiuser")
 SERPER_ENDPOINT = "https://google.serper.dev/search"
 
 
-async def search_google(query: str, api_key: str, ctx: commands.Context):
-    return await SerperQuery(query, api_key, ctx).execute_search()
+async def search_google(
+    session: aiohttp.ClientSession, query: str, api_key: str, ctx: commands.Context
+):
+    return await SerperQuery(session, query, api_key, ctx).execute_search()
 
 
 class SerperQuery:
-    def __init__(self, query: str, api_key: str, ctx: commands.Context):
+    def __init__(
+        self, session: aiohttp.ClientSession, query: str, api_key: str, ctx: commands.Context
+    ):
+        self.session = session
         self.api_key = api_key
         self.query = query
         self.guild = ctx.guild.name
@@ -27,12 +32,11 @@ class SerperQuery:
         headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
 
         try:
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.post(SERPER_ENDPOINT, data=payload) as response:
-                    response.raise_for_status()
+            async with self.session.post(SERPER_ENDPOINT, data=payload, headers=headers) as response:
+                response.raise_for_status()
 
-                    data = await response.json()
-                    return await self.process_search_results(data)
+                data = await response.json()
+            return await self.process_search_results(data)
 
         except Exception:
             logger.exception("Failed request to serper.io")
@@ -73,16 +77,15 @@ class SerperQuery:
         }
 
         logger.info(f'Requesting {link} from Google query "{self.query}" in {self.guild}')
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.get(link) as response:
-                response.raise_for_status()
-                html_content = await response.text()
-                text_content = extract(html_content)
+        async with self.session.get(link, headers=headers) as response:
+            response.raise_for_status()
+            html_content = await response.text()
+        text_content = extract(html_content)
 
-                if len(text_content) > 5000:
-                    text_content = text_content[:5000] + "..."
+        if len(text_content) > 5000:
+            text_content = text_content[:5000] + "..."
 
-                return text_content
+        return text_content
 
     def format_knowledge_graph(self, knowledge_graph: dict) -> str:
         title = knowledge_graph.get("title", "")
@@ -23,6 +23,7 @@ class SearchToolCall(ToolCall):
 
     async def _handle(self, arguments):
         return await search_google(
+            self.http_sessions.get(),
             arguments["query"],
             (await self.bot.get_shared_api_tokens("serper")).get("api_key"),
             self.ctx,
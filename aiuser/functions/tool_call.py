@@ -1,17 +1,22 @@
 from redbot.core import Config, commands
 from redbot.core.bot import Red
 
+from aiuser.config.constants import TOOL_CALL_TIMEOUT
 from aiuser.functions.types import ToolCallSchema
+from aiuser.utils.http import HTTPSessionManager
 
 
 class ToolCall:
     schema: ToolCallSchema = None
     function_name: str = None
+    # seconds before the model is told the call timed out, override in a tool's class to change it
+    timeout: float = TOOL_CALL_TIMEOUT
 
-    def __init__(self, config: Config, ctx: commands.Context):
+    def __init__(self, config: Config, ctx: commands.Context, http_sessions: HTTPSessionManager):
         self.config = config
         self.ctx = ctx
         self.bot: Red = ctx.bot
+        self.http_sessions = http_sessions
 
     def run(self, arguments: dict, available_tools: list):
         self.remove_tool_from_available(available_tools)
@@ -4,6 +4,7 @@ from itertools import islice
 import aiohttp
 from redbot.core import Config, commands
 
+
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 METEO_GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
@@ -40,34 +41,35 @@ WMO_DESCRIPTIONS = {
 }
 
 
-async def get_endpoint_data(url, params):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as response:
-            response.raise_for_status()
-            return await response.json()
+async def get_endpoint_data(session: aiohttp.ClientSession, url, params):
+    async with session.get(url, params=params) as response:
+        response.raise_for_status()
+        return await response.json()
 
 
-async def get_weather(location: str, days=1):
+async def get_weather(session: aiohttp.ClientSession, location: str, days=1):
     try:
-        lat, lon = await find_lat_lon(location)
+        lat, lon = await find_lat_lon(session, location)
     except Exception:
         logger.exception(f"Failed request to determine lat/lon for location {location}")
         return f"Unable to find weather for the location {location}"
-    return await request_weather(lat, lon, location, days=days)
+    return await request_weather(session, lat, lon, location, days=days)
 
 
-async def get_local_weather(config: Config, ctx: commands.Context, days=1):
+async def get_local_weather(
+    session: aiohttp.ClientSession, config: Config, ctx: commands.Context, days=1
+):
     location = await config.guild(ctx.guild).function_calling_default_location()
     lat, lon = location
-    return await request_weather(lat, lon, "current location", days=days)
+    return await request_weather(session, lat, lon, "current location", days=days)
 
 
-async def is_daytime(config: Config, ctx: commands.Context):
+async def is_daytime(session: aiohttp.ClientSession, config: Config, ctx: commands.Context):
     location = await config.guild(ctx.guild).function_calling_default_location()
     lat, lon = location
     params = {"latitude": lat, "longitude": lon, "current": "is_day", "forecast_days": 1}
     try:
-        data = await get_endpoint_data(METEO_WEATHER_URL, params)
+        data = await get_endpoint_data(session, METEO_WEATHER_URL, params)
         is_day = data["current"]["is_day"]
         if is_day:
             return "Use the following information about your location to generate your response: It's daytime."
@@ -78,7 +80,7 @@ async def is_daytime(config: Config, ctx: commands.Context):
         return "Unknown if it's daytime or nighttime."
 
 
-async def request_weather(lat, lon, location, days=1):
+async def request_weather(session: aiohttp.ClientSession, lat, lon, location, days=1):
     params = {
         "latitude": lat,
         "longitude": lon,
@@ -88,7 +90,7 @@ async def request_weather(lat, lon, location, days=1):
     }
 
     try:
-        data = await get_endpoint_data(METEO_WEATHER_URL, params)
+        data = await get_endpoint_data(session, METEO_WEATHER_URL, params)
 
         res = f"Use the following information for {location} to generate your response: \n"
 
@@ -132,10 +134,10 @@ def handle_multiple_days(data):
     return res
 
 
-async def find_lat_lon(location: str):
+async def find_lat_lon(session: aiohttp.ClientSession, location: str):
     params = {"name": location, "count": 1, "language": "en", "format": "json"}
 
-    response = await get_endpoint_data(METEO_GEOCODE_URL, params)
+    response = await get_endpoint_data(session, METEO_GEOCODE_URL, params)
 
     if not (response.get("results", False)):
         raise Exception("Location not found")
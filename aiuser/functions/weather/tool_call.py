@@ -53,7 +53,7 @@ class LocationWeatherToolCall(ToolCall):
 
     async def _handle(self, arguments):
         days = arguments.get("days", 1)
-        return await get_weather(arguments["location"], days=days)
+        return await get_weather(self.http_sessions.get(), arguments["location"], days=days)
 
 
 class LocalWeatherToolCall(ToolCall):
@@ -68,7 +68,9 @@ class LocalWeatherToolCall(ToolCall):
 
     async def _handle(self, arguments):
         days = arguments.get("days", 1)
-        return await get_local_weather(self.config, self.ctx, days=days)
+        return await get_local_weather(
+            self.http_sessions.get(), self.config, self.ctx, days=days
+        )
 
 
 class IsDaytimeToolCall(ToolCall):
@@ -82,4 +84,4 @@ class IsDaytimeToolCall(ToolCall):
     function_name = schema.function.name
 
     async def _handle(self, _):
-        return await is_daytime(self.config, self.ctx)
+        return await is_daytime(self.http_sessions.get(), self.config, self.ctx)
@@ -1,15 +1,17 @@
 import logging
 import xml.etree.ElementTree as ET
 
-import aiohttp
-from aiohttp import ClientError
+from aiohttp import ClientError, ClientSession
 import asyncio
 from redbot.core import commands
 
+
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
-async def ask_wolfram_alpha(query: str, app_id: str, ctx: commands.Context):
+async def ask_wolfram_alpha(
+    session: ClientSession, query: str, app_id: str, ctx: commands.Context
+):
     # Credit to: https://github.com/hollowstrawberry/crab-cogs/blob/b113287f89c9045d387a75edf9de21b9a2dab08a/gptmemory/function_calling.py
 
     url = "http://api.wolframalpha.com/v2/query?"
@@ -17,10 +19,9 @@ async def ask_wolfram_alpha(query: str, app_id: str, ctx: commands.Context):
     headers = {"user-agent": "Red-cog/2.0.0"}
 
     try:
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.get(url, params=payload) as response:
-                response.raise_for_status()
-                result = await response.text()
+        async with session.get(url, params=payload, headers=headers) as response:
+            response.raise_for_status()
+            result = await response.text()
     except (ClientError, asyncio.TimeoutError):
         logger.exception("Error while asking Wolfram Alpha")
         return "An error occurred while asking Wolfram Alpha."
@@ -24,6 +24,7 @@ class WolframAlphaFunctionCall(ToolCall):
 
     async def _handle(self, arguments):
         return await ask_wolfram_alpha(
+            self.http_sessions.get(),
             arguments["query"],
             (await self.bot.get_shared_api_tokens("wolfram_alpha")).get("app_id"),
             self.ctx,
@@ -0,0 +1,110 @@
+import logging
+from collections import Counter
+from typing import Hashable, Optional
+
+import discord
+import tiktoken
+
+from aiuser.config.constants import MESSAGE_BUFFER_SIZE
+from aiuser.messages_list.entry import MessageEntry
+from aiuser.utils.tokens import token_counter
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+IMAGE_TOKENS = 255  # TODO: calculate actual image token cost
+
+
+class ConvertedMessage:
+    """A Discord message converted to ChatML entries, with token counts per encoding"""
+
+    __slots__ = ("message_id", "author_id", "variant", "entries", "tokens")
+
+    def __init__(
+        self,
+        message: discord.Message,
+        entries: list[MessageEntry],
+        variant: Optional[Hashable] = None,
+    ):
+        self.message_id = message.id
+        self.author_id = message.author.id
+        self.variant = variant
+        self.entries = entries
+        self.tokens: dict[str, list[int]] = {}
+
+    def token_counts(self, encoding: tiktoken.Encoding) -> list[int]:
+        counts = self.tokens.get(encoding.name)
+        if counts is None:
+            counts = [count_entry_tokens(encoding, entry) for entry in self.entries]
+            self.tokens[encoding.name] = counts
+        return counts
+
+
+def count_entry_tokens(encoding: tiktoken.Encoding, entry: MessageEntry) -> int:
+    if not isinstance(entry.content, list):
+        return token_counter.count(encoding, str(entry.content))
+    tokens = 0
+    for item in entry.content:
+        if not isinstance(item, dict):
+            continue
+        if item.get("type") == "text":
+            tokens += token_counter.count(encoding, str(item.get("text")))
+        elif item.get("type") == "image_url":
+            tokens += IMAGE_TOKENS
+    return tokens
+
+
+class ConversationStore:
+    """
+    Converted messages of each channel, kept alive between replies.
+    Building the context for a reply only has to convert (and tokenize) messages that are new since the last one.
+    """
+
+    def __init__(self, capacity: int = MESSAGE_BUFFER_SIZE):
+        self.capacity = capacity
+        self.channels: dict[int, dict[int, ConvertedMessage]] = {}
+        self.stats: Counter[str] = Counter()
+
+    def get(self, message: discord.Message, variant: Hashable) -> Optional[ConvertedMessage]:
+        converted = self.channels.get(message.channel.id, {}).get(message.id)
+        if converted is None or converted.variant != variant:
+            self.stats["converted"] += 1
+            return None
+        self.stats["reused"] += 1
+        return converted
+
+    def put(
+        self, message: discord.Message, variant: Hashable, entries: list[MessageEntry]
+    ) -> ConvertedMessage:
+        converted = ConvertedMessage(message, entries, variant)
+        channel = self.channels.setdefault(message.channel.id, {})
+        channel[message.id] = converted
+        if len(channel) > self.capacity:
+            del channel[min(channel)]
+        return converted
+
+    def invalidate(self, channel_id: int, message_id: int):
+        """Drop a message's conversion, eg. when it was edited"""
+        self.channels.get(channel_id, {}).pop(message_id, None)
+
+    def remove(self, channel_id: int, message_ids: set[int]):
+        channel = self.channels.get(channel_id)
+        if not channel:
+            return
+        for message_id in message_ids:
+            channel.pop(message_id, None)
+
+    def prune(self, channel_id: int, oldest_id: int):
+        """Forget messages that are older than the oldest one in the current history window"""
+        channel = self.channels.get(channel_id)
+        if not channel:
+            return
+        for message_id in [message_id for message_id in channel if message_id < oldest_id]:
+            del channel[message_id]
+
+    def remove_author(self, user_id: int):
+        for channel in self.channels.values():
+            for message_id in [m for m, converted in channel.items() if converted.author_id == user_id]:
+                del channel[message_id]
+
+    def clear(self):
+        self.channels.clear()
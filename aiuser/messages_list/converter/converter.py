@@ -22,10 +22,13 @@ class MessageConverter:
     def __init__(self, cog: MixinMeta, ctx: commands.Context):
         self.cog = cog
         self.config = cog.config
+        self.settings = cog.settings_cache.guild(ctx.guild.id)
         self.bot_id = cog.bot.user.id
         self.init_msg = ctx.message
         self.message_cache = cog.cached_messages
         self.ctx = ctx
+        # ids of messages converted with a fallback after a failed lookup (eg. YouTube API down)
+        self.failed_lookups: set[int] = set()
 
     async def convert(self, message: Message):
         """Converts a Discord message to ChatML format message(s)"""
@@ -34,8 +37,7 @@ class MessageConverter:
         if message.attachments:
             await self.handle_attachment(message, res, role)
         elif message.stickers:
-            content = await format_sticker_content(message)
-            await self.add_entry(content, res, role)
+            await self.handle_sticker(message, res, role)
         elif (len(message.embeds) > 0 and is_embed_valid(message)) or contains_youtube_link(
             message.content
         ):
@@ -50,7 +52,7 @@ class MessageConverter:
         if not message.attachments[0].content_type.startswith("image/"):
             content = f'User "{message.author.display_name}" sent: [Attachment: "{message.attachments[0].filename}"]'
             await self.add_entry(content, res, role)
-        elif message.attachments[0].size > await self.config.guild(message.guild).max_image_size():
+        elif message.attachments[0].size > self.settings.max_image_size:
             content = format_generic_image(message)
             await self.add_entry(content, res, role)
         # scans images only if the msg is the trigger, or if the msg was replied to by the trigger
@@ -60,7 +62,7 @@ class MessageConverter:
                 or (self.init_msg.reference and self.init_msg.reference.message_id == message.id)
             )
             and not self.ctx.interaction
-            and await self.config.guild(message.guild).scan_images()
+            and self.settings.scan_images
         ):
             content = await transcribe_image(self.cog, message) or format_generic_image(message)
             await self.add_entry(content, res, role)
@@ -75,8 +77,22 @@ class MessageConverter:
         content = format_text_content(message)
         await self.add_entry(content, res, role)
 
+    async def handle_sticker(self, message: Message, res, role):
+        try:
+            content = await format_sticker_content(self.cog.sticker_cache, message)
+        except Exception:
+            logger.debug(f"Failed fetching sticker {message.stickers[0].id}", exc_info=True)
+            self.failed_lookups.add(message.id)
+            content = f'User "{message.author.display_name}" sent: [Sticker with name "{message.stickers[0].name}"]'
+        await self.add_entry(content, res, role)
+
     async def handle_embed(self, message: Message, res, role):
-        content = await format_embed_content(self.cog, message)
+        try:
+            content = await format_embed_content(self.cog, message)
+        except Exception:
+            # logged by the lookup
+            self.failed_lookups.add(message.id)
+            content = None
         if not content:
             content = format_text_content(message)
             await self.add_entry(content, res, role)
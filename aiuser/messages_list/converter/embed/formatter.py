@@ -10,7 +10,7 @@ from aiuser.messages_list.converter.embed.youtube import format_youtube_embed
 async def format_embed_content(cog: MixinMeta, message: Message):
     yt_api_key = (await cog.bot.get_shared_api_tokens("youtube")).get("api_key")
     if yt_api_key and contains_youtube_link(message.content):
-        return await format_youtube_embed(yt_api_key, message)
+        return await format_youtube_embed(cog.youtube, yt_api_key, message)
     elif (
         URL_PATTERN.search(message.content)
         and ScrapeToolCall.function_name
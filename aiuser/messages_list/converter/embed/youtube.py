@@ -1,34 +1,124 @@
+import asyncio
 import logging
+from collections import Counter
+from typing import Iterable, NamedTuple, Optional
 
 import aiohttp
 from discord import Message
 from tenacity import retry, stop_after_attempt, wait_random
 
-from aiuser.config.constants import YOUTUBE_VIDEO_ID_PATTERN
+from aiuser.config.constants import (
+    YOUTUBE_API_BATCH_SIZE,
+    YOUTUBE_API_TIMEOUT,
+    YOUTUBE_METADATA_CACHE_SIZE,
+    YOUTUBE_METADATA_TTL,
+    YOUTUBE_VIDEO_ID_PATTERN,
+)
+from aiuser.utils.cache import Cache
+from aiuser.utils.http import HTTPSessionManager
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
-YOUTUBE_API_URL = (
-    "https://www.googleapis.com/youtube/v3/videos?part=snippet&id={}&key={}"
-)
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3/videos"
+
+
+class VideoDetails(NamedTuple):
+    title: str
+    channel_title: str
+    description: str
+
+
+# cached for ids the API doesn't return (private / deleted videos)
+UNAVAILABLE_VIDEO = VideoDetails("", "", "")
+
+
+class YoutubeMetadata:
+    """
+    Video metadata from the YouTube Data API, cached by video id.
+    Uncached ids are looked up in batches of up to 50 per `videos.list` request over the cog's pooled session,
+    and concurrent lookups of the same id share the request in flight.
+    """
+
+    def __init__(self, http_sessions: HTTPSessionManager):
+        self.http_sessions = http_sessions
+        self.cache: Cache[str, VideoDetails] = Cache(
+            limit=YOUTUBE_METADATA_CACHE_SIZE, ttl=YOUTUBE_METADATA_TTL
+        )
+        self.in_flight: dict[str, asyncio.Future] = {}
+        self.stats: Counter[str] = Counter()
+
+    async def get(self, api_key: str, video_id: str) -> Optional[VideoDetails]:
+        """Returns None if the video is unavailable"""
+        details = self.cache[video_id]
+        if details is None:
+            self.prefetch(api_key, [video_id])
+            # shielded, other lookups may be waiting on the same batch
+            batch = await asyncio.shield(self.in_flight[video_id])
+            details = batch.get(video_id, UNAVAILABLE_VIDEO)
+        return None if details is UNAVAILABLE_VIDEO else details
 
+    def prefetch(self, api_key: str, video_ids: Iterable[str]):
+        """Start batched lookups for ids that are neither cached nor already being looked up"""
+        to_fetch = [
+            video_id
+            for video_id in dict.fromkeys(video_ids)
+            if video_id not in self.in_flight and video_id not in self.cache
+        ]
+        for i in range(0, len(to_fetch), YOUTUBE_API_BATCH_SIZE):
+            batch = to_fetch[i : i + YOUTUBE_API_BATCH_SIZE]
+            future = asyncio.ensure_future(self._fetch_batch(api_key, batch))
+            future.add_done_callback(self._log_failure)
+            for video_id in batch:
+                self.in_flight[video_id] = future
 
-async def format_youtube_embed(api_key: str, message: Message):
+    def _log_failure(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            self.stats["failed requests"] += 1
+            logger.error("Failed request to Youtube API", exc_info=future.exception())
+
+    async def _fetch_batch(self, api_key: str, video_ids: list[str]) -> dict[str, VideoDetails]:
+        try:
+            items = await self._request(api_key, video_ids)
+            self.stats["requests"] += 1
+            self.stats["videos fetched"] += len(video_ids)
+            videos = {}
+            for item in items:
+                snippet = item["snippet"]
+                videos[item["id"]] = VideoDetails(
+                    snippet["title"], snippet["channelTitle"], snippet["description"]
+                )
+            for video_id in video_ids:
+                self.cache[video_id] = videos.get(video_id, UNAVAILABLE_VIDEO)
+            return videos
+        finally:
+            for video_id in video_ids:
+                self.in_flight.pop(video_id, None)
+
+    @retry(wait=wait_random(min=1, max=2), stop=(stop_after_attempt(3)), reraise=True)
+    async def _request(self, api_key: str, video_ids: list[str]) -> list[dict]:
+        params = {"part": "snippet", "id": ",".join(video_ids), "key": api_key}
+        session = self.http_sessions.get()
+        async with session.get(
+            YOUTUBE_API_URL, params=params, timeout=aiohttp.ClientTimeout(total=YOUTUBE_API_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            video_data = await response.json()
+            return video_data.get("items", [])
+
+
+async def format_youtube_embed(youtube: YoutubeMetadata, api_key: str, message: Message):
     video_id = await get_video_id(message.content)
     author = message.author.display_name
 
     if not video_id:
         return None
 
-    try:
-        video_title, channel_title, description = await get_video_details(
-            api_key, video_id
-        )
-    except Exception:
-        logger.error("Failed request to Youtube API", exc_info=True)
+    # failed lookups raise (and are logged by the lookup)
+    details = await youtube.get(api_key, video_id)
+    if not details:
         return None
 
-    return f'User "{author}" sent: [Link to Youtube video with title "{video_title}" and description "{description}" from channel "{channel_title}"]'
+    return f'User "{author}" sent: [Link to Youtube video with title "{details.title}" and description "{details.description}" from channel "{details.channel_title}"]'
 
 
 async def get_video_id(url):
@@ -38,17 +128,3 @@ async def get_video_id(url):
         return match.group(1)
     else:
         return None
-
-
-@retry(wait=wait_random(min=1, max=2), stop=(stop_after_attempt(3)), reraise=True)
-async def get_video_details(api_key, video_id):
-    url = YOUTUBE_API_URL.format(video_id, api_key)
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            response.raise_for_status()
-            video_data = await response.json()
-            snippet = video_data["items"][0]["snippet"]
-            video_title = snippet["title"]
-            channel_title = snippet["channelTitle"]
-            description = snippet["description"]
-            return (video_title, channel_title, description)
@@ -3,6 +3,7 @@ import logging
 from discord import Message, MessageType
 
 from aiuser.config.constants import URL_PATTERN
+from aiuser.core.sticker_cache import StickerCache
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -36,15 +37,10 @@ def format_generic_image(message: Message):
     )
 
 
-async def format_sticker_content(message: Message):
-    try:
-        sticker = await message.stickers[0].fetch()
-        description = sticker.description or ""
-        description_text = f' and description "{description}"' if description else ""
-        return f'User "{message.author.display_name}" sent: [Sticker with name "{sticker.name}"{description_text}]'
-    except Exception:
-        sticker_name = message.stickers[0].name
-        return f'User "{message.author.display_name}" sent: [Sticker with name "{sticker_name}"]'
+async def format_sticker_content(sticker_cache: StickerCache, message: Message):
+    sticker = await sticker_cache.get(message.stickers[0])
+    description_text = f' and description "{sticker.description}"' if sticker.description else ""
+    return f'User "{message.author.display_name}" sent: [Sticker with name "{sticker.name}"{description_text}]'
 
 
 def mention_to_text(message: Message) -> str:
@@ -2,11 +2,9 @@ import asyncio
 import base64
 import logging
 import random
-from io import BytesIO
 
 import aiohttp
 from discord import Message
-from PIL.Image import Image
 from tenacity import retry, stop_after_attempt, stop_after_delay, wait_random
 
 from aiuser.types.abc import MixinMeta
@@ -14,20 +12,18 @@ from aiuser.types.abc import MixinMeta
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
-async def process_image_ai_horde(cog: MixinMeta, message: Message, image: Image):
+async def process_image_ai_horde(cog: MixinMeta, message: Message, image: bytes):
     api_key = (await cog.bot.get_shared_api_tokens("ai-horde")).get(
         "api_key"
     ) or "0000000000"
-    buffer = BytesIO()
-    image.convert("RGB").save(buffer, format="webp", exact=True)
-    encoded_image = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    encoded_image = base64.b64encode(image).decode("utf-8")
     payload = {
         "source_image": encoded_image,
         "slow_workers": True,
         "forms": [{"name": "caption"}],
     }
     try:
-        caption = await request_ai_horde(payload, api_key)
+        caption = await request_ai_horde(cog.http_sessions.get(), payload, api_key)
     except Exception:
         logger.exception("Failed request to AI Horde")
 
@@ -42,23 +38,22 @@ async def process_image_ai_horde(cog: MixinMeta, message: Message, image: Image)
     return content
 
 
-async def request_ai_horde(payload, api_key):
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            "https://stablehorde.net/api/v2/interrogate/async",
-            json=payload,
-            headers={"apikey": api_key},
-        ) as response:
-            if response.status != 202:
-                response.raise_for_status()
+async def request_ai_horde(session: aiohttp.ClientSession, payload, api_key):
+    async with session.post(
+        "https://stablehorde.net/api/v2/interrogate/async",
+        json=payload,
+        headers={"apikey": api_key},
+    ) as response:
+        if response.status != 202:
+            response.raise_for_status()
 
-            response = await response.json()
-            session_id = response["id"]
+        response = await response.json()
+        session_id = response["id"]
 
-            response = await wait_for_response(session, session_id)
+        response = await wait_for_response(session, session_id)
 
-            caption = response["forms"][0]["result"]["caption"]
-            return caption
+        caption = response["forms"][0]["result"]["caption"]
+        return caption
 
 
 @retry(
@@ -0,0 +1,53 @@
+import time
+from typing import Optional
+
+import torch
+from PIL import Image
+from transformers import BlipForConditionalGeneration, BlipProcessor
+
+# only imported in the worker process (see `LocalVisionWorker`), never by the bot itself
+
+BLIP_MODEL = "Salesforce/blip-image-captioning-base"
+
+# loaded once in the worker process
+_processor: Optional[BlipProcessor] = None
+_model: Optional[BlipForConditionalGeneration] = None
+
+
+def load_models(datapath, warm_up: bool = False) -> float:
+    """Load BLIP into this process if it isn't yet, returns the seconds it took"""
+    global _processor, _model
+    if _model is not None:
+        return 0.0
+
+    start = time.monotonic()
+    cache_path = str(datapath or "~/.cache/huggingface/datasets")
+    try:
+        # works offline once the model has been downloaded
+        processor = BlipProcessor.from_pretrained(
+            BLIP_MODEL, cache_dir=cache_path, local_files_only=True
+        )
+        model = BlipForConditionalGeneration.from_pretrained(
+            BLIP_MODEL, cache_dir=cache_path, local_files_only=True
+        )
+    except OSError:
+        processor = BlipProcessor.from_pretrained(BLIP_MODEL, cache_dir=cache_path)
+        model = BlipForConditionalGeneration.from_pretrained(BLIP_MODEL, cache_dir=cache_path)
+    model.eval()
+    _processor, _model = processor, model
+
+    if warm_up:
+        caption_images([Image.new("RGB", (384, 384))], datapath)
+    return time.monotonic() - start
+
+
+def caption_images(images: list[Image.Image], datapath) -> tuple[list[str], float]:
+    """Caption a batch of images, returns the captions and the seconds the model took"""
+    load_models(datapath)
+
+    start = time.monotonic()
+    inputs = _processor(images=[image.convert("RGB") for image in images], return_tensors="pt")
+    with torch.inference_mode():
+        out = _model.generate(**inputs)
+    captions = _processor.batch_decode(out, skip_special_tokens=True)
+    return captions, time.monotonic() - start
@@ -1,79 +1,138 @@
+import asyncio
 import base64
 import logging
-from io import BytesIO
+from urllib.parse import urlsplit
 
+import aiohttp
 from discord import Message
-from PIL import Image
+from PIL import UnidentifiedImageError
 
 from aiuser.types.abc import MixinMeta
 from aiuser.types.enums import ScanImageMode
 from aiuser.messages_list.converter.helpers import format_text_content
 from aiuser.messages_list.converter.image.AI_horde import process_image_ai_horde
+from aiuser.messages_list.converter.image.preprocess import (
+    ImageTooLarge,
+    PreparedImage,
+    remote_image_url,
+)
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
+LLM_IMAGE_MAX_PIXELS = 2048 * 2048
+
 
 async def transcribe_image(cog: MixinMeta, message: Message):
-    config = cog.config
+    settings = cog.settings_cache.guild(message.guild.id)
     attachment = message.attachments[0]
-    mode = ScanImageMode(await config.guild(message.guild).scan_images_mode())
+    mode = ScanImageMode(settings.scan_images_mode)
 
-    buffer = BytesIO()
-    await attachment.save(buffer)
-    image = Image.open(buffer)
-    maxsize = 2048 * 2048 if mode == ScanImageMode.LLM else 1024 * 1024
-    image = scale_image(image, maxsize)
+    maxsize = LLM_IMAGE_MAX_PIXELS if mode == ScanImageMode.LLM else 1024 * 1024
+    if mode == ScanImageMode.LLM and uses_remote_image_urls(cog):
+        # the endpoint downloads the image itself
+        cog.image_preprocessor.stats["remote urls"] += 1
+        return format_llm_image_content(message, remote_image_url(attachment, maxsize))
+
+    # local mode works on the decoded image, no need to encode it
+    output_format = None if mode == ScanImageMode.LOCAL else settings.scan_images_format
+    try:
+        data = await cog.image_preprocessor.download(attachment, settings.max_image_size)
+        image = await cog.image_preprocessor.prepare(
+            data, maxsize, output_format, settings.scan_images_quality
+        )
+    except ImageTooLarge:
+        logger.debug(f"Skipping scanning image of message {message.id}, over the size limit")
+        return None
+    except UnidentifiedImageError:
+        logger.debug(f"Skipping scanning image of message {message.id}, unknown format")
+        return None
+    except aiohttp.ClientError:
+        logger.debug(f"Skipping scanning image of message {message.id}, download failed", exc_info=True)
+        return None
+    except asyncio.TimeoutError:
+        logger.debug(f"Skipping scanning image of message {message.id}, timed out")
+        return None
 
     content = await process_image(cog, message, image, mode)
 
     if content and mode != ScanImageMode.LLM:
-        cog.cached_messages[message.id] = content
+        cog.cached_messages.set(message.id, content, tags=[message.author.id])
 
     return content
 
 
 async def process_image(
-    cog: MixinMeta, message: Message, image: Image, mode: ScanImageMode
+    cog: MixinMeta, message: Message, image: PreparedImage, mode: ScanImageMode
 ):
     if mode == ScanImageMode.AI_HORDE:
-        return await process_image_ai_horde(cog, message, image)
+        return await process_image_ai_horde(cog, message, image.data)
     elif mode == ScanImageMode.LOCAL:
         try:
             from aiuser.messages_list.converter.image.local import process_image_locally
 
-            return await process_image_locally(cog, message, image)
+            return await process_image_locally(cog, message, image.image)
         except ImportError:
             logger.exception(
                 "Local image scanning dependencies not installed, check cog README for instructions"
             )
             return None
     elif mode == ScanImageMode.LLM:
-        content = []
-        if message.content != "":
-            content.append({"type": "text", "text": format_text_content(message)})
-        fp = BytesIO()
-        image.save(fp, "PNG")
-        fp.seek(0)
-        content.append(
-            {
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/png;base64,{base64.b64encode(fp.read()).decode()}"
-                },
-            }
-        )
-        return content
+        return format_llm_image_content(message, format_data_url(image))
     else:
         return None
 
 
-def scale_image(image: Image.Image, target_resolution: int) -> Image:
-    width, height = image.size
-    image_resolution = width * height
-    if image_resolution > target_resolution:
-        scale_factor = (target_resolution / image_resolution) ** 0.5
-        return image.resize(
-            (int(width * scale_factor), int(height * scale_factor)),
-            Image.Resampling.LANCZOS,
-        )
-    return image
+def format_llm_image_content(message: Message, url: str) -> list:
+    content = []
+    if message.content != "":
+        content.append({"type": "text", "text": format_text_content(message)})
+    content.append({"type": "image_url", "image_url": {"url": url}})
+    return content
+
+
+def format_data_url(image: PreparedImage) -> str:
+    return f"data:{image.mime_type};base64,{base64.b64encode(image.data).decode()}"
+
+
+def uses_remote_image_urls(cog: MixinMeta) -> bool:
+    settings = cog.settings_cache.globals
+    endpoint = settings.custom_openai_endpoint or "default"
+    return (
+        endpoint in settings.remote_image_url_endpoints
+        and endpoint not in cog.image_preprocessor.rejected_endpoints
+    )
+
+
+async def inline_remote_images(cog: MixinMeta, guild_id: int, entries: list) -> bool:
+    """
+    Replace remote image URLs in the content of `entries` with downloaded and encoded data URLs,
+    returns whether any image could be inlined.
+    Images that fail to download or decode are replaced with a text placeholder.
+    """
+    settings = cog.settings_cache.guild(guild_id)
+    items = [
+        item
+        for entry in entries
+        if isinstance(entry.content, list)
+        for item in entry.content
+        if isinstance(item, dict)
+        and item.get("type") == "image_url"
+        and not item["image_url"]["url"].startswith("data:")
+    ]
+    inlined = False
+    for item in items:
+        url = item["image_url"]["url"]
+        try:
+            data = await cog.image_preprocessor.download_url(url, settings.max_image_size)
+            image = await cog.image_preprocessor.prepare(
+                data, LLM_IMAGE_MAX_PIXELS, settings.scan_images_format, settings.scan_images_quality
+            )
+        except (ImageTooLarge, aiohttp.ClientError, UnidentifiedImageError, asyncio.TimeoutError):
+            logger.debug(f"Failed inlining remote image {url}", exc_info=True)
+            filename = urlsplit(url).path.rsplit("/", 1)[-1]
+            item.clear()
+            item.update({"type": "text", "text": f'[Image: "{filename}"]'})
+            continue
+        item["image_url"]["url"] = format_data_url(image)
+        inlined = True
+    return inlined
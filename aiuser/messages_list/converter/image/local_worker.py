@@ -0,0 +1,202 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+from aiuser.config.constants import (
+    LOCAL_CAPTION_BATCH_SIZE,
+    LOCAL_CAPTION_BATCH_WINDOW,
+    LOCAL_OCR_WORKERS,
+    LOCAL_VISION_TIMEOUT,
+)
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+LOCAL_VISION_MODULES = ("pytesseract", "torch", "transformers")
+
+
+class LocalVisionWorker:
+    """
+    Resident worker for the `local` image scanning mode.
+
+    BLIP is loaded once, in a separate process, and kept there for every caption after.
+    Caption requests arriving within `LOCAL_CAPTION_BATCH_WINDOW` seconds of each other are captioned as one batch.
+    OCR runs in a small thread pool (Tesseract itself runs as a subprocess).
+    torch and transformers are only ever imported in the worker process.
+    """
+
+    def __init__(self):
+        self.datapath = None
+        # (image, future) waiting for the next batch
+        self.pending: list[tuple[Image.Image, asyncio.Future]] = []
+        self.in_flight = 0
+        self.stats: Counter[str] = Counter()
+        # seconds spent, and number of runs, per stage
+        self.timing_totals: Counter[str] = Counter()
+        self.timing_counts: Counter[str] = Counter()
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+        self._ocr_executor: Optional[ThreadPoolExecutor] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._load_task: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._ocr_executor is not None
+
+    def start(self, datapath, warm_up: bool = False):
+        """Start the worker process and load the model in the background, does nothing if already started"""
+        if self.started:
+            return
+        if not dependencies_installed():
+            raise ImportError("Local image scanning dependencies are not installed")
+
+        self.datapath = datapath
+        self._ocr_executor = ThreadPoolExecutor(
+            max_workers=LOCAL_OCR_WORKERS, thread_name_prefix="aiuser_ocr"
+        )
+        self._load_task = asyncio.create_task(self._load(warm_up))
+
+    def shutdown(self):
+        for task in (self._flush_task, self._load_task):
+            if task:
+                task.cancel()
+        for _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        if self._ocr_executor:
+            self._ocr_executor.shutdown(wait=False, cancel_futures=True)
+        if self._process_executor:
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+        self._ocr_executor = None
+        self._process_executor = None
+
+    def queue_depth(self) -> int:
+        return len(self.pending) + self.in_flight
+
+    def average_time(self, stage: str) -> float:
+        if not self.timing_counts[stage]:
+            return 0.0
+        return self.timing_totals[stage] / self.timing_counts[stage]
+
+    async def extract_text(self, image: Image.Image) -> str:
+        from aiuser.messages_list.converter.image import local
+
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        text = await asyncio.wait_for(
+            loop.run_in_executor(self._ocr_executor, local.extract_text, image),
+            LOCAL_VISION_TIMEOUT,
+        )
+        self._record("ocr", time.monotonic() - start)
+        return text
+
+    async def caption(self, image: Image.Image) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((image, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+        start = time.monotonic()
+        caption = await asyncio.wait_for(future, LOCAL_VISION_TIMEOUT)
+        self._record("caption (total)", time.monotonic() - start)
+        return caption
+
+    async def _load(self, warm_up: bool):
+        try:
+            seconds = await self._run_in_process(load_models, self.datapath, warm_up)
+        except Exception:
+            logger.exception("Failed loading local image captioning model")
+            return
+        if seconds:
+            self._record("model load", seconds)
+            logger.info(f"Loaded local image captioning model in {seconds:.1f}s")
+
+    async def _flush(self):
+        await asyncio.sleep(LOCAL_CAPTION_BATCH_WINDOW)
+        while self.pending:
+            batch = self.pending[:LOCAL_CAPTION_BATCH_SIZE]
+            del self.pending[:LOCAL_CAPTION_BATCH_SIZE]
+            batch = [(image, future) for image, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self.in_flight += len(batch)
+            try:
+                captions, seconds = await self._run_in_process(
+                    caption_images, [image for image, _ in batch], self.datapath
+                )
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # eg. killed for running out of memory, a new one is started for the next batch
+                    logger.error("Local image captioning process died")
+                    self._process_executor = None
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.in_flight -= len(batch)
+
+            self.stats["batches"] += 1
+            self.stats["captions"] += len(batch)
+            self._record("caption (model)", seconds)
+            for (_, future), caption in zip(batch, captions):
+                if not future.done():
+                    future.set_result(caption)
+
+    def _run_in_process(self, func, *args) -> asyncio.Future:
+        if self._process_executor is None:
+            self._process_executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+        with importable_from_worker():
+            # the process is spawned when the first job is submitted
+            return asyncio.get_running_loop().run_in_executor(self._process_executor, func, *args)
+
+    def _record(self, stage: str, seconds: float):
+        self.timing_totals[stage] += seconds
+        self.timing_counts[stage] += 1
+
+
+def dependencies_installed() -> bool:
+    """Checked without importing them, torch alone takes seconds to import"""
+    return all(importlib.util.find_spec(name) is not None for name in LOCAL_VISION_MODULES)
+
+
+# run in the worker process, so `blip` is only imported there
+def load_models(datapath, warm_up: bool) -> float:
+    from aiuser.messages_list.converter.image import blip
+
+    return blip.load_models(datapath, warm_up)
+
+
+def caption_images(images: list[Image.Image], datapath) -> tuple[list[str], float]:
+    from aiuser.messages_list.converter.image import blip
+
+    return blip.caption_images(images, datapath)
+
+
+@contextmanager
+def importable_from_worker():
+    """
+    Red imports cogs from its cog paths without adding them to `sys.path`,
+    but spawned processes need it to import this package (they copy `sys.path` when started)
+    """
+    path = str(Path(__file__).parents[4])
+    added = path not in sys.path
+    if added:
+        sys.path.append(path)
+    try:
+        yield
+    finally:
+        if added:
+            sys.path.remove(path)
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from discord import Attachment
+from PIL import Image
+
+from aiuser.config.constants import (
+    IMAGE_DOWNLOAD_CHUNK_SIZE,
+    IMAGE_PREPROCESS_TIMEOUT,
+    IMAGE_PREPROCESS_WORKERS,
+)
+from aiuser.utils.http import HTTPSessionManager
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+IMAGE_OUTPUT_FORMATS = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class PreparedImage(NamedTuple):
+    image: Image.Image
+    # encoded in the output format, None if not requested
+    data: Optional[bytes]
+    mime_type: str
+
+
+class ImagePreprocessor:
+    """
+    Downloads image attachments and gets them ready for scanning, off the event loop.
+    Decoding, resizing and encoding run in a small worker pool; JPEGs are decoded at a reduced size when possible
+    and images are re-encoded as JPEG / WebP instead of PNG to keep requests small.
+    """
+
+    def __init__(self, http_sessions: HTTPSessionManager, workers: int = IMAGE_PREPROCESS_WORKERS):
+        self.http_sessions = http_sessions
+        self.workers = workers
+        self.stats: Counter[str] = Counter()
+        # endpoints (see `remote_image_url_endpoints`) that failed requests with remote image URLs
+        self.rejected_endpoints: set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def download(self, attachment: Attachment, max_size: int) -> bytes:
+        """Download an attachment, raises `ImageTooLarge` as soon as it goes over `max_size` bytes"""
+        if attachment.size > max_size:
+            raise ImageTooLarge(attachment.size)
+        return await self.download_url(attachment.url, max_size)
+
+    async def download_url(self, url: str, max_size: int) -> bytes:
+        buffer = BytesIO()
+        async with self.http_sessions.get().get(url) as response:
+            response.raise_for_status()
+            if (response.content_length or 0) > max_size:
+                raise ImageTooLarge(response.content_length)
+            async for chunk in response.content.iter_chunked(IMAGE_DOWNLOAD_CHUNK_SIZE):
+                buffer.write(chunk)
+                if buffer.tell() > max_size:
+                    raise ImageTooLarge(buffer.tell())
+        self.stats["bytes downloaded"] += buffer.tell()
+        return buffer.getvalue()
+
+    async def prepare(
+        self,
+        data: bytes,
+        max_pixels: int,
+        output_format: Optional[str] = "jpeg",
+        quality: int = 85,
+    ) -> PreparedImage:
+        """Decode and downscale an image to at most `max_pixels`, encoding it in `output_format` if given"""
+        loop = asyncio.get_running_loop()
+        prepared = await asyncio.wait_for(
+            loop.run_in_executor(
+                self._get_executor(), prepare_image, data, max_pixels, output_format, quality
+            ),
+            IMAGE_PREPROCESS_TIMEOUT,
+        )
+        self.stats["images"] += 1
+        if prepared.data is not None:
+            self.stats["bytes encoded"] += len(prepared.data)
+        return prepared
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="aiuser_image"
+            )
+        return self._executor
+
+
+def remote_image_url(attachment: Attachment, max_pixels: int) -> str:
+    """
+    URL of the attachment on Discord's media proxy, for endpoints that fetch images themselves.
+    Large images are resized by the proxy (using its `width` / `height` parameters) so they are not downloaded in full.
+    """
+    if not attachment.width or not attachment.height:
+        return attachment.url
+    size = scaled_size((attachment.width, attachment.height), max_pixels)
+    if size == (attachment.width, attachment.height):
+        return attachment.url
+    url = urlsplit(attachment.proxy_url)
+    query = [(key, value) for key, value in parse_qsl(url.query) if key not in ("width", "height")]
+    query += [("width", str(size[0])), ("height", str(size[1]))]
+    return url._replace(query=urlencode(query)).geturl()
+
+
+def prepare_image(
+    data: bytes, max_pixels: int, output_format: Optional[str], quality: int
+) -> PreparedImage:
+    image = Image.open(BytesIO(data))
+    if image.format == "JPEG":
+        # let the decoder skip detail we'd throw away when resizing (DCT scaling)
+        image.draft("RGB", scaled_size(image.size, max_pixels))
+    image = scale_image(image, max_pixels)
+
+    if not output_format:
+        return PreparedImage(image, None, "")
+
+    output_format = output_format.lower()
+    if image.mode not in ("RGB", "RGBA") or (output_format == "jpeg" and image.mode == "RGBA"):
+        image = flatten_image(image)
+    buffer = BytesIO()
+    image.save(buffer, output_format.upper(), quality=quality)
+    return PreparedImage(image, buffer.getvalue(), IMAGE_OUTPUT_FORMATS[output_format])
+
+
+def flatten_image(image: Image.Image) -> Image.Image:
+    """Convert to RGB, with transparency put on a white background"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def scaled_size(size: tuple[int, int], target_resolution: int) -> tuple[int, int]:
+    width, height = size
+    image_resolution = width * height
+    if image_resolution > target_resolution:
+        scale_factor = (target_resolution / image_resolution) ** 0.5
+        return max(1, int(width * scale_factor)), max(1, int(height * scale_factor))
+    return width, height
+
+
+def scale_image(image: Image.Image, target_resolution: int) -> Image.Image:
+    size = scaled_size(image.size, target_resolution)
+    if size != image.size:
+        return image.resize(size, Image.Resampling.LANCZOS)
+    return image
@@ -1,21 +1,32 @@
+import asyncio
 import json
 import logging
 import random
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List
+from typing import Optional
 
 import discord
-import tiktoken
 from discord import Message
 from redbot.core import commands
 
+from aiuser.config.constants import (
+    HISTORY_CONVERSION_CONCURRENCY,
+    HISTORY_CONVERSION_TIMEOUT,
+    HISTORY_PREFETCH_MIN_TOKENS,
+    YOUTUBE_VIDEO_ID_PATTERN,
+)
 from aiuser.config.defaults import DEFAULT_PROMPT
 from aiuser.config.models import OTHER_MODELS_LIMITS
+from aiuser.core.llm_scheduler import LLMPriority
+from aiuser.messages_list.conversation import ConvertedMessage
 from aiuser.messages_list.converter.converter import MessageConverter
 from aiuser.messages_list.entry import MessageEntry
 from aiuser.messages_list.opt_view import OptView
 from aiuser.types.abc import MixinMeta
 from aiuser.types.enums import ScanImageMode
+from aiuser.utils.tokens import get_encoding, token_counter
 from aiuser.utils.utilities import format_variables
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
@@ -46,13 +57,24 @@ class MessagesList:
         self.converter = MessageConverter(cog, ctx)
         self.init_message = ctx.message
         self.guild = ctx.guild
+        self.settings_cache = cog.settings_cache
+        self.settings = cog.settings_cache.guild(self.guild.id)
+        self.opt_store = cog.opt_store
+        self.message_buffer = cog.message_buffer
+        self.conversations = cog.conversations
+        self.message_cache = cog.cached_messages
+        self.youtube = cog.youtube
         self.ignore_regex = cog.ignore_regex.get(self.guild.id, None)
         self.start_time = cog.override_prompt_start_time.get(self.guild.id)
-        self.messages: List[MessageEntry] = []
+        self.messages: deque[MessageEntry] = deque()
+        # system prompt kept ahead of everything else (cache-stable prompt layout)
+        self.prompt_prefix: Optional[MessageEntry] = None
         self.messages_ids = set()
+        self.timed_out_ids: set[int] = set()
         self.tokens = 0
         self.model = None
         self.can_reply = True
+        self.priority = LLMPriority.DIRECT
 
     def __len__(self):
         return len(self.messages)
@@ -61,30 +83,47 @@ class MessagesList:
         return json.dumps(self.get_json(), indent=4)
 
     async def _init(self, prompt=None):
-        self.model = await self.config.guild(self.guild).model()
-        self.token_limit = await self.config.guild(
-            self.guild
-        ).custom_model_tokens_limit() or self._get_token_limit(self.model)
-        try:
-            self._encoding = tiktoken.encoding_for_model(self.model)
-        except KeyError:
-            self._encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        self.model = self.settings.model
+        self.token_limit = self.settings.custom_model_tokens_limit or self._get_token_limit(
+            self.model
+        )
+        self._encoding = get_encoding(self.model)
 
         if not prompt:  # jank
             await self.add_msg(self.init_message)
 
         bot_prompt = prompt or await self._pick_prompt()
 
-        await self.add_system(await format_variables(self.ctx, bot_prompt))
+        if self.settings.cache_stable_prompt:
+            await self._add_cache_stable_prompt(bot_prompt)
+        else:
+            await self.add_system(await format_variables(self.ctx, bot_prompt))
 
         if await self._check_if_inital_img():
-            self.model = await self.config.guild(self.guild).scan_images_model()
+            self.model = self.settings.scan_images_model
+
+    async def _add_cache_stable_prompt(self, bot_prompt: str):
+        """
+        Keep the system prompt byte-identical at the very start of every request, so endpoints can reuse their cached prefix.
+        Volatile variables are sent in a system message after the trigger message instead.
+        """
+        deferred = {}
+        content = await format_variables(self.ctx, bot_prompt, deferred=deferred)
+        self.prompt_prefix = MessageEntry("system", content)
+        await self._add_tokens(content)
+
+        if deferred:
+            values = "\n".join(f"[{name}]: {deferred[name]}" for name in sorted(deferred))
+            await self.add_system(
+                f"Current values of the bracketed placeholders in the first system message:\n{values}",
+                index=len(self) + 1,
+            )
 
     async def _check_if_inital_img(self) -> bool:
         if (
             self.ctx.interaction
-            or not await self.config.guild(self.guild).scan_images()
-            or await self.config.guild(self.guild).scan_images_mode() != ScanImageMode.LLM.value
+            or not self.settings.scan_images
+            or self.settings.scan_images_mode != ScanImageMode.LLM.value
         ):
             return False
         if self.init_message.attachments and self.init_message.attachments[
@@ -102,19 +141,13 @@ class MessagesList:
 
     async def _pick_prompt(self):
         author = self.init_message.author
-        role_prompt = None
-
-        for role in author.roles:
-            if role.id in (await self.config.all_roles()):
-                role_prompt = await self.config.role(role).custom_text_prompt()
-                break
 
         return (
-            await self.config.member(self.init_message.author).custom_text_prompt()
-            or role_prompt
-            or await self.config.channel(self.init_message.channel).custom_text_prompt()
-            or await self.config.guild(self.guild).custom_text_prompt()
-            or await self.config.custom_text_prompt()
+            self.settings.member(author.id).custom_text_prompt
+            or self.settings_cache.role_index(self.guild).prompt(author)
+            or self.settings_cache.channel(self.init_message.channel.id).custom_text_prompt
+            or self.settings.custom_text_prompt
+            or self.settings_cache.globals.custom_text_prompt
             or DEFAULT_PROMPT
         )
 
@@ -132,12 +165,12 @@ class MessagesList:
             return False
         if not await self.bot.allowed_by_whitelist_blacklist(message.author):
             return False
-        if message.author.id in await self.config.optout():
+        if self.opt_store.is_opted_out(message.author.id):
             return False
         if (
             (not message.author.id == self.bot.user.id)
-            and message.author.id not in await self.config.optin()
-            and not await self.config.guild(self.guild).optin_by_default()
+            and not self.opt_store.is_opted_in(message.author.id)
+            and not self.settings.optin_by_default
         ):
             return False
 
@@ -147,28 +180,18 @@ class MessagesList:
         if not await self.check_if_add(message, force):
             return
 
-        converted = await self.converter.convert(message)
+        converted = await self._convert(message)
 
         if not converted:
             return
 
-        for entry in converted:
+        for entry, tokens in zip(converted.entries, converted.token_counts(self._encoding)):
             if self.tokens > self.token_limit:
                 return
 
             self.messages.insert(index or 0, entry)
             self.messages_ids.add(message.id)
-
-            if isinstance(entry.content, list):
-                for item in entry.content:
-                    if not isinstance(item, dict):
-                        continue
-                    if item.get("type") == "text":
-                        await self._add_tokens(item.get("text"))
-                    elif item.get("type") == "image_url":
-                        self.tokens += 255  # TODO: calculate actual image token cost
-            else:
-                await self._add_tokens(entry.content)
+            self.tokens += tokens
 
         # TODO: proper reply chaining
         if (
@@ -178,6 +201,38 @@ class MessagesList:
         ):
             await self.add_msg(message.reference.resolved, index=0)
 
+    async def _convert(self, message: Message) -> Optional[ConvertedMessage]:
+        """Convert a message, reusing the channel's earlier conversion if the message hasn't changed since"""
+        if message.id in self.timed_out_ids:
+            return None
+        if self._is_trigger_message(message):
+            # may have its image scanned, which only happens for the trigger message
+            entries = await self.converter.convert(message)
+            return ConvertedMessage(message, entries) if entries else None
+
+        variant = (
+            message.edited_at,
+            len(message.embeds),
+            message.id in self.message_cache,
+            message.author.display_name,
+            self.settings.max_image_size,
+        )
+        converted = self.conversations.get(message, variant)
+        if converted is None:
+            entries = await self.converter.convert(message) or []
+            if message.id in self.converter.failed_lookups:
+                # not kept, so the lookup is retried for the next reply
+                converted = ConvertedMessage(message, entries)
+            else:
+                converted = self.conversations.put(message, variant, entries)
+        return converted if converted.entries else None
+
+    def _is_trigger_message(self, message: Message) -> bool:
+        """The trigger message, or the message it replied to"""
+        return message.id == self.init_message.id or bool(
+            self.init_message.reference and self.init_message.reference.message_id == message.id
+        )
+
     async def add_system(self, content: str, index: int = None):
         if self.tokens > self.token_limit:
             return
@@ -192,16 +247,18 @@ class MessagesList:
         self.messages.insert(index or 0, entry)
         await self._add_tokens(content)
 
-    async def add_tool_result(self, content: str, tool_call_id: int, index: int = None):
-        if self.tokens > self.token_limit:
+    async def add_tool_result(
+        self, content: str, tool_call_id: int, index: int = None, force: bool = False
+    ):
+        if self.tokens > self.token_limit and not force:
             return
         entry = MessageEntry("tool", content, tool_call_id=tool_call_id)
         self.messages.insert(index or 0, entry)
         await self._add_tokens(content)
 
     async def add_history(self):
-        limit = await self.config.guild(self.guild).messages_backread()
-        max_seconds_gap = await self.config.guild(self.guild).messages_backread_seconds()
+        limit = self.settings.messages_backread
+        max_seconds_gap = self.settings.messages_backread_seconds
         start_time: datetime = self.start_time - timedelta(seconds=1) if self.start_time else None
 
         past_messages = await self._get_past_messages(limit, start_time)
@@ -213,68 +270,156 @@ class MessagesList:
 
         users = await self._get_unopted_users(past_messages[:10])
 
-        await self._process_past_messages(past_messages, max_seconds_gap)
+        # one bound for converting the whole history, however many chunks it takes
+        deadline = time.monotonic() + HISTORY_CONVERSION_TIMEOUT
+        await self._process_past_messages(past_messages, max_seconds_gap, deadline)
+        self.conversations.prune(self.init_message.channel.id, past_messages[-1].id)
 
-        if users and not await self.config.guild(self.guild).optin_disable_embed():
+        if users and not self.settings.optin_disable_embed:
             if (random.random() <= 0.33) or (len(users) > 3):
                 await self._send_optin_embed(users)
 
     async def _get_past_messages(self, limit, start_time):
-        return [
-            message
-            async for message in self.init_message.channel.history(
-                limit=limit + 1,
-                before=self.init_message,
-                after=start_time,
-                oldest_first=False,
-            )
-        ]
+        return await self.message_buffer.history(
+            self.init_message.channel,
+            limit=limit + 1,
+            before=self.init_message,
+            after=start_time,
+        )
 
     async def _get_unopted_users(self, messages):
         users = set()
 
-        if await self.config.guild(self.guild).optin_by_default():
+        if self.settings.optin_by_default:
             return users
 
         for message in messages:
-            if (
-                (not message.author.bot)
-                and (message.author.id not in await self.config.optin())
-                and (message.author.id not in await self.config.optout())
-            ):
+            if (not message.author.bot) and not self.opt_store.has_chosen(message.author.id):
                 users.add(message.author)
 
         return users
 
-    async def _process_past_messages(self, past_messages, max_seconds_gap):
+    async def _process_past_messages(self, past_messages, max_seconds_gap, deadline: float):
+        window = []
         for i in range(len(past_messages) - 1):
-            if self.tokens > self.token_limit:
-                return logger.debug(
-                    f"{self.tokens} tokens used - nearing limit, stopping context creation for message {self.init_message.id}"
-                )
             if (past_messages[i].author.id == self.bot.user.id) and (
                 past_messages[i].embeds and past_messages[i].embeds[0].title == OPTIN_EMBED_TITLE
             ):
                 continue
-            if await self._is_valid_time_gap(
+            window.append(past_messages[i])
+            if not await self._is_valid_time_gap(
                 past_messages[i], past_messages[i + 1], max_seconds_gap
             ):
-                await self.add_msg(past_messages[i])
-            else:
-                await self.add_msg(past_messages[i])
                 break
 
+        while window:
+            if self.tokens > self.token_limit:
+                return logger.debug(
+                    f"{self.tokens} tokens used - nearing limit, stopping context creation for message {self.init_message.id}"
+                )
+            if time.monotonic() >= deadline:
+                return logger.warning(
+                    f"Skipping {len(window)} older messages in {self.guild.name} that weren't converted within {HISTORY_CONVERSION_TIMEOUT}s"
+                )
+            chunk = self._next_chunk(window)
+            del window[: len(chunk)]
+            await self._prefetch_conversions(chunk, deadline)
+
+            for message in chunk:
+                if self.tokens > self.token_limit:
+                    break
+                await self.add_msg(message)
+
+    def _next_chunk(self, window: list[Message]) -> list[Message]:
+        """
+        Newest messages of the window that could fill the remaining token budget,
+        estimated from their raw content (converted messages only get longer)
+        """
+        remaining = self.token_limit - self.tokens
+        estimate = 0
+        for i, message in enumerate(window):
+            estimate += max(
+                token_counter.count(self._encoding, message.content), HISTORY_PREFETCH_MIN_TOKENS
+            )
+            if estimate > remaining:
+                return window[: i + 1]
+        return window[:]
+
+    async def _prefetch_youtube(self, messages):
+        """Look up every YouTube video linked in the window in one batched request"""
+        video_ids = [
+            match.group(1)
+            for message in messages
+            if not self._is_trigger_message(message)
+            for match in [YOUTUBE_VIDEO_ID_PATTERN.search(message.content)]
+            if match
+        ]
+        if not video_ids:
+            return
+        api_key = (await self.bot.get_shared_api_tokens("youtube")).get("api_key")
+        if api_key:
+            self.youtube.prefetch(api_key, video_ids)
+
+    async def _prefetch_conversions(self, messages: list[Message], deadline: float):
+        """
+        Convert a chunk of history messages concurrently before they are added in order,
+        so network round trips (stickers, YouTube, etc.) overlap instead of adding up
+        """
+        to_convert: dict[int, Message] = {}
+        for message in messages:
+            to_convert[message.id] = message
+            reference = message.reference
+            if (
+                reference
+                and isinstance(reference.resolved, discord.Message)
+                and message.author.id != self.bot.user.id
+            ):
+                to_convert[reference.resolved.id] = reference.resolved
+
+        await self._prefetch_youtube(to_convert.values())
+
+        semaphore = asyncio.Semaphore(HISTORY_CONVERSION_CONCURRENCY)
+
+        async def convert(message: Message):
+            async with semaphore:
+                if await self.check_if_add(message, force=True):
+                    await self._convert(message)
+
+        tasks = {
+            asyncio.create_task(convert(message)): message
+            for message in to_convert.values()
+            if not self._is_trigger_message(message)
+        }
+        if not tasks:
+            return
+
+        done, pending = await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+        for task in done:
+            if task.exception():
+                logger.debug(
+                    f"Failed converting message {tasks[task].id}, retrying in order",
+                    exc_info=task.exception(),
+                )
+        for task in pending:
+            task.cancel()
+            self.timed_out_ids.add(tasks[task].id)
+        if pending:
+            logger.warning(
+                f"Skipping {len(pending)} messages in {self.guild.name} that took over {HISTORY_CONVERSION_TIMEOUT}s to convert"
+            )
+
     async def _send_optin_embed(self, users):
         users = ", ".join([user.mention for user in users])
         embed = discord.Embed(
             title=OPTIN_EMBED_TITLE,
             color=await self.bot.get_embed_color(self.init_message),
         )
-        view = OptView(self.config)
+        view = OptView(self.opt_store)
         embed.description = f"{users}\nPlease choose whether to allow a subset of your Discord messages from any server with the bot, to be sent to OpenAI or an external party.\nThis will allow the bot to reply to your messages or use your messages.\nThis message will disappear if all current chatters have made a choice."
         await self.init_message.channel.send(embed=embed, view=view)
 
     def get_json(self):
+        messages = [self.prompt_prefix, *self.messages] if self.prompt_prefix else self.messages
         return [
             {
                 "role": message.role,
@@ -286,15 +431,11 @@ class MessagesList:
                     else {}
                 ),
             }
-            for message in self.messages
+            for message in messages
         ]
 
     async def _add_tokens(self, content):
-        if not self._encoding:
-            await self._initialize_encoding()
-        content = str(content)
-        tokens = self._encoding.encode(content, disallowed_special=())
-        self.tokens += len(tokens)
+        self.tokens += token_counter.count(self._encoding, str(content))
 
     @staticmethod
     def _get_token_limit(model) -> int:
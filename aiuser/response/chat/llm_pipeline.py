@@ -1,48 +1,69 @@
+import asyncio
+import hashlib
 import json
 import logging
-from dataclasses import asdict
+import time
+from collections import Counter
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import httpx
 import openai
-from openai.types.chat import ChatCompletion, ChatCompletionMessageToolCall
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
 from openai.types.completion import Completion
 from redbot.core import Config, commands
 
+from aiuser.config.constants import MAX_TOOL_CALL_ITERATIONS, TOOL_CALLS_TIME_BUDGET
 from aiuser.config.models import (
+    EXPLICIT_PROMPT_CACHING_MODEL_PREFIXES,
     UNSUPPORTED_LOGIT_BIAS_MODELS,
     VISION_SUPPORTED_MODELS,
 )
+from aiuser.core.llm_scheduler import LLMRequestDropped
 from aiuser.functions.tool_call import ToolCall
 from aiuser.functions.types import ToolCallSchema
+from aiuser.messages_list.converter.image.caption import inline_remote_images
 from aiuser.messages_list.messages import MessagesList
+from aiuser.response.chat.streaming import ResponseStreamer
 from aiuser.types.abc import MixinMeta
-from aiuser.utils.utilities import get_enabled_tools
+from aiuser.utils.utilities import (
+    is_using_openai_endpoint,
+    is_using_openrouter_endpoint,
+)
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
 class LLMPipeline:
     def __init__(self, cog: MixinMeta, ctx: commands.Context, messages: MessagesList):
+        self.cog = cog
         self.ctx: commands.Context = ctx
         self.config: Config = cog.config
+        self.settings = cog.settings_cache.guild(ctx.guild.id)
         self.bot = cog.bot
         self.msg_list = messages
         self.model = messages.model
         self.can_reply = messages.can_reply
         self.messages = messages.get_json()
         self.openai_client = cog.openai_client
+        self.llm_scheduler = cog.llm_scheduler
+        self.tool_registry = cog.tool_registry
+        self.usage_stats: Counter[str] = cog.usage_stats
+        self.priority = messages.priority
         self.enabled_tools: List[ToolCall] = []
         self.available_tools_schemas: List[ToolCallSchema] = []
         self.completion: Optional[str] = None
+        self.tool_iterations = 0
+        self.tool_time_left: float = TOOL_CALLS_TIME_BUDGET
+        # set to show the completion while it is being generated
+        self.streamer: Optional[ResponseStreamer] = None
 
     async def get_custom_parameters(self) -> Dict[str, Any]:
-        custom_parameters = await self.config.guild(self.ctx.guild).parameters()
+        custom_parameters = self.settings.parameters
         kwargs = json.loads(custom_parameters) if custom_parameters else {}
 
         if "logit_bias" not in kwargs:
-            weights = await self.config.guild(self.ctx.guild).weights()
-            kwargs["logit_bias"] = json.loads(weights or "{}")
+            kwargs["logit_bias"] = json.loads(self.settings.weights or "{}")
 
         if (
             kwargs.get("logit_bias")
@@ -55,9 +76,12 @@ class LLMPipeline:
         return kwargs
 
     async def setup_tools(self):
-        if not (await self.config.guild(self.ctx.guild).function_calling()):
+        if not self.settings.function_calling:
             return
-        self.enabled_tools = await get_enabled_tools(self.config, self.ctx)
+        self.enabled_tools = [
+            tool(config=self.config, ctx=self.ctx, http_sessions=self.cog.http_sessions)
+            for tool in self.tool_registry.enabled(self.ctx.guild.id)
+        ]
         self.available_tools_schemas = [tool.schema for tool in self.enabled_tools]
 
     async def call_client(
@@ -65,14 +89,22 @@ class LLMPipeline:
     ) -> Union[str, Tuple[str, List[ChatCompletionMessageToolCall]]]:
         if "gpt-3.5-turbo-instruct" in self.model:
             prompt = "\n".join(message["content"] for message in self.messages)
-            response: Completion = await self.openai_client.completions.create(
-                model=self.model, prompt=prompt, **kwargs
-            )
+            async with self.llm_scheduler.slot(self.ctx.guild.id, self.priority):
+                response: Completion = await self.openai_client.completions.create(
+                    model=self.model, prompt=prompt, **kwargs
+                )
+            self.record_usage(response)
             return response.choices[0].message.content
+        elif self.streamer:
+            return await self.stream_client(kwargs)
         else:
-            response: ChatCompletion = await self.openai_client.chat.completions.create(
-                model=self.model, messages=self.msg_list.get_json(), **kwargs
-            )
+            messages = self.msg_list.get_json()
+            self.add_cache_hints(messages, kwargs)
+            async with self.llm_scheduler.slot(self.ctx.guild.id, self.priority):
+                response: ChatCompletion = await self.openai_client.chat.completions.create(
+                    model=self.model, messages=messages, **kwargs
+                )
+            self.record_usage(response)
 
             tools_calls: List[ChatCompletionMessageToolCall] = (
                 response.choices[0].message.tool_calls or []
@@ -80,15 +112,108 @@ class LLMPipeline:
 
             return response.choices[0].message.content, tools_calls
 
+    async def call_client_with_image_fallback(
+        self, kwargs: Dict[str, Any]
+    ) -> Union[str, Tuple[str, List[ChatCompletionMessageToolCall]]]:
+        """`call_client`, retried with images sent inline if the endpoint couldn't use their remote URLs"""
+        try:
+            return await self.call_client(kwargs)
+        except openai.BadRequestError:
+            if not await inline_remote_images(self.cog, self.ctx.guild.id, self.msg_list.messages):
+                raise
+
+        result = await self.call_client(kwargs)
+        endpoint = self.cog.settings_cache.globals.custom_openai_endpoint or "default"
+        self.cog.image_preprocessor.rejected_endpoints.add(endpoint)
+        logger.warning(
+            f"Endpoint {endpoint} rejected remote image URLs, sending images inline until the cog is reloaded"
+        )
+        return result
+
+    async def stream_client(
+        self, kwargs: Dict[str, Any]
+    ) -> Tuple[str, List[ChatCompletionMessageToolCall]]:
+        """
+        Like `call_client`, but passes the text to the streamer as it arrives.
+        Responses that only call tools show nothing, the tool results are sent and the next completion is streamed.
+        """
+        messages = self.msg_list.get_json()
+        self.add_cache_hints(messages, kwargs)
+        if is_using_openai_endpoint(self.openai_client) or is_using_openrouter_endpoint(
+            self.openai_client
+        ):
+            kwargs = {**kwargs, "stream_options": {"include_usage": True}}
+
+        content = ""
+        # index -> (id, name, arguments)
+        tool_calls: Dict[int, List[str]] = {}
+        async with self.llm_scheduler.slot(self.ctx.guild.id, self.priority):
+            stream = await self.openai_client.chat.completions.create(
+                model=self.model, messages=messages, stream=True, **kwargs
+            )
+            chunk: ChatCompletionChunk
+            async for chunk in stream:
+                if chunk.usage:
+                    self.record_usage(chunk)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                for tool_call in delta.tool_calls or []:
+                    call = tool_calls.setdefault(tool_call.index, ["", "", ""])
+                    call[0] = tool_call.id or call[0]
+                    if tool_call.function:
+                        call[1] += tool_call.function.name or ""
+                        call[2] += tool_call.function.arguments or ""
+                if delta.content:
+                    content += delta.content
+                    self.streamer.update(content)
+
+        return content, [
+            ChatCompletionMessageToolCall(
+                id=call_id, type="function", function=Function(name=name, arguments=arguments)
+            )
+            for call_id, name, arguments in (tool_calls[index] for index in sorted(tool_calls))
+        ]
+
+    def add_cache_hints(self, messages: List[Dict[str, Any]], kwargs: Dict[str, Any]):
+        """Point the endpoint at the stable system prompt of the cache-stable prompt layout"""
+        prefix = self.msg_list.prompt_prefix
+        if not prefix:
+            return
+        if is_using_openrouter_endpoint(self.openai_client):
+            if self.model.startswith(EXPLICIT_PROMPT_CACHING_MODEL_PREFIXES):
+                messages[0]["content"] = [
+                    {"type": "text", "text": prefix.content, "cache_control": {"type": "ephemeral"}}
+                ]
+        elif is_using_openai_endpoint(self.openai_client):
+            # routes requests with the same prefix to the same cache
+            cache_key = hashlib.sha256(prefix.content.encode()).hexdigest()[:32]
+            kwargs.setdefault("extra_body", {}).setdefault("prompt_cache_key", f"aiuser-{cache_key}")
+
+    def record_usage(self, response: Union[ChatCompletion, ChatCompletionChunk, Completion]):
+        usage = response.usage
+        if not usage:
+            return
+        self.usage_stats["requests"] += 1
+        self.usage_stats["prompt tokens"] += usage.prompt_tokens or 0
+        self.usage_stats["completion tokens"] += usage.completion_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.usage_stats["cached prompt tokens"] += getattr(details, "cached_tokens", None) or 0
+
     async def create_completion(self) -> Optional[str]:
         kwargs = await self.get_custom_parameters()
         await self.setup_tools()
 
         while not self.completion:
+            if self.tool_iterations >= MAX_TOOL_CALL_ITERATIONS or self.tool_time_left <= 0:
+                # make the model answer with what it has
+                self.available_tools_schemas = []
             if self.available_tools_schemas:
-                kwargs["tools"] = [asdict(schema) for schema in self.available_tools_schemas]
+                kwargs["tools"] = self.tool_registry.serialize(self.available_tools_schemas)
+            else:
+                kwargs.pop("tools", None)
 
-            self.completion, tool_calls = await self.call_client(kwargs)
+            self.completion, tool_calls = await self.call_client_with_image_fallback(kwargs)
 
             if tool_calls and not self.completion:
                 await self.handle_tool_calls(tool_calls)
@@ -99,32 +224,67 @@ class LLMPipeline:
         return self.completion
 
     async def handle_tool_calls(self, tool_calls: List[ChatCompletionMessageToolCall]):
+        """Run the tool calls of one response concurrently, results are added in the order of the calls"""
+        self.tool_iterations += 1
+        count = len(self.msg_list)
         await self.msg_list.add_assistant(index=len(self.msg_list) + 1, tool_calls=tool_calls)
-        for tool_call in tool_calls:
-            function = tool_call.function
-            arguments = json.loads(function.arguments)
-            result = await self.run_tool(function.name, arguments)
-            if result:
-                await self.msg_list.add_tool_result(
-                    result, tool_call.id, index=len(self.msg_list) + 1
-                )
+        # skipped when over the token limit, then its results must be skipped too
+        added = len(self.msg_list) > count
+
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(self.run_tool_call(tool_call, self.tool_time_left) for tool_call in tool_calls)
+        )
+        self.tool_time_left -= time.monotonic() - start
+
+        if not added:
+            return
+        # endpoints reject requests where a call of the assistant message has no result
+        for tool_call, result in zip(tool_calls, results):
+            await self.msg_list.add_tool_result(
+                result or "Done, no result", tool_call.id, index=len(self.msg_list) + 1, force=True
+            )
+
+    async def run_tool_call(
+        self, tool_call: ChatCompletionMessageToolCall, time_left: float
+    ) -> Optional[str]:
+        function = tool_call.function
+        try:
+            arguments = json.loads(function.arguments or "{}")
+        except json.JSONDecodeError:
+            return f'Error: invalid JSON arguments for "{function.name}"'
+        try:
+            return await self.run_tool(function.name, arguments, time_left)
+        except asyncio.TimeoutError:
+            logger.warning(f'Tool call "{function.name}" timed out in {self.ctx.guild.name}')
+            return f'Error: "{function.name}" timed out, answer without it'
+        except Exception:
+            logger.exception(f'Failed tool call "{function.name}" in {self.ctx.guild.name}')
+            return f'Error: "{function.name}" failed, answer without it'
 
-    async def run_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[str]:
+    async def run_tool(
+        self, tool_name: str, arguments: Dict[str, Any], time_left: Optional[float] = None
+    ) -> Optional[str]:
         for tool in self.enabled_tools:
             if tool.function_name == tool_name:
                 logger.info(
                     f'Handling tool call in {self.ctx.guild.name}: "{tool_name}" with arguments: "{arguments}"'
                 )
                 arguments["request"] = self
-                return await tool.run(arguments, self.available_tools_schemas)
+                timeout = tool.timeout if time_left is None else min(tool.timeout, time_left)
+                return await asyncio.wait_for(
+                    tool.run(arguments, self.available_tools_schemas), timeout
+                )
 
         self.available_tools_schemas = []
         logger.warning(f'Could not find tool "{tool_name}" in {self.ctx.guild.name}')
-        return None
+        return f'Error: "{tool_name}" is not an available tool, answer without it'
 
     async def run(self) -> Optional[str]:
         try:
             return await self.create_completion()
+        except LLMRequestDropped as e:
+            logger.debug(f"Dropped response in {self.ctx.guild.name}: {e}")
         except httpx.ReadTimeout:
             logger.error("Failed request to LLM endpoint. Timed out.")
             await self.ctx.react_quietly("💤", message="`aiuser` request timed out")
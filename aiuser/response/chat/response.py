@@ -1,15 +1,18 @@
 import asyncio
+import functools
 import logging
 import random
 import re
 from datetime import datetime, timezone
 
+import discord
 from discord import AllowedMentions
-from redbot.core import Config, commands
+from redbot.core import commands
 
-from aiuser.config.constants import REGEX_RUN_TIMEOUT
+from aiuser.config.constants import DISCORD_MESSAGE_LIMIT, REGEX_RUN_TIMEOUT
 from aiuser.messages_list.messages import MessagesList
 from aiuser.response.chat.llm_pipeline import LLMPipeline
+from aiuser.response.chat.streaming import ResponseStreamer
 from aiuser.types.abc import MixinMeta
 from aiuser.utils.utilities import to_thread
 
@@ -24,17 +27,22 @@ def compile_and_apply(pattern_str: str, text: str) -> str:
 
 
 async def remove_patterns_from_response(
-    ctx: commands.Context, config: Config, response: str
+    cog: MixinMeta, ctx: commands.Context, response: str
 ) -> str:
-    # Get patterns from config and replace "{botname}".
-    patterns = await config.guild(ctx.guild).removelist_regexes()
+    patterns = await get_remove_patterns(cog, ctx)
+    return await apply_remove_patterns(patterns, response)
+
+
+async def get_remove_patterns(cog: MixinMeta, ctx: commands.Context) -> list[str]:
+    # Get patterns from settings and replace "{botname}".
+    patterns = cog.settings_cache.guild(ctx.guild.id).removelist_regexes
     botname = ctx.message.guild.me.nick or ctx.bot.user.display_name
     patterns = [p.replace(r"{botname}", botname) for p in patterns]
 
     # Expand patterns that have "{authorname}" based on recent authors.
     authors = {
         msg.author.display_name
-        async for msg in ctx.channel.history(limit=10)
+        for msg in await cog.message_buffer.history(ctx.channel, limit=10)
         if msg.author != ctx.guild.me
     }
     expanded_patterns = []
@@ -44,10 +52,13 @@ async def remove_patterns_from_response(
                 expanded_patterns.append(pattern.replace(r"{authorname}", author))
         else:
             expanded_patterns.append(pattern)
+    return expanded_patterns
+
 
+async def apply_remove_patterns(patterns: list[str], response: str) -> str:
     # Apply each pattern sequentially.
     cleaned = response.strip(" \n")
-    for pattern in expanded_patterns:
+    for pattern in patterns:
         try:
             cleaned = await compile_and_apply(pattern, cleaned)
         except asyncio.TimeoutError:
@@ -57,50 +68,84 @@ async def remove_patterns_from_response(
     return cleaned
 
 
-async def should_reply(ctx: commands.Context) -> bool:
+async def should_reply(cog: MixinMeta, ctx: commands.Context) -> bool:
     if ctx.interaction:
         return False
 
-    try:
-        await ctx.fetch_message(ctx.message.id)
-    except Exception:
-        return False
+    buffer = cog.message_buffer
+    if buffer.covers(ctx.channel.id, ctx.message.id):
+        if not buffer.get(ctx.channel.id, ctx.message.id):
+            return False
+    else:
+        try:
+            await ctx.fetch_message(ctx.message.id)
+        except Exception:
+            return False
 
     if (
         datetime.now(timezone.utc) - ctx.message.created_at
     ).total_seconds() > 8 or random.random() < 0.25:
         return True
 
-    async for last_msg in ctx.message.channel.history(limit=1):
+    for last_msg in await buffer.history(ctx.message.channel, limit=1):
         if last_msg.author == ctx.message.guild.me:
             return True
     return False
 
 
-async def send_response(ctx: commands.Context, response: str, can_reply: bool) -> bool:
+async def send_response(
+    cog: MixinMeta, ctx: commands.Context, response: str, can_reply: bool
+) -> bool:
     allowed = AllowedMentions(everyone=False, roles=False, users=[ctx.message.author])
-    if len(response) >= 2000:
-        for i in range(0, len(response), 2000):
-            await ctx.send(response[i : i + 2000], allowed_mentions=allowed)
-    elif can_reply and await should_reply(ctx):
-        await ctx.message.reply(response, mention_author=False, allowed_mentions=allowed)
-    elif ctx.interaction:
-        await ctx.interaction.followup.send(response, allowed_mentions=allowed)
+    if len(response) >= DISCORD_MESSAGE_LIMIT:
+        for i in range(0, len(response), DISCORD_MESSAGE_LIMIT):
+            await ctx.send(response[i : i + DISCORD_MESSAGE_LIMIT], allowed_mentions=allowed)
     else:
-        await ctx.send(response, allowed_mentions=allowed)
+        await send_message(cog, ctx, response, can_reply)
     return True
 
 
+async def send_message(
+    cog: MixinMeta, ctx: commands.Context, content: str, can_reply: bool
+) -> discord.Message:
+    allowed = AllowedMentions(everyone=False, roles=False, users=[ctx.message.author])
+    if can_reply and await should_reply(cog, ctx):
+        return await ctx.message.reply(content, mention_author=False, allowed_mentions=allowed)
+    elif ctx.interaction:
+        return await ctx.interaction.followup.send(content, allowed_mentions=allowed, wait=True)
+    else:
+        return await ctx.send(content, allowed_mentions=allowed)
+
+
 async def create_chat_response(
     cog: MixinMeta, ctx: commands.Context, messages_list: MessagesList
 ) -> bool:
     pipeline = LLMPipeline(cog, ctx, messages=messages_list)
+    if cog.settings_cache.guild(ctx.guild.id).streaming_responses:
+        return await create_streamed_chat_response(cog, ctx, pipeline, messages_list.can_reply)
+
     response = await pipeline.run()
     if not response:
         return False
 
-    cleaned_response = await remove_patterns_from_response(ctx, cog.config, response)
+    cleaned_response = await remove_patterns_from_response(cog, ctx, response)
     if not cleaned_response:
         return False
 
-    return await send_response(ctx, cleaned_response, messages_list.can_reply)
+    return await send_response(cog, ctx, cleaned_response, messages_list.can_reply)
+
+
+async def create_streamed_chat_response(
+    cog: MixinMeta, ctx: commands.Context, pipeline: LLMPipeline, can_reply: bool
+) -> bool:
+    patterns = await get_remove_patterns(cog, ctx)
+    streamer = ResponseStreamer(
+        send=functools.partial(send_message, cog, ctx, can_reply=can_reply),
+        clean=functools.partial(apply_remove_patterns, patterns),
+    )
+    pipeline.streamer = streamer
+    response = await pipeline.run()
+    if not response:
+        await streamer.abort()
+        return False
+    return await streamer.finish(response)
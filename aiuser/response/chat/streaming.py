@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+from aiuser.config.constants import (
+    DISCORD_MESSAGE_LIMIT,
+    STREAM_EDIT_INTERVAL,
+    STREAM_FIRST_MESSAGE_MIN_CHARS,
+)
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+def hide_unfinished_thinking(text: str) -> str:
+    """Cut off a `<think>` block that hasn't been closed yet"""
+    start = text.rfind("<think>")
+    if start != -1 and "</think>" not in text[start:]:
+        return text[:start]
+    return text
+
+
+class ResponseStreamer:
+    """
+    Posts a response while it is being generated.
+
+    The first message is sent once there is enough cleaned text, then it is edited (or followed by more messages
+    past Discord's length limit) at most once per `STREAM_EDIT_INTERVAL` seconds, from a background task
+    so reading the completion stream is never held up by Discord.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[discord.Message]],
+        clean: Callable[[str], Awaitable[str]],
+    ):
+        self.send = send
+        self.clean = clean
+        self.raw = ""
+        self.sent: list[discord.Message] = []
+        self.contents: list[str] = []
+        self.changed = asyncio.Event()
+        # held while messages are being sent / edited
+        self.lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+    def update(self, raw: str):
+        """Set the text generated so far"""
+        self.raw = raw
+        self.changed.set()
+        if self.task is None:
+            self.task = asyncio.create_task(self._flush_loop())
+
+    async def finish(self, response: Optional[str]) -> bool:
+        """Show the final (fully cleaned) response, returns whether a response was sent"""
+        await self._stop()
+        content = await self.clean(response) if response else ""
+        if not content:
+            await self.abort()
+            return False
+        await self._show(content)
+        return True
+
+    async def abort(self):
+        """Remove anything posted so far"""
+        await self._stop()
+        async with self.lock:
+            for message in self.sent:
+                try:
+                    await message.delete()
+                except discord.HTTPException:
+                    logger.debug("Failed deleting streamed message", exc_info=True)
+            self.sent.clear()
+            self.contents.clear()
+
+    async def _stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Failed streaming response")
+        self.task = None
+        # wait for a send / edit that was in progress, so its message is tracked
+        async with self.lock:
+            pass
+
+    async def _flush_loop(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            content = await self.clean(hide_unfinished_thinking(self.raw))
+            if self.sent or len(content) >= STREAM_FIRST_MESSAGE_MIN_CHARS:
+                await asyncio.shield(self._show(content))
+            await asyncio.sleep(STREAM_EDIT_INTERVAL)
+
+    async def _show(self, content: str):
+        async with self.lock:
+            await self._apply(content)
+
+    async def _apply(self, content: str):
+        chunks = [
+            content[i : i + DISCORD_MESSAGE_LIMIT]
+            for i in range(0, len(content), DISCORD_MESSAGE_LIMIT)
+        ]
+        for i, chunk in enumerate(chunks):
+            if i >= len(self.sent):
+                self.sent.append(await self.send(chunk))
+                self.contents.append(chunk)
+            elif self.contents[i] != chunk:
+                await self.sent[i].edit(content=chunk)
+                self.contents[i] = chunk
+        # the text got shorter, eg. a removelist pattern matched once it was complete
+        for message in self.sent[len(chunks) :]:
+            await message.delete()
+        del self.sent[len(chunks) :]
+        del self.contents[len(chunks) :]
@@ -3,6 +3,7 @@ import logging
 
 from redbot.core import commands
 
+from aiuser.core.llm_scheduler import LLMPriority
 from aiuser.messages_list.messages import create_messages_list
 from aiuser.response.chat.response import create_chat_response
 from aiuser.response.image.generator_factory import get_image_generator
@@ -13,24 +14,34 @@ from aiuser.types.abc import MixinMeta
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
-async def dispatch_response(cog: MixinMeta, ctx: commands.Context, messages_list=None):
+async def dispatch_response(
+    cog: MixinMeta,
+    ctx: commands.Context,
+    messages_list=None,
+    priority: LLMPriority = LLMPriority.DIRECT,
+):
     """Decide which response to send based on the context"""
     async with ctx.message.channel.typing():
-        if (not messages_list and not ctx.interaction) and await is_image_request(cog, ctx.message):
-            if await process_image_response(cog, ctx):
+        if (not messages_list and not ctx.interaction) and await is_image_request(
+            cog, ctx.message, priority
+        ):
+            if await process_image_response(cog, ctx, priority):
                 return
 
         messages_list = messages_list or await create_messages_list(cog, ctx)
+        messages_list.priority = priority
         return await create_chat_response(cog, ctx, messages_list)
 
 
-async def process_image_response(cog: MixinMeta, ctx: commands.Context) -> bool:
+async def process_image_response(
+    cog: MixinMeta, ctx: commands.Context, priority: LLMPriority
+) -> bool:
     """Process and send an image response"""
     await ctx.react_quietly("🧐")
 
     try:
-        generator = await get_image_generator(ctx, cog.config)
-        success = await create_image_response(cog, ctx, generator)
+        generator = await get_image_generator(cog, ctx)
+        success = await create_image_response(cog, ctx, generator, priority)
         return success
     except Exception:
         return False
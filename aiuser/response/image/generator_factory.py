@@ -1,6 +1,6 @@
 import logging
 
-from redbot.core import commands, config
+from redbot.core import commands
 
 from aiuser.config.constants import IMAGE_REQUEST_AIHORDE_URL
 from aiuser.response.image.providers.aihorde import AIHordeGenerator
@@ -10,11 +10,14 @@ from aiuser.response.image.providers.modal import ModalImageGenerator
 from aiuser.response.image.providers.nemusona import NemusonaGenerator
 from aiuser.response.image.providers.runpod import RunPodGenerator
 from aiuser.response.image.providers.nineteen import NINETEEN_API_URL, NineteenGenerator
+from aiuser.types.abc import MixinMeta
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
-async def get_image_generator(ctx: commands.Context, config: config):
+async def get_image_generator(cog: MixinMeta, ctx: commands.Context):
+    config = cog.config
+    http_sessions = cog.http_sessions
     sd_endpoint: str = await config.guild(ctx.guild).image_requests_endpoint()
 
     if not sd_endpoint:
@@ -23,27 +26,28 @@ async def get_image_generator(ctx: commands.Context, config: config):
             "disabling Stable Diffusion requests for this server..."
         )
         await config.guild(ctx.guild).image_requests.set(False)
+        await cog.reload_settings(ctx.guild)
         return None
 
     if sd_endpoint.startswith("dall-e-"):
         api_key = (await ctx.bot.get_shared_api_tokens("openai")).get("api_key")
-        return DalleImageGenerator(ctx, config, sd_endpoint, api_key)
+        return DalleImageGenerator(ctx, config, http_sessions, sd_endpoint, api_key)
     elif sd_endpoint.startswith("https://waifus-api.nemusona.com/"):
-        return NemusonaGenerator(ctx, config)
+        return NemusonaGenerator(ctx, config, http_sessions)
     elif sd_endpoint.startswith("https://perchance.org/ai-text-to-image-generator"):
         from aiuser.response.image.providers.perchance import PerchanceGenerator
 
-        return PerchanceGenerator(ctx, config)
+        return PerchanceGenerator(ctx, config, http_sessions)
     elif sd_endpoint.endswith("imggen.modal.run/"):
         auth_token = (await ctx.bot.get_shared_api_tokens("modal-img-gen")).get("token")
-        return ModalImageGenerator(ctx, config, auth_token)
+        return ModalImageGenerator(ctx, config, http_sessions, auth_token)
     elif sd_endpoint.startswith(NINETEEN_API_URL):
-        return NineteenGenerator(ctx, config)
+        return NineteenGenerator(ctx, config, http_sessions)
     elif sd_endpoint.startswith("https://api.runpod.ai/v2/"):
         api_key = (await ctx.bot.get_shared_api_tokens("runpod")).get("apikey")
-        return RunPodGenerator(ctx, config, api_key)
+        return RunPodGenerator(ctx, config, http_sessions, api_key)
     elif sd_endpoint.startswith(IMAGE_REQUEST_AIHORDE_URL):
         api_key = (await ctx.bot.get_shared_api_tokens("aihorde")).get("apikey")
-        return AIHordeGenerator(ctx, config, api_key)
+        return AIHordeGenerator(ctx, config, http_sessions, api_key)
     else:
-        return GenericImageGenerator(ctx, config)
+        return GenericImageGenerator(ctx, config, http_sessions)
@@ -8,21 +8,28 @@ from tenacity import retry, stop_after_delay, wait_random
 
 from aiuser.config.constants import IMAGE_REQUEST_AIHORDE_URL
 from aiuser.response.image.providers.generator import ImageGenerator
+from aiuser.utils.http import HTTPSessionManager
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
 class AIHordeGenerator(ImageGenerator):
-    def __init__(self, ctx: commands.Context, config: Config, api_key: Optional[str]):
-        super().__init__(ctx, config)
+    def __init__(
+        self,
+        ctx: commands.Context,
+        config: Config,
+        http_sessions: HTTPSessionManager,
+        api_key: Optional[str],
+    ):
+        super().__init__(ctx, config, http_sessions)
         self.headers = {"apikey": api_key or "0000000000"}
 
     async def generate_image(self, caption):
         payload = await self._prepare_payload(caption)
-        async with aiohttp.ClientSession() as session:
-            res = await session.post(
-                f"{IMAGE_REQUEST_AIHORDE_URL}/v2/generate/async", headers=self.headers, json=payload
-            )
+        session = self.http_sessions.get()
+        async with session.post(
+            f"{IMAGE_REQUEST_AIHORDE_URL}/v2/generate/async", headers=self.headers, json=payload
+        ) as res:
             if res.status == 400:
                 res = await res.json()
                 raise ValueError(f"{res['message']}: `{str(res.get('errors'))}`")
@@ -30,12 +37,13 @@ class AIHordeGenerator(ImageGenerator):
             res.raise_for_status()
 
             res = await res.json()
-            logger.debug("AI Horde inital response: %s", res)
-            uuid = res["id"]
-            await self._wait_for_image(session, uuid)
-            res = await self._get_image(session, uuid)
-            image = BytesIO(await (await session.get(res["img"])).read())
-            return image
+        logger.debug("AI Horde inital response: %s", res)
+        uuid = res["id"]
+        await self._wait_for_image(session, uuid)
+        res = await self._get_image(session, uuid)
+        async with session.get(res["img"]) as response:
+            image = BytesIO(await response.read())
+        return image
 
     async def _wait_for_image(self, session: aiohttp.ClientSession, uuid: str):
         await self._check_image_done_with_retry(session, uuid)
@@ -47,17 +55,17 @@ class AIHordeGenerator(ImageGenerator):
         raise aiohttp.ClientError(f"Image {uuid} is not ready yet.")
 
     async def _check_image_done(self, session: aiohttp.ClientSession, uuid: str):
-        res = await session.get(
+        async with session.get(
             f"{IMAGE_REQUEST_AIHORDE_URL}/v2/generate/check/{uuid}", headers=self.headers
-        )
-        res.raise_for_status()
-        res = await res.json()
+        ) as res:
+            res.raise_for_status()
+            res = await res.json()
         return res["done"] is True
 
     async def _get_image(self, session: aiohttp.ClientSession, uuid: str):
-        res = await session.get(
+        async with session.get(
             f"{IMAGE_REQUEST_AIHORDE_URL}/v2/generate/status/{uuid}", headers=self.headers
-        )
-        res.raise_for_status()
-        res = await res.json()
+        ) as res:
+            res.raise_for_status()
+            res = await res.json()
         return res["generations"][0]
@@ -6,13 +6,21 @@ from openai import AsyncOpenAI
 from redbot.core import Config, commands
 
 from aiuser.response.image.providers.generator import ImageGenerator
+from aiuser.utils.http import HTTPSessionManager
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
 class DalleImageGenerator(ImageGenerator):
-    def __init__(self, ctx: commands.Context, config: Config, model: str, api_key: str):
-        super().__init__(ctx, config)
+    def __init__(
+        self,
+        ctx: commands.Context,
+        config: Config,
+        http_sessions: HTTPSessionManager,
+        model: str,
+        api_key: str,
+    ):
+        super().__init__(ctx, config, http_sessions)
         self.model = model
         self.client = AsyncOpenAI(api_key=api_key)
 
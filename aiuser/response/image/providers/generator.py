@@ -1,11 +1,14 @@
 import json
 from redbot.core import Config, commands
 
+from aiuser.utils.http import HTTPSessionManager
+
 
 class ImageGenerator:
-    def __init__(self, ctx: commands.Context, config: Config):
+    def __init__(self, ctx: commands.Context, config: Config, http_sessions: HTTPSessionManager):
         self.ctx = ctx
         self.config = config
+        self.http_sessions = http_sessions
 
     async def _prepare_payload(self, caption):
         parameters = await self.config.guild(self.ctx.guild).image_requests_parameters()
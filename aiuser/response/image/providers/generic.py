@@ -3,7 +3,6 @@ import io
 import json
 import logging
 
-import aiohttp
 from tenacity import retry, stop_after_attempt, wait_random
 
 from aiuser.response.image.providers.generator import ImageGenerator
@@ -22,12 +21,12 @@ class GenericImageGenerator(ImageGenerator):
         return image
 
     async def _post_request(self, url, payload):
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url=url, json=payload) as response:
-                response.raise_for_status()
-                r = await response.json()
-                if "data" in r and "b64_json" in r["data"][0]:
-                    image_data = base64.b64decode(r["data"][0]["b64_json"])
-                else:
-                    image_data = base64.b64decode(r["images"][0])
+        session = self.http_sessions.get()
+        async with session.post(url=url, json=payload) as response:
+            response.raise_for_status()
+            r = await response.json()
+            if "data" in r and "b64_json" in r["data"][0]:
+                image_data = base64.b64decode(r["data"][0]["b64_json"])
+            else:
+                image_data = base64.b64decode(r["images"][0])
         return io.BytesIO(image_data)
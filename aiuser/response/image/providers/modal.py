@@ -2,11 +2,11 @@ import io
 import json
 import logging
 
-import aiohttp
 from redbot.core import Config, commands
 from tenacity import retry, stop_after_attempt, wait_random
 
 from aiuser.response.image.providers.generator import ImageGenerator
+from aiuser.utils.http import HTTPSessionManager
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -16,9 +16,11 @@ class ModalImageGenerator(ImageGenerator):
     This is specific to the serverless-img-gen Modal app
     """
 
-    def __init__(self, ctx: commands.Context, config: Config, token: str):
+    def __init__(
+        self, ctx: commands.Context, config: Config, http_sessions: HTTPSessionManager, token: str
+    ):
         self.token = token or "a-good-auth-token"
-        super().__init__(ctx, config)
+        super().__init__(ctx, config, http_sessions)
 
     @retry(wait=wait_random(min=2, max=5), stop=stop_after_attempt(2), reraise=True)
     async def generate_image(self, caption):
@@ -33,8 +35,8 @@ class ModalImageGenerator(ImageGenerator):
 
     async def _post_request(self, url, payload):
         headers = {"Authorization": "Bearer " + self.token}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url=url, headers=headers, json=payload) as response:
-                image_data = await response.read()
+        session = self.http_sessions.get()
+        async with session.post(url=url, headers=headers, json=payload) as response:
+            image_data = await response.read()
 
         return io.BytesIO(image_data)
@@ -25,18 +25,18 @@ class NemusonaGenerator(ImageGenerator):
         logger.debug(
             f"Sending SD request to Nemusona with payload: {json.dumps(payload, indent=4)}"
         )
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url=f"{url}", json=payload) as response:
-                response.raise_for_status()
-                self.id = await response.text()
-
-            await self.poll_status(session)
-
-            async with session.get(
-                f"https://waifus-api.nemusona.com/job/result/{self.model}/{self.id}"
-            ) as response:
-                response.raise_for_status()
-                r = await response.json()
+        session = self.http_sessions.get()
+        async with session.post(url=f"{url}", json=payload) as response:
+            response.raise_for_status()
+            self.id = await response.text()
+
+        await self.poll_status(session)
+
+        async with session.get(
+            f"https://waifus-api.nemusona.com/job/result/{self.model}/{self.id}"
+        ) as response:
+            response.raise_for_status()
+            r = await response.json()
 
         image = io.BytesIO(base64.b64decode(r["base64"]))
         return image
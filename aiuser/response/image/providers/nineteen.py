@@ -2,8 +2,6 @@ import base64
 import io
 import logging
 
-import aiohttp
-
 from aiuser.response.image.providers.generator import ImageGenerator
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
@@ -13,9 +11,8 @@ NINETEEN = "sn19"
 
 class NineteenGenerator(ImageGenerator):
 
-    def __init__(self, ctx, config):
-        self.ctx = ctx
-        self.config = config
+    def __init__(self, ctx, config, http_sessions):
+        super().__init__(ctx, config, http_sessions)
         self.bot = ctx.bot
 
     async def _get_api_key(self, provider: str):
@@ -37,12 +34,12 @@ class NineteenGenerator(ImageGenerator):
 
         payload = await self._prepare_payload(caption)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(NINETEEN_API_URL, headers=headers, json=payload) as response:
-                if response.status == 200:
-                    res = await response.json()
-                    image = io.BytesIO(base64.b64decode(res["image_b64"]))
-                    return image
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"sn19.ai API error: {response.status} - {error_text}")
+        session = self.http_sessions.get()
+        async with session.post(NINETEEN_API_URL, headers=headers, json=payload) as response:
+            if response.status == 200:
+                res = await response.json()
+                image = io.BytesIO(base64.b64decode(res["image_b64"]))
+                return image
+            else:
+                error_text = await response.text()
+                raise Exception(f"sn19.ai API error: {response.status} - {error_text}")
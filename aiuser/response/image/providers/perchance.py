@@ -32,7 +32,7 @@ class PerchanceGenerator(ImageGenerator):
         )
 
         await visit_and_close_url(
-            "https://perchance.org/ai-text-to-image-generator"
+            self.http_sessions.get(), "https://perchance.org/ai-text-to-image-generator"
         )  # Otherwise it's more prone to ratelimit you
 
         payload = await self._prepare_payload(caption)
@@ -86,10 +86,9 @@ class PerchanceGenerator(ImageGenerator):
                     )
 
 
-async def visit_and_close_url(url: str):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            await response.text()  # Wait for the page to load
+async def visit_and_close_url(session: aiohttp.ClientSession, url: str):
+    async with session.get(url) as response:
+        await response.text()  # Wait for the page to load
 
     @retry(
         wait=wait_random(min=3, max=5),
@@ -3,11 +3,11 @@ import io
 import json
 import logging
 
-import aiohttp
 from redbot.core import Config, commands
 from tenacity import retry, stop_after_attempt, stop_after_delay, wait_random
 
 from aiuser.response.image.providers.generator import ImageGenerator
+from aiuser.utils.http import HTTPSessionManager
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -15,9 +15,11 @@ logger = logging.getLogger("red.bz_cogs.aiuser")
 class RunPodGenerator(ImageGenerator):
     STATUS_COMPLETED = "COMPLETED"
 
-    def __init__(self, ctx: commands.Context, config: Config, apikey: str):
+    def __init__(
+        self, ctx: commands.Context, config: Config, http_sessions: HTTPSessionManager, apikey: str
+    ):
         self.apikey = apikey
-        super().__init__(ctx, config)
+        super().__init__(ctx, config, http_sessions)
 
     async def _prepare_payload(self, caption):
         parameters = await self.config.guild(self.ctx.guild).image_requests_parameters()
@@ -55,14 +57,14 @@ class RunPodGenerator(ImageGenerator):
 
     async def _post_request(self, url, headers, payload):
         headers = {"Authorization": "Bearer " + self.apikey}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url=url, headers=headers, json=payload) as response:
-                response.raise_for_status()
+        session = self.http_sessions.get()
+        async with session.post(url=url, headers=headers, json=payload) as response:
+            response.raise_for_status()
 
-                response = await response.json()
-                if response["status"] != self.STATUS_COMPLETED:
-                    raise Exception(f"Invalid response from Runpod: {response['status']}")
+            response = await response.json()
+            if response["status"] != self.STATUS_COMPLETED:
+                raise Exception(f"Invalid response from Runpod: {response['status']}")
 
-                image_data = base64.b64decode(response["output"]["images"][0])
+            image_data = base64.b64decode(response["output"]["images"][0])
 
         return io.BytesIO(image_data)
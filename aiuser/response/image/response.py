@@ -3,9 +3,9 @@ import re
 from typing import Optional
 
 import discord
-from openai import AsyncOpenAI
 from redbot.core import commands, Config
 
+from aiuser.core.llm_scheduler import LLMPriority, LLMRequestDropped
 from aiuser.response.chat.response import create_chat_response
 from aiuser.types.abc import MixinMeta
 from aiuser.config.constants import IMAGE_REQUEST_REPLY_PROMPT
@@ -17,13 +17,13 @@ logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
 async def create_image_response(
-    cog: MixinMeta, ctx: commands.Context, image_generator: ImageGenerator
+    cog: MixinMeta, ctx: commands.Context, image_generator: ImageGenerator, priority: LLMPriority
 ) -> bool:
     """Main function to handle image generation and response"""
     image, caption = None, None
 
     try:
-        caption = await create_image_caption(cog.config, ctx.message, cog.openai_client)
+        caption = await create_image_caption(cog, ctx.message, priority)
         if caption is None:
             return False
 
@@ -31,6 +31,8 @@ async def create_image_response(
         if image is None:
             return False
 
+    except LLMRequestDropped:
+        return False
     except Exception:
         logger.exception("Error while attempting to generate image")
         return False
@@ -38,6 +40,7 @@ async def create_image_response(
     saved_caption = await format_saved_caption(cog.config, ctx.message.guild, caption)
 
     message_list = await create_messages_list(cog, ctx)
+    message_list.priority = priority
     await message_list.add_system(saved_caption, index=len(message_list) + 1)
     await message_list.add_system(IMAGE_REQUEST_REPLY_PROMPT, index=len(message_list) + 1)
 
@@ -49,14 +52,15 @@ async def create_image_response(
         file=discord.File(image, filename=f"{ctx.message.id}.png")
     )
 
-    cog.cached_messages[image_msg.id] = saved_caption
+    cog.cached_messages.set(image_msg.id, saved_caption, tags=[ctx.author.id])
     return True
 
 
 async def create_image_caption(
-    config: Config, message: discord.Message, openai_client: AsyncOpenAI
+    cog: MixinMeta, message: discord.Message, priority: LLMPriority
 ) -> Optional[str]:
     """Create a caption for the image based on the message content"""
+    config = cog.config
     subject = await config.guild(message.guild).image_requests_subject()
     botname = message.guild.me.nick or message.guild.me.display_name
     request = message.content
@@ -76,16 +80,15 @@ async def create_image_caption(
     request = re.sub(pattern, subject, request, flags=re.IGNORECASE)
 
     # Generate caption using OpenAI
-    response = await openai_client.chat.completions.create(
-        model=await config.guild(message.guild).model(),
-        messages=[
-            {
-                "role": "system",
-                "content": await config.guild(message.guild).image_requests_sd_gen_prompt(),
-            },
-            {"role": "user", "content": request},
-        ],
-    )
+    system_prompt = await config.guild(message.guild).image_requests_sd_gen_prompt()
+    async with cog.llm_scheduler.slot(message.guild.id, priority):
+        response = await cog.openai_client.chat.completions.create(
+            model=await config.guild(message.guild).model(),
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": request},
+            ],
+        )
     prompt = response.choices[0].message.content.lower()
 
     return None if "sorry" in prompt else prompt
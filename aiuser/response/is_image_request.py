@@ -3,40 +3,41 @@
 import logging
 
 import discord
-from redbot.core import Config
 
+from aiuser.core.settings_cache import GuildSettings
 from aiuser.config.constants import IMAGE_REQUEST_CHECK_PROMPT
+from aiuser.core.llm_scheduler import LLMPriority, LLMRequestDropped
 from aiuser.types.abc import MixinMeta
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
 
-async def is_image_request(cog: MixinMeta, message: discord.Message) -> bool:
+async def is_image_request(
+    cog: MixinMeta, message: discord.Message, priority: LLMPriority
+) -> bool:
     """Determine if a message is requesting an image"""
-    if not await cog.config.guild(message.guild).image_requests():
+    settings = cog.settings_cache.guild(message.guild.id)
+    if not settings.image_requests:
         return False
 
-    guild_config = cog.config.guild(message.guild)
-
-    if not await _check_basic_conditions(message, guild_config):
+    if not _check_basic_conditions(message, settings):
         return False
 
-    if await guild_config.image_requests_reduced_llm_calls():
+    if settings.image_requests_reduced_llm_calls:
         return True
 
-    return await _verify_with_llm(cog, message)
+    return await _verify_with_llm(cog, message, priority)
 
 
-async def _check_basic_conditions(message: discord.Message, guild_config: Config) -> bool:
+def _check_basic_conditions(message: discord.Message, settings: GuildSettings) -> bool:
     """Check basic conditions for image request"""
     message_content = message.content.lower()
     displayname = (message.guild.me.nick or message.guild.me.display_name).lower()
 
-    trigger_words = await guild_config.image_requests_trigger_words()
-    second_person_words = await guild_config.image_requests_second_person_trigger_words()
-
-    has_image_words = any(word in message_content for word in trigger_words)
-    has_second_person = any(word in message_content for word in second_person_words)
+    has_image_words = settings.matcher("image_requests_trigger_words").search(message_content)
+    has_second_person = settings.matcher("image_requests_second_person_trigger_words").search(
+        message_content
+    )
     is_mentioned = displayname in message_content or message.guild.me.id in message.raw_mentions
     is_reply = bool(
         message.reference
@@ -44,25 +45,30 @@ async def _check_basic_conditions(message: discord.Message, guild_config: Config
         and message.reference.resolved.author.id == message.guild.me.id
     )
 
-    return has_image_words and has_second_person and (is_mentioned or is_reply)
+    return bool(has_image_words and has_second_person and (is_mentioned or is_reply))
 
 
-async def _verify_with_llm(cog: MixinMeta, message: discord.Message) -> bool:
+async def _verify_with_llm(
+    cog: MixinMeta, message: discord.Message, priority: LLMPriority
+) -> bool:
     """Verify image request using LLM"""
     try:
         text = _prepare_message_text(message)
         botname = message.guild.me.nick or message.guild.me.display_name
 
-        response = await cog.openai_client.chat.completions.create(
-            model=await cog.config.guild(message.guild).model(),
-            messages=[
-                {"role": "system", "content": IMAGE_REQUEST_CHECK_PROMPT.format(botname=botname)},
-                {"role": "user", "content": text},
-            ],
-            max_tokens=1,
-        )
+        async with cog.llm_scheduler.slot(message.guild.id, priority):
+            response = await cog.openai_client.chat.completions.create(
+                model=cog.settings_cache.guild(message.guild.id).model,
+                messages=[
+                    {"role": "system", "content": IMAGE_REQUEST_CHECK_PROMPT.format(botname=botname)},
+                    {"role": "user", "content": text},
+                ],
+                max_tokens=1,
+            )
         return response.choices[0].message.content == "True"
 
+    except LLMRequestDropped:
+        return False
     except Exception:
         logger.exception("Error while checking message for an image request")
         return False
@@ -23,10 +23,7 @@ from aiuser.settings.utilities import (
 from aiuser.types.abc import MixinMeta
 from aiuser.types.enums import MentionType
 from aiuser.types.types import COMPATIBLE_CHANNELS, COMPATIBLE_MENTIONS
-from aiuser.utils.utilities import (
-    get_enabled_tools,
-    is_using_openrouter_endpoint,
-)
+from aiuser.utils.utilities import is_using_openrouter_endpoint
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -136,7 +133,7 @@ class Settings(
         main_embed.add_field(
             name="Enabled Functions",
             inline=True,
-            value=f"`{len(await get_enabled_tools(self.config, ctx))}`",
+            value=f"`{len(self.tool_registry.enabled(ctx.guild.id))}`",
         )
 
         main_embed.add_field(
@@ -370,15 +367,8 @@ class Settings(
 
         This will allow the bot to reply to your messages or use your messages.
         """
-        optin = await self.config.optin()
-        if ctx.author.id in await self.config.optin():
+        if not await self.opt_store.opt_in(ctx.author.id):
             return await ctx.send("You are already opted in.")
-        optout = await self.config.optout()
-        if ctx.author.id in optout:
-            optout.remove(ctx.author.id)
-            await self.config.optout.set(optout)
-        optin.append(ctx.author.id)
-        await self.config.optin.set(optin)
         await ctx.send("You are now opted in bot-wide")
 
     @aiuser.command()
@@ -387,15 +377,8 @@ class Settings(
 
         This will prevent the bot from replying to your messages or using your messages.
         """
-        optout = await self.config.optout()
-        if ctx.author.id in optout:
+        if not await self.opt_store.opt_out(ctx.author.id):
             return await ctx.send("You are already opted out.")
-        optin = await self.config.optin()
-        if ctx.author.id in optin:
-            optin.remove(ctx.author.id)
-            await self.config.optin.set(optin)
-        optout.append(ctx.author.id)
-        await self.config.optout.set(optout)
         await ctx.send("You are now opted out bot-wide")
 
     @aiuser.command(name="optinbydefault", alias=["optindefault"])
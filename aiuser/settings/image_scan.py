@@ -1,4 +1,3 @@
-import importlib
 import logging
 
 import discord
@@ -6,6 +5,8 @@ from redbot.core import checks, commands
 
 from aiuser.config.constants import OPENROUTER_URL
 from aiuser.config.models import VISION_SUPPORTED_MODELS
+from aiuser.messages_list.converter.image.local_worker import dependencies_installed
+from aiuser.messages_list.converter.image.preprocess import IMAGE_OUTPUT_FORMATS
 from aiuser.types.abc import MixinMeta, aiuser
 from aiuser.types.enums import ScanImageMode
 
@@ -47,6 +48,42 @@ class ImageScanSettings(MixinMeta):
         )
         return await ctx.send(embed=embed)
 
+    @imagescan.command(name="format")
+    async def image_format(self, ctx: commands.Context, image_format: str):
+        """Set the format images are re-encoded in before being sent for scanning
+
+        WebP is smaller than JPEG at the same quality, but slower to encode.
+
+        **Arguments**
+        - `image_format` One of the following: `jpeg`, `webp`
+        """
+        image_format = image_format.lower()
+        if image_format not in IMAGE_OUTPUT_FORMATS:
+            return await ctx.send(
+                f":warning: Invalid format, use one of: {', '.join(IMAGE_OUTPUT_FORMATS)}"
+            )
+        await self.config.guild(ctx.guild).scan_images_format.set(image_format)
+        embed = discord.Embed(
+            title="Format of scanned images now set to:",
+            description=f"`{image_format}`",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
+    @imagescan.command(name="quality")
+    async def image_quality(self, ctx: commands.Context, quality: commands.Range[int, 1, 100]):
+        """Set the encoding quality (1-100) of scanned images
+
+        Lower values make smaller requests, at the cost of detail.
+        """
+        await self.config.guild(ctx.guild).scan_images_quality.set(quality)
+        embed = discord.Embed(
+            title="Quality of scanned images now set to:",
+            description=f"`{quality}`",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
     @imagescan.command(name="mode")
     async def image_mode(self, ctx: commands.Context, mode: str):  # Modify the parameter type
         """Set method for scanning images
@@ -69,9 +106,8 @@ class ImageScanSettings(MixinMeta):
         mode = ScanImageMode(mode)
         if mode == ScanImageMode.LOCAL:
             try:
-                importlib.import_module("pytesseract")
-                importlib.import_module("torch")
-                importlib.import_module("transformers")
+                if not dependencies_installed():
+                    raise ImportError("Local image scanning dependencies are not installed")
                 await self.config.guild(ctx.guild).scan_images_mode.set(ScanImageMode.LOCAL.value)
                 embed = discord.Embed(
                     title="Scanning Images for this server now set to",
@@ -11,10 +11,11 @@ from redbot.core.utils.menus import start_adding_reactions
 from redbot.core.utils.predicates import ReactionPredicate
 
 from aiuser.config.defaults import DEFAULT_LLM_MODEL
-from aiuser.core.openai_utils import setup_openai_client
+from aiuser.core.llm_scheduler import LLMPriority
 from aiuser.settings.utilities import get_tokens, truncate_prompt
 from aiuser.types.abc import MixinMeta
 from aiuser.types.enums import ScanImageMode
+from aiuser.utils.tokens import token_counter
 from aiuser.utils.utilities import (
     is_using_openai_endpoint,
     is_using_openrouter_endpoint,
@@ -94,16 +95,18 @@ class OwnerSettings(MixinMeta):
             await self.config.endpoint_model_history.set(history)
 
         await self.config.custom_openai_endpoint.set(url)
+        self.ratelimits.reset()
 
         await ctx.message.add_reaction("🔄")
 
-        self.openai_client = await setup_openai_client(self.bot, self.config)
+        await self.reload_openai_client()
 
         # test the endpoint works if not rollback
         try:
             models = await self.openai_client.models.list()
         except Exception:
             await self.config.custom_openai_endpoint.set(previous_url)
+            self.ratelimits.reset()
             return await ctx.send(
                 ":warning: Invalid endpoint. Please check logs for more information."
             )
@@ -185,7 +188,7 @@ class OwnerSettings(MixinMeta):
             return await ctx.send(":warning: Please enter a positive integer.")
 
         await self.config.openai_endpoint_request_timeout.set(seconds)
-        await self.initialize_openai_client()
+        await self.reload_openai_client()
 
         embed = discord.Embed(
             title="The request timeout is now:",
@@ -194,6 +197,61 @@ class OwnerSettings(MixinMeta):
         )
         return await ctx.send(embed=embed)
 
+    @aiuserowner.command(name="warmup")
+    async def warmup(self, ctx: commands.Context):
+        """Toggles opening a connection to the OpenAI endpoint when the client is set up
+
+        Saves the connection setup time on the first request after the cog loads.
+        """
+        value = not await self.config.openai_endpoint_warmup()
+        await self.config.openai_endpoint_warmup.set(value)
+        embed = discord.Embed(
+            title="Warming up the endpoint connection is now:",
+            description=f"{value}",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
+    @aiuserowner.command(name="remoteimages")
+    async def remote_images(self, ctx: commands.Context):
+        """Toggles sending Discord image URLs to the current endpoint instead of the downloaded images
+
+        Requests are much smaller, but the endpoint has to download the images itself.
+        If it rejects them, images are sent inline again until the cog is reloaded.
+        (Only used in the `supported-llm` image scanning mode)
+        """
+        endpoint = await self.config.custom_openai_endpoint() or "default"
+        endpoints = await self.config.remote_image_url_endpoints()
+        value = endpoint not in endpoints
+        if value:
+            endpoints.append(endpoint)
+        else:
+            endpoints.remove(endpoint)
+        await self.config.remote_image_url_endpoints.set(endpoints)
+        self.image_preprocessor.rejected_endpoints.discard(endpoint)
+        embed = discord.Embed(
+            title="Sending image URLs to this endpoint is now:",
+            description=f"{value}",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
+    @aiuserowner.command(name="localwarmup")
+    async def local_warmup(self, ctx: commands.Context):
+        """Toggles loading the local image captioning model when the cog loads
+
+        Otherwise it is loaded by the first image scanned in `local` mode.
+        (Requires the local image scanning dependencies, see the cog README)
+        """
+        value = not await self.config.local_vision_warmup()
+        await self.config.local_vision_warmup.set(value)
+        embed = discord.Embed(
+            title="Loading the local captioning model on cog load is now:",
+            description=f"{value}",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
     @aiuserowner.command(name="exportconfig")
     async def export_config(self, ctx: commands.Context):
         """Exports the current config to a json file
@@ -262,6 +320,164 @@ class OwnerSettings(MixinMeta):
             )
         )
 
+    @aiuserowner.command(name="stats")
+    async def stats(self, ctx: commands.Context):
+        """Shows runtime statistics of the message handling pipeline"""
+        embed = discord.Embed(title="aiuser statistics", color=await ctx.embed_color())
+
+        prefilter = self.prefilter_stats
+        rejected = "\n".join(
+            f"{stage}: `{count}`" for stage, count in prefilter.most_common() if stage != "passed"
+        )
+        embed.add_field(
+            name="Messages rejected before building context",
+            value=rejected or "`None`",
+            inline=False,
+        )
+        embed.add_field(name="Messages passed to checks", value=f"`{prefilter['passed']}`")
+
+        buffer = self.message_buffer
+        embed.add_field(
+            name="Message history buffer",
+            value=f"`{len(buffer.channels)}` channels\n"
+            f"`{buffer.stats['buffer hits']}` reads served locally\n"
+            f"`{buffer.stats['api fetches']}` reads needing the API",
+        )
+
+        conversations = self.conversations
+        embed.add_field(
+            name="Conversation context",
+            value=f"`{sum(len(channel) for channel in conversations.channels.values())}` converted messages kept\n"
+            f"`{conversations.stats['reused']}` reused\n"
+            f"`{conversations.stats['converted']}` converted",
+        )
+        embed.add_field(
+            name="Token counts",
+            value=f"`{token_counter.counts.stats['hits']}` cached\n"
+            f"`{token_counter.counts.stats['misses']}` encoded",
+        )
+        cached = self.cached_messages
+        embed.add_field(
+            name="Image captions cache",
+            value=f"`{len(cached)}` entries (~`{cached.bytes // 1024}` KiB)\n"
+            f"`{cached.stats['hits']}` hits, `{cached.stats['misses']}` misses\n"
+            f"`{cached.stats['evictions']}` evicted, `{cached.stats['expirations']}` expired",
+        )
+        stickers = self.sticker_cache.stickers
+        embed.add_field(
+            name="Sticker cache",
+            value=f"`{len(stickers)}` stickers\n"
+            f"`{stickers.stats['hits']}` hits, `{stickers.stats['misses']}` misses",
+        )
+        youtube = self.youtube
+        embed.add_field(
+            name="YouTube metadata",
+            value=f"`{len(youtube.cache)}` videos cached, `{youtube.cache.stats['hits']}` hits\n"
+            f"`{youtube.stats['videos fetched']}` videos in `{youtube.stats['requests']}` API requests\n"
+            f"`{youtube.stats['failed requests']}` failed requests",
+        )
+
+        images = self.image_preprocessor.stats
+        embed.add_field(
+            name="Image scanning",
+            value=f"`{images['images']}` images prepared, `{images['remote urls']}` sent as URLs\n"
+            f"`{images['bytes downloaded'] // 1024}` KiB downloaded, `{images['bytes encoded'] // 1024}` KiB encoded",
+        )
+
+        local_vision = self.local_vision
+        if local_vision.started:
+            embed.add_field(
+                name="Local image scanning",
+                value=f"`{local_vision.queue_depth()}` captions queued\n"
+                f"`{local_vision.stats['captions']}` captions in `{local_vision.stats['batches']}` batches\n"
+                + "\n".join(
+                    f"{stage}: `{local_vision.average_time(stage):.2f}s` average"
+                    for stage in ("model load", "ocr", "caption (model)", "caption (total)")
+                    if local_vision.timing_counts[stage]
+                ),
+            )
+
+        http = self.http_sessions.stats
+        embed.add_field(
+            name="HTTP connections",
+            value=f"`{http['requests']}` requests\n"
+            f"`{http['connections opened']}` connections opened, `{http['connections reused']}` reused\n"
+            f"`{http['dns cache hits']}` DNS cache hits, `{http['dns cache misses']}` misses",
+        )
+
+        usage = self.usage_stats
+        embed.add_field(
+            name="LLM token usage",
+            value=f"`{usage['requests']}` requests\n"
+            f"`{usage['prompt tokens']}` prompt tokens, `{usage['cached prompt tokens']}` cached"
+            + (
+                f" (`{usage['cached prompt tokens'] / usage['prompt tokens']:.0%}`)"
+                if usage["prompt tokens"]
+                else ""
+            )
+            + f"\n`{usage['completion tokens']}` completion tokens",
+        )
+
+        coordinator = self.response_coordinator
+        embed.add_field(
+            name="Channel responses",
+            value=f"`{coordinator.stats['responses']}` started\n"
+            f"`{coordinator.stats['merged']}` triggers merged in the debounce window\n"
+            f"`{coordinator.stats['queued (in flight)']}` triggers answered after the running response",
+        )
+
+        scheduler = self.llm_scheduler
+        queued = scheduler.queued()
+        embed.add_field(
+            name="LLM requests",
+            value=f"`{scheduler.running}` running, `{len(scheduler.queue)}` queued\n"
+            + "\n".join(
+                f"{priority.name.lower()}: `{queued[priority]}` queued, "
+                f"`{scheduler.average_wait(priority):.2f}s` average wait, "
+                f"`{scheduler.stats[f'dropped ({priority.name.lower()})']}` dropped, "
+                f"`{scheduler.stats[f'shed ({priority.name.lower()})']}` shed"
+                for priority in LLMPriority
+            ),
+            inline=False,
+        )
+
+        ratelimits = self.ratelimits
+        budget = ratelimits.budget()
+        limits = "\n".join(
+            f"{kind}: `{bucket.remaining:g}`"
+            + (f" / `{bucket.limit:g}`" if bucket.limit else "")
+            + (f", resets <t:{int(bucket.reset_at.timestamp())}:R>" if bucket.reset_at else "")
+            for kind, bucket in ratelimits.buckets.items()
+        )
+        if ratelimits.is_limited():
+            limits += f"\nRatelimited until <t:{int(ratelimits.blocked_until.timestamp())}:T>"
+        embed.add_field(
+            name="Endpoint rate limits"
+            + (f" ({budget:.0%} budget left)" if budget is not None else ""),
+            value=limits or "`No rate limit headers seen`",
+            inline=False,
+        )
+
+        return await ctx.send(embed=embed)
+
+    @aiuserowner.command(name="concurrency")
+    async def concurrency(self, ctx: commands.Context, total: int, per_server: int):
+        """Sets how many LLM requests can be running at once, in total and per server
+
+        Requests over the limit are queued, mentions and slash commands are served first.
+        Queued responses to random reply percentage rolls or random messages are dropped if they wait too long.
+        """
+        if total < 1 or per_server < 1:
+            return await ctx.send("Please enter positive integers.")
+        await self.config.max_concurrent_llm_requests.set(total)
+        await self.config.max_concurrent_llm_requests_per_guild.set(per_server)
+        embed = discord.Embed(
+            title="The maximum concurrent LLM requests are now:",
+            description=f"`{total}` in total\n`{per_server}` per server",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
     @aiuserowner.command(name="prompt")
     async def global_prompt(self, ctx: commands.Context, *, prompt: Optional[str]):
         """Set the global default prompt for aiuser.
@@ -339,3 +339,20 @@ class PromptSettings(MixinMeta):
         )
         embed.add_field(name="Tokens", value=await get_tokens(self.config, ctx, prompt))
         return await ctx.send(embed=embed)
+
+    @prompt.command(name="cachestable", aliases=["cache"])
+    async def prompt_cache_stable(self, ctx: commands.Context):
+        """Toggles a prompt layout that lets endpoints reuse cached prompts (cheaper and faster on OpenAI, OpenRouter, etc.)
+
+        The prompt is sent first and unchanged between requests.
+        Variables that change every request (eg. `{currenttime}`, `{authorname}`) are sent as placeholders,
+        with their values given in a system message after the latest message.
+        """
+        value = not await self.config.guild(ctx.guild).cache_stable_prompt()
+        await self.config.guild(ctx.guild).cache_stable_prompt.set(value)
+        embed = discord.Embed(
+            title="Cache-stable prompt layout is now:",
+            description=f"{value}",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
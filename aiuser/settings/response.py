@@ -12,6 +12,7 @@ from redbot.core.utils.predicates import ReactionPredicate
 
 from aiuser.config.defaults import DEFAULT_REMOVE_PATTERNS
 from aiuser.types.abc import MixinMeta, aiuser
+from aiuser.utils.tokens import get_encoding
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -144,6 +145,22 @@ class ResponseSettings(MixinMeta):
 
         await ctx.send(embed=embed)
 
+    @response.command(name="streaming", aliases=["stream"])
+    async def toggle_streaming(self, ctx: commands.Context):
+        """Toggles sending responses while they are being generated
+
+        The response is posted as soon as it starts and edited as more text arrives.
+        Long responses will be split over multiple messages.
+        """
+        value = not await self.config.guild(ctx.guild).streaming_responses()
+        await self.config.guild(ctx.guild).streaming_responses.set(value)
+        embed = discord.Embed(
+            title="Streaming responses is now:",
+            description=f"{value}",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
     @response.group(name="weights", aliases=["logit_bias", "bias"])
     @checks.admin_or_permissions(manage_guild=True)
     async def weights(self, _):
@@ -167,9 +184,7 @@ class ResponseSettings(MixinMeta):
             return await ctx.send(":warning: No weights set.")
         embed = discord.Embed(title="Weights Used", color=await ctx.embed_color())
         try:
-            encoding = tiktoken.encoding_for_model(
-                await self.config.guild(ctx.guild).model()
-            )
+            encoding = get_encoding(await self.config.guild(ctx.guild).model(), fallback=False)
         except KeyError:
             return await ctx.send(":warning: Unsupported model for tokenization")
         weights = {
@@ -203,7 +218,7 @@ class ResponseSettings(MixinMeta):
 
         model = await self.config.guild(ctx.guild).model()
         try:
-            encoding = tiktoken.encoding_for_model(model)
+            encoding = get_encoding(model, fallback=False)
         except KeyError:
             return await ctx.send(
                 ":warning: Unsupported model, please use custom parameters instead."
@@ -251,9 +266,7 @@ class ResponseSettings(MixinMeta):
             - `word` The word to remove
         """
         try:
-            encoding = tiktoken.encoding_for_model(
-                await self.config.guild(ctx.guild).model()
-            )
+            encoding = get_encoding(await self.config.guild(ctx.guild).model(), fallback=False)
         except KeyError:
             return await ctx.send(":warning: Unsupported model for tokenization")
         weights = await self.config.guild(ctx.guild).weights()
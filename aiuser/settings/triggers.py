@@ -81,6 +81,24 @@ class TriggerSettings(MixinMeta):
         )
         return await ctx.send(embed=embed)
 
+    @trigger.command(name="debounce")
+    async def response_debounce(self, ctx: commands.Context, seconds: float):
+        """Set how many seconds to wait for more messages before responding in a channel
+
+        Messages that trigger a response within this window are answered together in one response (to the newest message).
+        Mentions and replies to the bot are always answered immediately.
+        Set to `0` to respond immediately.
+        """
+        if seconds < 0 or seconds > 10:
+            return await ctx.send("Please enter a number between 0 and 10")
+        await self.config.guild(ctx.guild).response_debounce.set(seconds)
+        embed = discord.Embed(
+            title="The response debounce window is now:",
+            description=f"{seconds} seconds",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
     @trigger.command(name="reply_to_mentions", aliases=["mentions_replies"])
     @checks.is_owner()
     async def force_reply_to_mentions(self, ctx: commands.Context):
@@ -172,6 +190,18 @@ class TriggerSettings(MixinMeta):
         await self.config.guild(ctx.guild).always_reply_on_words.set([])
         return await ctx.send("The trigger words list has been cleared.")
 
+    @trigger_words.command(name="wholewords", aliases=["whole"])
+    async def trigger_words_whole(self, ctx: commands.Context):
+        """Toggles only matching trigger words as whole words (eg. `cat` will not match `concatenate`)"""
+        value = not await self.config.guild(ctx.guild).always_reply_on_words_whole_words()
+        await self.config.guild(ctx.guild).always_reply_on_words_whole_words.set(value)
+        embed = discord.Embed(
+            title="Only matching whole trigger words is now:",
+            description=f"{value}",
+            color=await ctx.embed_color(),
+        )
+        return await ctx.send(embed=embed)
+
     async def show_trigger_always_words(
         self, ctx: commands.Context, embed: discord.Embed
     ):
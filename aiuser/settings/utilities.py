@@ -1,9 +1,9 @@
 import discord
-import tiktoken
 from openai import AsyncOpenAI
 from redbot.core import Config, commands
 
 from aiuser.types.enums import MentionType
+from aiuser.utils.tokens import get_encoding, token_counter
 from aiuser.utils.utilities import (
     format_variables,
     is_using_openai_endpoint,
@@ -64,11 +64,8 @@ async def get_tokens(config: Config, ctx: commands.Context, prompt: str) -> int:
     if not prompt:
         return 0
     prompt = await format_variables(ctx, prompt)  # to provide a better estimate
-    try:
-        encoding = tiktoken.encoding_for_model(await config.guild(ctx.guild).model())
-    except KeyError:
-        encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-    return len(encoding.encode(prompt, disallowed_special=()))
+    encoding = get_encoding(await config.guild(ctx.guild).model())
+    return token_counter.count(encoding, prompt)
 
 
 def truncate_prompt(prompt: str, limit: int = 1900) -> str:
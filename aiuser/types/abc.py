@@ -1,13 +1,30 @@
 import re
-from abc import ABC
+from abc import ABC, abstractmethod
+from collections import Counter
 from datetime import datetime
+from typing import Optional
 
+import discord
 from openai import AsyncOpenAI
 from redbot.core import Config, commands
 from redbot.core.bot import Red
 
+from aiuser.core.embed_waiter import EmbedWaiter
+from aiuser.core.llm_scheduler import LLMScheduler
+from aiuser.core.message_buffer import MessageBuffer
+from aiuser.core.opt_store import OptStore
+from aiuser.core.ratelimits import RateLimitGovernor
+from aiuser.core.response_coordinator import ResponseCoordinator
+from aiuser.core.settings_cache import SettingsCache
+from aiuser.core.sticker_cache import StickerCache
+from aiuser.functions.registry import ToolRegistry
+from aiuser.messages_list.conversation import ConversationStore
+from aiuser.messages_list.converter.embed.youtube import YoutubeMetadata
+from aiuser.messages_list.converter.image.local_worker import LocalVisionWorker
+from aiuser.messages_list.converter.image.preprocess import ImagePreprocessor
 from aiuser.messages_list.entry import MessageEntry
 from aiuser.utils.cache import Cache
+from aiuser.utils.http import HTTPSessionManager
 
 
 # for other settings to use
@@ -33,3 +50,27 @@ class MixinMeta(ABC):
         self.channels_whitelist: dict[int, list[int]]
         self.openai_client: AsyncOpenAI
         self.optindefault: dict[int, bool]
+        self.settings_cache: SettingsCache
+        self.opt_store: OptStore
+        self.prefilter_stats: Counter[str]
+        self.usage_stats: Counter[str]
+        self.message_buffer: MessageBuffer
+        self.embed_waiter: EmbedWaiter
+        self.conversations: ConversationStore
+        self.response_coordinator: ResponseCoordinator
+        self.ratelimits: RateLimitGovernor
+        self.llm_scheduler: LLMScheduler
+        self.http_sessions: HTTPSessionManager
+        self.youtube: YoutubeMetadata
+        self.sticker_cache: StickerCache
+        self.tool_registry: ToolRegistry
+        self.image_preprocessor: ImagePreprocessor
+        self.local_vision: LocalVisionWorker
+
+    @abstractmethod
+    async def reload_settings(self, guild: Optional[discord.Guild] = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def reload_openai_client(self):
+        raise NotImplementedError
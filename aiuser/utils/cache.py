@@ -1,24 +1,145 @@
-class Cache(dict):
-    def __init__(self, limit: int):
-        super().__init__()
+import sys
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Generic, Hashable, Iterable, Iterator, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires", "tags")
+
+    def __init__(self, value, size: int, expires: Optional[float], tags: frozenset):
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.tags = tags
+
+
+def approximate_size(value) -> int:
+    """Rough memory footprint of a value, following lists / dicts one level deep"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
+
+
+class Cache(Generic[K, V]):
+    """
+    LRU cache with O(1) operations.
+
+    Bounded by entry count and optionally by approximate size in bytes, entries can expire after a TTL.
+    Entries can be tagged (eg. with an author id) so that all entries of a tag can be evicted at once.
+    Missing keys return None on `cache[key]`.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Callable[[V], int] = approximate_size,
+    ):
         self.limit = limit
-        self.keys = []
-
-    def __setitem__(self, key, value):
-        if key in self:
-            self.keys.remove(key)
-            self.keys.append(key)
-        else:
-            if len(self) >= self.limit:
-                oldest_key = self.keys.pop(0)
-                del self[oldest_key]
-            self.keys.append(key)
-        super().__setitem__(key, value)
-
-    def __getitem__(self, key):
-        if key in self:
-            self.keys.remove(key)
-            self.keys.append(key)
-            return super().__getitem__(key)
-        else:
-            return None
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.bytes = 0
+        self.stats: Counter[str] = Counter()
+        self._entries: OrderedDict[K, _Entry] = OrderedDict()
+        self._tags: dict[Hashable, set[K]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._entries))
+
+    def __contains__(self, key: K) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if self._is_expired(entry):
+            self._remove(key, "expirations")
+            return False
+        return True
+
+    def __getitem__(self, key: K) -> Optional[V]:
+        return self.get(key)
+
+    def __setitem__(self, key: K, value: V):
+        self.set(key, value)
+
+    def __delitem__(self, key: K):
+        self.pop(key)
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return default
+        if self._is_expired(entry):
+            self._remove(key, "expirations")
+            self.stats["misses"] += 1
+            return default
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry.value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None, tags: Iterable[Hashable] = ()):
+        """Add or replace an entry, `ttl` overrides the cache's default TTL"""
+        if key in self._entries:
+            self._remove(key)
+
+        ttl = ttl if ttl is not None else self.ttl
+        entry = _Entry(
+            value,
+            self.sizeof(value) if self.max_bytes else 0,
+            time.monotonic() + ttl if ttl is not None else None,
+            frozenset(tags),
+        )
+        self._entries[key] = entry
+        self.bytes += entry.size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.limit or (
+            self.max_bytes and self.bytes > self.max_bytes and len(self._entries) > 1
+        ):
+            self._remove(next(iter(self._entries)), "evictions")
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        if key not in self._entries:
+            return default
+        return self._remove(key).value
+
+    def evict_tag(self, tag: Hashable) -> int:
+        """Remove every entry with this tag, returns how many were removed"""
+        keys = self._tags.pop(tag, set())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self.bytes = 0
+
+    def _is_expired(self, entry: _Entry) -> bool:
+        return entry.expires is not None and entry.expires <= time.monotonic()
+
+    def _remove(self, key: K, reason: Optional[str] = None) -> _Entry:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        if reason:
+            self.stats[reason] += 1
+        return entry
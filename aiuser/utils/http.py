@@ -0,0 +1,86 @@
+import logging
+from collections import Counter
+from typing import Optional
+
+import aiohttp
+
+from aiuser.config.constants import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_TOTAL_TIMEOUT,
+)
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+
+class HTTPSessionManager:
+    """
+    One pooled aiohttp session for the cog's outbound requests (tools, YouTube, image providers, etc.)
+    Connections are kept alive per host and DNS lookups are cached, so repeated calls skip the DNS / TCP / TLS setup.
+    Created on first use, closed when the cog unloads.
+    """
+
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+        keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+        timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(
+            total=HTTP_TOTAL_TIMEOUT, sock_connect=HTTP_CONNECT_TIMEOUT
+        ),
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.stats: Counter[str] = Counter()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def get(self) -> aiohttp.ClientSession:
+        """The shared session, don't close it (or use it as a context manager)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout, trace_configs=[self._trace_config()]
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(*_):
+            self.stats["requests"] += 1
+
+        async def on_connection_create_end(*_):
+            self.stats["connections opened"] += 1
+
+        async def on_connection_reuseconn(*_):
+            self.stats["connections reused"] += 1
+
+        async def on_dns_cache_hit(*_):
+            self.stats["dns cache hits"] += 1
+
+        async def on_dns_cache_miss(*_):
+            self.stats["dns cache misses"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
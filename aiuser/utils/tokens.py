@@ -0,0 +1,53 @@
+import logging
+from typing import Hashable, Optional
+
+import tiktoken
+
+from aiuser.config.constants import TOKEN_COUNT_CACHE_SIZE
+from aiuser.utils.cache import Cache
+
+logger = logging.getLogger("red.bz_cogs.aiuser")
+
+FALLBACK_ENCODING_MODEL = "gpt-3.5-turbo"
+
+# model name -> encoding (None if tiktoken doesn't know the model)
+_encodings: dict[str, Optional[tiktoken.Encoding]] = {}
+
+
+def get_encoding(model: str, fallback: bool = True) -> tiktoken.Encoding:
+    """
+    Get the (process-wide, loaded once) encoding for a model.
+    Unknown models use the fallback encoding, or raise KeyError if `fallback` is False.
+    """
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = None
+
+    encoding = _encodings[model]
+    if encoding is None:
+        if not fallback:
+            raise KeyError(f"No tokenizer known for model {model}")
+        return get_encoding(FALLBACK_ENCODING_MODEL)
+    return encoding
+
+
+class TokenCounter:
+    """Token counts, memoized by a caller given key or by the text itself"""
+
+    def __init__(self, limit: int = TOKEN_COUNT_CACHE_SIZE):
+        self.counts: Cache[tuple, int] = Cache(limit=limit)
+
+    def count(self, encoding: tiktoken.Encoding, text: str, key: Optional[Hashable] = None) -> int:
+        cache_key = (encoding.name, key if key is not None else hash(text))
+        count = self.counts[cache_key]
+        if count is not None:
+            return count
+
+        count = len(encoding.encode(text, disallowed_special=()))
+        self.counts[cache_key] = count
+        return count
+
+
+token_counter = TokenCounter()
@@ -1,19 +1,25 @@
 import asyncio
 import functools
-import importlib
+import inspect
 import logging
 import random
+import re
+import string
 from datetime import datetime
-from pathlib import Path
-from typing import Callable, Coroutine
+from typing import Any, Callable, Coroutine, Optional
 
 import discord
 from discord import Message
 from openai import AsyncOpenAI
-from redbot.core import Config, commands
+from redbot.core import commands
 
-from aiuser.config.constants import OPENROUTER_URL, YOUTUBE_URL_PATTERN
-from aiuser.functions.tool_call import ToolCall
+from aiuser.config.constants import (
+    APPLICATION_INFO_TTL,
+    OPENROUTER_URL,
+    PROMPT_TEMPLATE_CACHE_SIZE,
+    YOUTUBE_URL_PATTERN,
+)
+from aiuser.utils.cache import Cache
 
 logger = logging.getLogger("red.bz_cogs.aiuser")
 
@@ -33,53 +39,135 @@ def to_thread(timeout=300):
     return decorator
 
 
-async def format_variables(ctx: commands.Context, text: str):
-    """
-    Insert supported variables into string if they are present
-    """
-    botname = ctx.message.guild.me.nick or ctx.bot.user.display_name
-    app_info = await ctx.bot.application_info()
-    botowner = app_info.owner.name
-    authorname = ctx.message.author.display_name
-    authortoprole = ctx.message.author.top_role.name
-    authormention = ctx.message.author.mention
+# variable name -> function computing its value (sync or async) from the context
+PROMPT_VARIABLES: dict[str, Callable[[commands.Context], Any]] = {}
+
+# change from request to request, kept out of the prompt prefix by the cache-stable prompt layout
+VOLATILE_PROMPT_VARIABLES = frozenset(
+    {"authorname", "authortoprole", "authormention", "serveremojis", "currenttime", "randomnumber"}
+)
+
+# bot user id -> owner name, application info rarely changes
+_bot_owners: Cache[int, str] = Cache(limit=8, ttl=APPLICATION_INFO_TTL)
+
+
+def prompt_variable(func: Callable[[commands.Context], Any]):
+    PROMPT_VARIABLES[func.__name__] = func
+    return func
+
+
+@prompt_variable
+def botname(ctx: commands.Context):
+    return ctx.message.guild.me.nick or ctx.bot.user.display_name
+
+
+@prompt_variable
+async def botowner(ctx: commands.Context):
+    owner = _bot_owners[ctx.bot.user.id]
+    if owner is None:
+        app_info = await ctx.bot.application_info()
+        owner = _bot_owners[ctx.bot.user.id] = app_info.owner.name
+    return owner
+
 
-    servername = ctx.guild.name
-    channelname = ctx.message.channel.name
-    currentdate = datetime.today().strftime("%Y/%m/%d")
-    currentweekday = datetime.today().strftime("%A")
-    currenttime = datetime.today().strftime("%H:%M")
+@prompt_variable
+def authorname(ctx: commands.Context):
+    return ctx.message.author.display_name
 
-    randomnumber = random.randint(0, 100)
 
+@prompt_variable
+def authortoprole(ctx: commands.Context):
+    return ctx.message.author.top_role.name
+
+
+@prompt_variable
+def authormention(ctx: commands.Context):
+    return ctx.message.author.mention
+
+
+@prompt_variable
+def servername(ctx: commands.Context):
+    return ctx.guild.name
+
+
+@prompt_variable
+def serveremojis(ctx: commands.Context):
+    emojis = [str(e) for e in ctx.message.guild.emojis]
+    random.shuffle(emojis)
+    return " ".join(emojis)
+
+
+@prompt_variable
+def channelname(ctx: commands.Context):
+    return ctx.message.channel.name
+
+
+@prompt_variable
+def channeltopic(ctx: commands.Context):
     if isinstance(ctx.message.channel, discord.Thread):
-        channeltopic = ctx.message.channel.parent.topic
-    else:
-        channeltopic = ctx.message.channel.topic
+        return ctx.message.channel.parent.topic
+    return ctx.message.channel.topic
+
 
-    serveremojis = [str(e) for e in ctx.message.guild.emojis]
-    random.shuffle(serveremojis)
-    serveremojis = " ".join(serveremojis)
+@prompt_variable
+def currentdate(_: commands.Context):
+    return datetime.today().strftime("%Y/%m/%d")
+
+
+@prompt_variable
+def currentweekday(_: commands.Context):
+    return datetime.today().strftime("%A")
+
+
+@prompt_variable
+def currenttime(_: commands.Context):
+    return datetime.today().strftime("%H:%M")
+
+
+@prompt_variable
+def randomnumber(_: commands.Context):
+    return random.randint(0, 100)
+
+
+@functools.lru_cache(maxsize=PROMPT_TEMPLATE_CACHE_SIZE)
+def get_template_variables(text: str) -> frozenset[str]:
+    """Names of the variables used in a template, parsed once per template"""
+    names = set()
+    for _, field_name, _, _ in string.Formatter().parse(text):
+        if field_name:
+            names.add(re.split(r"[.\[]", field_name, maxsplit=1)[0])
+    return frozenset(names)
+
+
+async def format_variables(ctx: commands.Context, text: str, deferred: Optional[dict] = None):
+    """
+    Insert supported variables into string if they are present
+
+    If `deferred` is given, volatile variables are left as `[name]` placeholders
+    and their values are put in `deferred` instead
+    """
+    try:
+        names = get_template_variables(text)
+    except ValueError:
+        logger.exception("Invalid format in message", exc_info=True)
+        return text
+
+    values = {}
+    for name in names & PROMPT_VARIABLES.keys():
+        value = PROMPT_VARIABLES[name](ctx)
+        value = await value if inspect.isawaitable(value) else value
+        if deferred is not None and name in VOLATILE_PROMPT_VARIABLES:
+            deferred[name] = value
+            value = f"[{name}]"
+        values[name] = value
 
     try:
-        res = text.format(
-            botname=botname,
-            botowner=botowner,
-            authorname=authorname,
-            authortoprole=authortoprole,
-            authormention=authormention,
-            servername=servername,
-            serveremojis=serveremojis,
-            channelname=channelname,
-            channeltopic=channeltopic,
-            currentdate=currentdate,
-            currentweekday=currentweekday,
-            currenttime=currenttime,
-            randomnumber=randomnumber,
-        )
+        res = text.format(**values)
         return res
     except KeyError:
         logger.exception("Invalid key in message", exc_info=True)
+        if deferred is not None:
+            deferred.clear()
         return text
 
 
@@ -104,21 +192,3 @@ def is_using_openai_endpoint(client: AsyncOpenAI):
 
 def is_using_openrouter_endpoint(client: AsyncOpenAI):
     return str(client.base_url).startswith(OPENROUTER_URL)
-
-
-async def get_enabled_tools(config: Config, ctx: commands.Context) -> list:
-    functions_dir = Path(__file__).parent.parent / "functions"
-
-    for item in functions_dir.iterdir():
-        if item.is_dir() and not item.name.startswith("__"):
-            try:
-                importlib.import_module(f"aiuser.functions.{item.name}.tool_call")
-            except ImportError:
-                continue
-
-    enabled_tools = await config.guild(ctx.guild).function_calling_functions()
-    tool_classes = {cls.function_name: cls for cls in ToolCall.__subclasses__()}
-
-    return [
-        tool_classes[name](config=config, ctx=ctx) for name in enabled_tools if name in tool_classes
-    ]
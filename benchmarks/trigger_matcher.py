@@ -0,0 +1,52 @@
+"""
+Compares the compiled TriggerMatcher against the plain `any(word in text ...)` scans it replaced.
+
+    python benchmarks/trigger_matcher.py
+"""
+
+import importlib.util
+import random
+import string
+import timeit
+from pathlib import Path
+
+# load the module directly, so the benchmark doesn't need Red installed
+spec = importlib.util.spec_from_file_location(
+    "matcher", Path(__file__).parent.parent / "aimage" / "common" / "matcher.py"
+)
+matcher_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(matcher_module)
+TriggerMatcher = matcher_module.TriggerMatcher
+
+random.seed(0)
+WORDS = ["".join(random.choices(string.ascii_lowercase, k=random.randint(3, 10))) for _ in range(200)]
+PROMPT = (
+    "masterpiece, best quality, 1girl, solo, long hair, looking at viewer, smile, "
+    "outdoors, sky, cloud, tree, scenery, sunset, detailed background, soft lighting"
+)
+MESSAGE = "hey can you send me a picture of yourself at the beach? " * 3
+NUMBER = 20000
+
+
+def substring_scan(words, text):
+    text = text.lower()
+    return any(word in text for word in words)
+
+
+def run(name, words, text):
+    matcher = TriggerMatcher(words)
+    whole_matcher = TriggerMatcher(words, whole_words=True)
+    results = {
+        "any(word in text)": timeit.timeit(lambda: substring_scan(words, text), number=NUMBER),
+        "TriggerMatcher": timeit.timeit(lambda: matcher.search(text), number=NUMBER),
+        "TriggerMatcher (whole words)": timeit.timeit(lambda: whole_matcher.search(text), number=NUMBER),
+    }
+    print(f"{name} ({len(words)} words, {len(text)} chars, no match):")
+    for label, seconds in results.items():
+        print(f"  {label:<30} {seconds / NUMBER * 1e6:8.2f} µs/call")
+
+
+if __name__ == "__main__":
+    run("image blacklist", WORDS, PROMPT)
+    run("trigger words", WORDS[:10], MESSAGE)
+    run("grok triggers", ["grok", "gork"], "what is going on here, is this true?")